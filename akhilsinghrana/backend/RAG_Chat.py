@@ -4,56 +4,211 @@ from dotenv import load_dotenv
 
 # load raw files
 from functools import lru_cache
-from langchain_community.document_loaders import html_bs
 from langchain_huggingface import HuggingFaceEndpointEmbeddings
 
-from langchain_text_splitters import HTMLHeaderTextSplitter
-
 # from langchain_core.pydantic_v1 import BaseModel, Field
 # from langchain_community.embeddings import HuggingFaceBgeEmbeddings
 from langchain_community.vectorstores import FAISS
+from langchain_community.vectorstores.utils import DistanceStrategy
 from langchain_groq import ChatGroq
 from langchain_huggingface import HuggingFaceEndpoint
 from langchain_core.prompts import PromptTemplate
 from langchain_core.output_parsers import StrOutputParser, JsonOutputParser
+from langchain_core.exceptions import OutputParserException
 from langchain_core.documents import Document
+from langchain_core.runnables import RunnableLambda
 from langchain_tavily import TavilySearch
 
-from typing_extensions import TypedDict, List
+from typing_extensions import TypedDict, List, Optional
 from tqdm import tqdm
+from langgraph.config import get_stream_writer
 from langgraph.graph import END, StateGraph
+import copy
 import uuid
+import asyncio
+from types import SimpleNamespace
+
+import numpy as np
+
+from akhilsinghrana.backend import context_packing, html_chunker, indexing, metrics
+from akhilsinghrana.backend.llm_router import LazyRunnable, LLMRouter
+from akhilsinghrana.backend.embeddings import CachedEmbeddings, normalize_text
+from akhilsinghrana.backend.vector_store import MMapVectorStore, euclidean_relevance
+from akhilsinghrana.backend.web_search import CachedWebSearch
 
 load_dotenv(os.path.join(os.path.dirname(__file__), ".env"))
 logger = logging.getLogger(__name__)
 
 
 class RAGChat:
+    # "concurrent": one grader call per document, fanned out with at most
+    # grader_concurrency calls in flight. "batch": a single grader call that
+    # scores every document at once, falling back to "concurrent" on bad JSON.
+    GRADING_MODES = ("concurrent", "batch")
+    grading_mode = os.getenv("GRADING_MODE", "concurrent")
+    grader_concurrency = int(os.getenv("GRADER_CONCURRENCY", 3))
+    # Relevance tiers on the retriever's 0..1 score: documents scoring at least
+    # relevance_accept are kept without asking the grader, those below
+    # relevance_reject are dropped, and only the band in between (or documents
+    # without a score) is graded by the LLM. Each document adds its tier's
+    # step name to the answer's steps.
+    relevance_accept = float(os.getenv("RELEVANCE_ACCEPT_SCORE", 0.75))
+    relevance_reject = float(os.getenv("RELEVANCE_REJECT_SCORE", 0.35))
+    TIER_STEPS = {"accept": "accept_by_score", "grade": "grade_by_llm", "reject": "reject_by_score"}
+    # Each run goes to the Groq pipeline, or to the one compiled for the HF
+    # fallback when Groq fails or its circuit breaker is open (see llm_router).
+    # The fallback pipeline is only built on the first run routed to it.
+    # llm_timeout bounds each LLM call, chat_timeout a whole async graph run.
+    llm_timeout = float(os.getenv("LLM_TIMEOUT", 20))
+    chat_timeout = float(os.getenv("CHAT_TIMEOUT", 60))
+    breaker_failures = int(os.getenv("LLM_BREAKER_FAILURES", 3))
+    breaker_reset = float(os.getenv("LLM_BREAKER_RESET", 30))
+    # e.g. 0.95: also start the fallback once a run is slower than Groq's p95; unset disables hedging
+    hedge_percentile = float(os.getenv("LLM_HEDGE_PERCENTILE")) if os.getenv("LLM_HEDGE_PERCENTILE") else None
+    hf_provider_name = "huggingface_endpoint"  # the _llm_type of get_hf_llm(), known before it is built
+    # "faiss" serves db/faiss_db as is; "mmap" serves a memory-mapped copy in
+    # db/mmap_db (see vector_store), shared by all workers and built from
+    # faiss_db with a vector_index of "flat", "hnsw" or "ivfpq". faiss_db
+    # stays the copy that indexing updates.
+    vector_store_format = os.getenv("VECTOR_STORE_FORMAT", "faiss")
+    vector_index = os.getenv("VECTOR_INDEX", "flat")
+    # Grader, web-search and generation calls in flight at once in get_answers
+    batch_concurrency = int(os.getenv("BATCH_CONCURRENCY", 4))
+    # Web search results are cached per normalised query (see web_search). With
+    # speculative_search_score set, an async run whose lowest retrieval score is
+    # below it starts its web search while grading runs, and drops it if grading
+    # keeps every document; unset disables speculation.
+    web_search_cache_size = int(os.getenv("WEB_SEARCH_CACHE_SIZE", 256))
+    web_search_cache_ttl = float(os.getenv("WEB_SEARCH_CACHE_TTL", 3600))
+    speculative_search_score = (
+        float(os.getenv("SPECULATIVE_SEARCH_SCORE")) if os.getenv("SPECULATIVE_SEARCH_SCORE") else None
+    )
+    # Estimated tokens of document context in the generate prompt (see context_packing); 0 for no limit
+    context_token_budget = int(os.getenv("CONTEXT_TOKEN_BUDGET", 1500))
+
     def __init__(self, recreateVectorDB=False, **kwargs) -> None:
+        self.grading_mode = kwargs.pop("grading_mode", self.grading_mode)
+        self.grader_concurrency = kwargs.pop("grader_concurrency", self.grader_concurrency)
+        self.relevance_accept = kwargs.pop("relevance_accept", self.relevance_accept)
+        self.relevance_reject = kwargs.pop("relevance_reject", self.relevance_reject)
+        self.chat_timeout = kwargs.pop("chat_timeout", self.chat_timeout)
+        self.hedge_percentile = kwargs.pop("hedge_percentile", self.hedge_percentile)
+        self.batch_concurrency = kwargs.pop("batch_concurrency", self.batch_concurrency)
+        self.speculative_search_score = kwargs.pop("speculative_search_score", self.speculative_search_score)
+        self.context_token_budget = kwargs.pop("context_token_budget", self.context_token_budget)
+        if self.grading_mode not in self.GRADING_MODES:
+            raise ValueError(f"Unknown grading_mode {self.grading_mode!r}, expected one of {self.GRADING_MODES}")
+        if self.relevance_reject > self.relevance_accept:
+            raise ValueError(
+                f"relevance_reject ({self.relevance_reject}) must not exceed relevance_accept ({self.relevance_accept})"
+            )
+        self.vector_store_format = kwargs.pop("vector_store_format", self.vector_store_format)
+        self.vector_index = kwargs.pop("vector_index", self.vector_index)
+        if self.vector_store_format not in ("faiss", "mmap"):
+            raise ValueError(f"Unknown vector_store_format {self.vector_store_format!r}, expected 'faiss' or 'mmap'")
         self.persistent_directory = os.path.join(os.path.dirname(__file__), "db", "faiss_db")
-        self.embeddings = self.get_embeddings()
-        self.retriever = self.get_retriever(recreateVectorDB, **kwargs)
-        self.llm = self.get_llm()  # defaults to groq
+        self.mmap_directory = os.path.join(os.path.dirname(__file__), "db", "mmap_db")
+        # Backends can be injected (see make_fake_chatbot in tests/fakes.py) to run without API keys or an index
+        self.embeddings = kwargs.pop("embeddings", None) or self.get_embeddings()
+        # Retriever and vector store sit in one holder that the fallback pipeline (a shallow copy)
+        # shares, so update_vector_store swaps the index for every provider's graph at once
+        self._retrieval = SimpleNamespace(retriever=None, vectorstore=None)
+        self.vectorstore = kwargs.pop("vectorstore", None)
+        retriever = kwargs.pop("retriever", None)
+        if retriever is None and self.vectorstore is not None:
+            retriever = self.as_retriever(self.vectorstore)
+        self.retriever = retriever or self.get_retriever(recreateVectorDB, **kwargs)
+        llm = kwargs.pop("llm", None)
+        self.llm = llm or self.get_llm()  # defaults to groq
+        # An injected llm has no fallback unless one is injected as well; by default it is get_hf_llm()
+        self.fallback_llm = kwargs.pop("fallback_llm", None)
+        self._default_fallback = self.fallback_llm is None and llm is None
+        self._web_search_tool = kwargs.pop("web_search_tool", None)  # lazy-init: requires TAVILY_API_KEY at call time
+        # Shared with the fallback pipeline, which is a shallow copy of this instance
+        self.web_search_cache = CachedWebSearch(max_size=self.web_search_cache_size, ttl=self.web_search_cache_ttl)
 
         self.create_execution_pipeline()
 
     def create_execution_pipeline(self):
         self.rag_chain = self.create_rag_chain()
         self.retrieval_grader = self.create_retrieval_grader()
-        self._web_search_tool = None  # lazy-init: requires TAVILY_API_KEY at call time
+        self.batch_retrieval_grader = self.create_batch_retrieval_grader()
         self.prepare_execution_graph()
 
+        # One pipeline per provider: the router runs its graph, and aget_answers its batched LLM calls
+        self._pipelines = {self._provider_name(self.llm): self}
+        graphs = {self._provider_name(self.llm): self.custom_graph}
+        if self.fallback_llm is not None or self._default_fallback:
+            name = self._provider_name(self.fallback_llm) if self.fallback_llm is not None else self.hf_provider_name
+            name = f"{name}-fallback" if name in self._pipelines else name
+            fallback = LazyRunnable(lambda: self._pipeline_for(self.fallback_llm or self.get_hf_llm()))
+            self._pipelines[name] = fallback
+            graphs[name] = LazyRunnable(lambda: fallback.get().custom_graph)
+        self.router = LLMRouter(
+            graphs,
+            timeout=self.chat_timeout,
+            failure_threshold=self.breaker_failures,
+            reset_timeout=self.breaker_reset,
+            hedge_percentile=self.hedge_percentile,
+        )
+
+    def _pipeline_for(self, llm):
+        """A copy of this pipeline compiled against `llm`, sharing its retrieval state, embeddings and tools."""
+        pipeline = copy.copy(self)
+        pipeline.llm = llm
+        pipeline.rag_chain = pipeline.create_rag_chain()
+        pipeline.retrieval_grader = pipeline.create_retrieval_grader()
+        pipeline.batch_retrieval_grader = pipeline.create_batch_retrieval_grader()
+        pipeline.prepare_execution_graph()
+        return pipeline
+
+    @property
+    def retriever(self):
+        return self._retrieval.retriever
+
+    @retriever.setter
+    def retriever(self, retriever):
+        self._retrieval.retriever = retriever
+
+    @property
+    def vectorstore(self):
+        """The FAISS or memory-mapped store behind the retriever, searched directly by get_answers; None if unknown."""
+        return self._retrieval.vectorstore
+
+    @vectorstore.setter
+    def vectorstore(self, vectorstore):
+        self._retrieval.vectorstore = vectorstore
+
+    @staticmethod
+    def _provider_name(llm) -> str:
+        return getattr(llm, "_llm_type", None) or type(llm).__name__
+
     @property
     def web_search_tool(self):
+        """The search tool (TavilySearch unless injected) behind the shared result cache."""
         if self._web_search_tool is None:
             self._web_search_tool = TavilySearch(max_results=3)
-        return self._web_search_tool
+        self.web_search_cache.inner = self._web_search_tool
+        return self.web_search_cache
+
+    def speculate_search(self, question, scores):
+        """Start the web search for `question` in the background if its retrieval scores are low, else None."""
+        known = [score for score in scores if score is not None]
+        if self.speculative_search_score is None or not known or min(known) >= self.speculative_search_score:
+            return None
+        return self.web_search_tool.prefetch({"query": question})
 
     @lru_cache(maxsize=10)
     def get_embeddings(self):
-        return HuggingFaceEndpointEmbeddings(
-            model="BAAI/bge-large-en-v1.5",
-            huggingfacehub_api_token=os.environ.get("HF_API_KEY"),
+        # Repeated questions and unchanged chunks are served from the vector cache
+        # instead of another round-trip to the HF endpoint
+        return CachedEmbeddings(
+            HuggingFaceEndpointEmbeddings(
+                model="BAAI/bge-large-en-v1.5",
+                huggingfacehub_api_token=os.environ.get("HF_API_KEY"),
+            ),
+            max_size=int(os.getenv("EMBEDDING_CACHE_SIZE", 2048)),
+            disk_path=os.getenv("EMBEDDING_CACHE_PATH"),
         )
 
     @lru_cache(maxsize=10)
@@ -62,7 +217,7 @@ class RAGChat:
             model="llama-3.1-8b-instant",
             temperature=0,
             max_tokens=None,
-            timeout=None,
+            timeout=self.llm_timeout,
             max_retries=2,
         )
 
@@ -74,6 +229,7 @@ class RAGChat:
             repo_id=repo_id,
             max_length=128,
             temperature=0.5,
+            timeout=self.llm_timeout,
             huggingfacehub_api_token=os.environ.get("HF_API_KEY"),
         )
 
@@ -106,41 +262,171 @@ class RAGChat:
         )
         return prompt | self.llm | JsonOutputParser()
 
+    def create_batch_retrieval_grader(self):
+        prompt = PromptTemplate(
+            template="""You are a grader assessing relevance of retrieved documents to a user question. 
+            Here are the {count} retrieved documents: \n\n {documents} \n\n
+            Here is the user question: {question} \n
+            If a document contains keywords or any relevant information to the user question, grade it as relevant. 
+            It does not need to be a stringent test. The goal is to filter out erroneous retrievals. Please be little moderate while scoring.
+            Give a binary score 'yes' or 'no' for every document to indicate whether it is relevant to the question. 
+            Provide the scores as a JSON with a single key 'scores' holding a list of exactly {count} 'yes'/'no' values, 
+            in document order, and no preamble or explanation.""",
+            input_variables=["question", "documents", "count"],
+        )
+        return prompt | self.llm | JsonOutputParser()
+
+    def grade(self, question, documents):
+        """Return one 'yes'/'no' grade per document using the configured grading_mode."""
+        if not documents:
+            return []
+        if self.grading_mode == "batch":
+            try:
+                scores = self.batch_retrieval_grader.invoke(self._batch_grader_input(question, documents))
+                return self._parse_batch_grades(scores, len(documents))
+            except (OutputParserException, ValueError) as e:
+                logger.warning(f"Batch grading returned malformed scores ({e}), grading per document")
+        scores = self.retrieval_grader.batch(
+            [{"question": question, "document": d.page_content} for d in documents],
+            config={"max_concurrency": self.grader_concurrency},
+        )
+        return [score["score"] for score in scores]
+
+    async def agrade(self, question, documents):
+        """Async counterpart of grade."""
+        if not documents:
+            return []
+        if self.grading_mode == "batch":
+            try:
+                scores = await self.batch_retrieval_grader.ainvoke(self._batch_grader_input(question, documents))
+                return self._parse_batch_grades(scores, len(documents))
+            except (OutputParserException, ValueError) as e:
+                logger.warning(f"Batch grading returned malformed scores ({e}), grading per document")
+        scores = await self.retrieval_grader.abatch(
+            [{"question": question, "document": d.page_content} for d in documents],
+            config={"max_concurrency": self.grader_concurrency},
+        )
+        return [score["score"] for score in scores]
+
+    @staticmethod
+    def _batch_grader_input(question, documents):
+        numbered = "\n\n".join(f"Document {i}: {d.page_content}" for i, d in enumerate(documents, start=1))
+        return {"question": question, "documents": numbered, "count": len(documents)}
+
+    @staticmethod
+    def _parse_batch_grades(scores, count):
+        if isinstance(scores, dict):
+            scores = scores.get("scores")
+        if not isinstance(scores, list) or len(scores) != count:
+            raise ValueError(f"expected a list of {count} scores, got {scores!r}")
+        grades = [str(score).strip().lower() for score in scores]
+        if any(grade not in ("yes", "no") for grade in grades):
+            raise ValueError(f"scores must be 'yes' or 'no', got {scores!r}")
+        return grades
+
+    def pack_context(self, documents, scores=None):
+        """The generate prompt's context: deduplicated, best-scored first, source-tagged, within the token budget."""
+        text, _ = context_packing.pack_context(documents, scores, budget=self.context_token_budget)
+        return text
+
+    def relevance_tiers(self, scores):
+        """Tier per document score: "accept", "reject", or "grade" for the uncertain band and unscored documents."""
+        tiers = []
+        for score in scores:
+            if score is None or self.relevance_reject <= score < self.relevance_accept:
+                tiers.append("grade")
+            elif score >= self.relevance_accept:
+                tiers.append("accept")
+            else:
+                tiers.append("reject")
+        return tiers
+
+    @staticmethod
+    def _uncertain(documents, tiers):
+        return [d for d, tier in zip(documents, tiers) if tier == "grade"]
+
+    @staticmethod
+    def _merge_tier_grades(tiers, llm_grades):
+        llm_grades = iter(llm_grades)
+        return ["yes" if tier == "accept" else "no" if tier == "reject" else next(llm_grades) for tier in tiers]
+
+    @staticmethod
+    def _filter_graded(documents, grades, scores=None):
+        scores = scores if scores is not None else [None] * len(documents)
+        kept = [(d, score) for d, score, grade in zip(documents, scores, grades) if grade == "yes"]
+        search = "Yes" if len(kept) < len(documents) else "No"
+        return [d for d, _ in kept], [score for _, score in kept], search
+
+    @staticmethod
+    def _unpack_scored(results):
+        """Split retriever output into (documents, scores); plain Documents get a score of None."""
+        documents, scores = [], []
+        for result in results:
+            document, score = result if isinstance(result, tuple) else (result, None)
+            documents.append(document)
+            scores.append(None if score is None else float(score))
+        return documents, scores
+
     def get_retriever(self, recreateVectorDB, **kwargs):
         if recreateVectorDB or not os.path.exists(self.persistent_directory):
-            vectorstore = self.create_vector_store(**kwargs)
+            vectorstore = self.serving_store(self.create_vector_store(**kwargs))
         else:
-            vectorstore = FAISS.load_local(
-                self.persistent_directory,
-                self.embeddings,
-                allow_dangerous_deserialization=True,
+            vectorstore = self.serving_store()
+        self.vectorstore = vectorstore
+        return self.as_retriever(vectorstore)
+
+    def serving_store(self, vectorstore=None):
+        """
+        The store to answer from for the saved FAISS index (`vectorstore`, if
+        already loaded): the index itself, or its memory-mapped export, which
+        is rebuilt when it was not converted from the index as saved now.
+        """
+        if self.vector_store_format != "mmap":
+            return vectorstore if vectorstore is not None else self.load_vector_store()
+        return MMapVectorStore.open_or_build(
+            self.mmap_directory,
+            self.persistent_directory,
+            lambda: vectorstore if vectorstore is not None else self.load_vector_store(),
+            self.embeddings,
+            index=self.vector_index,
+        )
+
+    @staticmethod
+    def as_retriever(vectorstore, k: int = 3, score_threshold: float = 0.1):
+        """Runnable returning [(document, relevance score in 0..1), ...] for a question."""
+
+        def retrieve(question):
+            return vectorstore.similarity_search_with_relevance_scores(question, k=k, score_threshold=score_threshold)
+
+        async def aretrieve(question):
+            return await vectorstore.asimilarity_search_with_relevance_scores(
+                question, k=k, score_threshold=score_threshold
             )
-        return vectorstore.as_retriever(
-            search_type="similarity_score_threshold",
-            search_kwargs={"k": 3, "score_threshold": 0.1},
+
+        return RunnableLambda(retrieve, afunc=aretrieve)
+
+    def load_vector_store(self):
+        return FAISS.load_local(
+            self.persistent_directory,
+            self.embeddings,
+            allow_dangerous_deserialization=True,
         )
 
-    def create_vector_store(self, **kwargs):
+    def load_documents(self, **kwargs):
+        """
+        Yield chunks of the blog HTML files in kwargs["folder"] and of the
+        structured site content. Blogs are chunked on a process pool of
+        kwargs["ingest_workers"] processes (default: CPU count) and streamed,
+        so the corpus is never held in memory as a whole.
+        """
         folder_path = kwargs.get("folder")
-        batch_size = kwargs.get("batch_size", 100)
-
-        all_splits = []
 
         # ── Load HTML blog files ──────────────────────────────────────────────
-        html_files = [
-            os.path.join(folder_path, f)
-            for f in os.listdir(folder_path)
-            if f.endswith(".html")
-        ]
-        raw_documents = []
-        for file in tqdm(html_files, desc="Loading HTML files"):
-            raw_documents.extend(html_bs.BSHTMLLoader(file).load())
-
-        headers_to_split_on = [("h1", "Header 1"), ("h2", "Header 2"), ("h3", "Header 3")]
-        text_splitter = HTMLHeaderTextSplitter(headers_to_split_on=headers_to_split_on)
-        for i in tqdm(range(0, len(raw_documents), batch_size), desc="Processing HTML"):
-            for doc in raw_documents[i : i + batch_size]:
-                all_splits.extend(text_splitter.split_text(doc.page_content))
+        html_files = html_chunker.html_files(folder_path)
+        yield from tqdm(
+            html_chunker.iter_html_chunks(html_files, workers=kwargs.get("ingest_workers")),
+            desc=f"Chunking {len(html_files)} HTML files",
+        )
 
         # ── Load site-content.json (about, publications, skills, education) ───
         content_json = os.path.join(os.path.dirname(__file__), "content", "site-content.json")
@@ -150,29 +436,75 @@ class RAGChat:
                 data = json.load(f)
             # Index the flat text_summary as one document
             if data.get("text_summary"):
-                all_splits.append(Document(
+                yield Document(
                     page_content=data["text_summary"],
                     metadata={"source": "site-content"},
-                ))
+                )
             # Index each publication individually for precise retrieval
             for pub in data.get("publications", []):
-                all_splits.append(Document(
+                yield Document(
                     page_content=f"Publication: {pub['title']} — published in {pub['venue']}. URL: {pub.get('url', '')}",
                     metadata={"source": "publications"},
-                ))
+                )
             logger.info(f"Loaded site-content.json ({len(data.get('publications', []))} publications)")
         else:
             logger.warning(f"site-content.json not found at {content_json} — skipping structured content indexing")
 
+    def create_vector_store(self, **kwargs):
         # ── Build vector store ────────────────────────────────────────────────
-        vectorstore = FAISS.from_documents(
-            documents=all_splits,
-            embedding=self.embeddings,
-        )
+        manifest = {}
+        pipeline = self.create_embedding_pipeline(**kwargs)
+        vectorstore, stats = pipeline.run_items(indexing.iter_new_chunks(self.load_documents(**kwargs), manifest))
+        logger.info(f"Vector store built: {stats}")
         os.makedirs(self.persistent_directory, exist_ok=True)
         vectorstore.save_local(self.persistent_directory)
+        indexing.save_manifest(self.persistent_directory, manifest)
+        pipeline.clear_checkpoint()
         return vectorstore
 
+    def create_embedding_pipeline(self, **kwargs):
+        """
+        Batched, retrying embedding for index builds. kwargs: batch_size (chunks
+        per request), workers (concurrent requests), max_retries.
+        """
+        return indexing.EmbeddingPipeline(
+            self.embeddings,
+            batch_size=kwargs.get("batch_size", 32),
+            workers=kwargs.get("workers", 4),
+            max_retries=kwargs.get("max_retries", 5),
+            checkpoint_dir=f"{self.persistent_directory}.checkpoint",
+        )
+
+    def update_vector_store(self, **kwargs):
+        """
+        Incrementally sync the saved index with the current sources: only new or
+        changed chunks are embedded and vectors of removed chunks are deleted.
+        Swaps the live retriever to the updated index and returns
+        {"added", "removed", "unchanged"} chunk counts.
+        """
+        if not os.path.exists(os.path.join(self.persistent_directory, "index.faiss")):
+            vectorstore = self.create_vector_store(**kwargs)
+            self.vectorstore = self.serving_store(vectorstore)
+            self.retriever = self.as_retriever(self.vectorstore)
+            added = len(vectorstore.index_to_docstore_id)
+            return {"added": added, "removed": 0, "unchanged": 0}
+
+        vectorstore = self.load_vector_store()
+        pipeline = self.create_embedding_pipeline(**kwargs)
+        manifest, stats = indexing.update_index(
+            vectorstore,
+            self.load_documents(**kwargs),
+            indexing.load_manifest(self.persistent_directory),
+            pipeline=pipeline,
+        )
+        vectorstore.save_local(self.persistent_directory)
+        indexing.save_manifest(self.persistent_directory, manifest)
+        pipeline.clear_checkpoint()
+        self.vectorstore = self.serving_store(vectorstore)
+        self.retriever = self.as_retriever(self.vectorstore)
+        logger.info(f"Vector store updated: {stats}")
+        return stats
+
     def prepare_execution_graph(self):
         class GraphState(TypedDict):
             """
@@ -183,12 +515,14 @@ class RAGChat:
                 generation: LLM generation
                 search: whether to add search
                 documents: list of documents
+                scores: retriever relevance score per document (None if unknown)
             """
 
             question: str
             generation: str
             search: str
             documents: List[str]
+            scores: List[Optional[float]]
             steps: List[str]
 
         def retrieve(state):
@@ -202,10 +536,17 @@ class RAGChat:
                 state (dict): New key added to state, documents, that contains retrieved documents
             """
             question = state["question"]
-            documents = self.retriever.invoke(question)
+            documents, scores = self._unpack_scored(self.retriever.invoke(question))
+            steps = state["steps"]
+            steps.append("retrieve_documents")
+            return {"documents": documents, "scores": scores, "question": question, "steps": steps}
+
+        async def aretrieve(state):
+            question = state["question"]
+            documents, scores = self._unpack_scored(await self.retriever.ainvoke(question))
             steps = state["steps"]
             steps.append("retrieve_documents")
-            return {"documents": documents, "question": question, "steps": steps}
+            return {"documents": documents, "scores": scores, "question": question, "steps": steps}
 
         def generate(state):
             """
@@ -221,7 +562,7 @@ class RAGChat:
             question = state["question"]
             documents = state["documents"]
             generation = self.rag_chain.invoke(
-                {"documents": documents, "question": question}
+                {"documents": self.pack_context(documents, state.get("scores")), "question": question}
             )
             steps = state["steps"]
             steps.append("generate_answer")
@@ -232,6 +573,28 @@ class RAGChat:
                 "steps": steps,
             }
 
+        async def agenerate(state):
+            question = state["question"]
+            documents = state["documents"]
+            # Stream tokens so astream_answer can forward them; a no-op writer under ainvoke
+            writer = get_stream_writer()
+            chunks = []
+            async for chunk in self.rag_chain.astream(
+                {"documents": self.pack_context(documents, state.get("scores")), "question": question}
+            ):
+                if chunk:
+                    chunks.append(chunk)
+                    writer({"token": chunk})
+            generation = "".join(chunks)
+            steps = state["steps"]
+            steps.append("generate_answer")
+            return {
+                "documents": documents,
+                "question": question,
+                "generation": generation,
+                "steps": steps,
+            }
+
         def grade_documents(state):
             """
             Determines whether the retrieved documents are relevant to the question.
@@ -245,22 +608,43 @@ class RAGChat:
 
             question = state["question"]
             documents = state["documents"]
+            scores = state.get("scores") or [None] * len(documents)
             steps = state["steps"]
             steps.append("grade_document_retrieval")
-            filtered_docs = []
-            search = "No"
-            for d in documents:
-                score = self.retrieval_grader.invoke(
-                    {"question": question, "document": d.page_content}
-                )
-                grade = score["score"]
-                if grade == "yes":
-                    filtered_docs.append(d)
-                else:
-                    search = "Yes"
-                    continue
+            tiers = self.relevance_tiers(scores)
+            steps.extend(self.TIER_STEPS[tier] for tier in tiers)
+            grades = self._merge_tier_grades(tiers, self.grade(question, self._uncertain(documents, tiers)))
+            filtered_docs, filtered_scores, search = self._filter_graded(documents, grades, scores)
+            return {
+                "documents": filtered_docs,
+                "scores": filtered_scores,
+                "question": question,
+                "search": search,
+                "steps": steps,
+            }
+
+        async def agrade_documents(state):
+            question = state["question"]
+            documents = state["documents"]
+            scores = state.get("scores") or [None] * len(documents)
+            steps = state["steps"]
+            steps.append("grade_document_retrieval")
+            tiers = self.relevance_tiers(scores)
+            steps.extend(self.TIER_STEPS[tier] for tier in tiers)
+            speculation = self.speculate_search(question, scores)
+            try:
+                grades = self._merge_tier_grades(tiers, await self.agrade(question, self._uncertain(documents, tiers)))
+            except BaseException:
+                if speculation is not None:
+                    speculation.cancel()
+                raise
+            filtered_docs, filtered_scores, search = self._filter_graded(documents, grades, scores)
+            if speculation is not None:
+                # web_search picks up the search in progress from the cache
+                speculation.settle(needed=search == "Yes")
             return {
                 "documents": filtered_docs,
+                "scores": filtered_scores,
                 "question": question,
                 "search": search,
                 "steps": steps,
@@ -282,17 +666,23 @@ class RAGChat:
             steps = state["steps"]
             steps.append("web_search")
             web_results = self.web_search_tool.invoke({"query": question})
-            # TavilySearch returns {"results": [{"content": ..., "url": ...}, ...]}
-            if isinstance(web_results, dict):
-                hits = web_results.get("results", [])
-            elif isinstance(web_results, list):
-                hits = web_results
-            else:
-                hits = []
-            documents.extend(
-                [Document(page_content=d["content"], metadata={"url": d.get("url", "")}) for d in hits]
-            )
-            return {"documents": documents, "question": question, "steps": steps}
+            web_documents = self._web_results_to_documents(web_results)
+            documents.extend(web_documents)
+            scores = list(state.get("scores") or [None] * (len(documents) - len(web_documents)))
+            scores.extend([None] * len(web_documents))
+            return {"documents": documents, "scores": scores, "question": question, "steps": steps}
+
+        async def aweb_search(state):
+            question = state["question"]
+            documents = state.get("documents", [])
+            steps = state["steps"]
+            steps.append("web_search")
+            web_results = await self.web_search_tool.ainvoke({"query": question})
+            web_documents = self._web_results_to_documents(web_results)
+            documents.extend(web_documents)
+            scores = list(state.get("scores") or [None] * (len(documents) - len(web_documents)))
+            scores.extend([None] * len(web_documents))
+            return {"documents": documents, "scores": scores, "question": question, "steps": steps}
 
         def decide_to_generate(state):
             """
@@ -313,11 +703,18 @@ class RAGChat:
         # Graph
         workflow = StateGraph(GraphState)
 
-        # Define the nodes
-        workflow.add_node("retrieve", retrieve)  # retrieve
-        workflow.add_node("grade_documents", grade_documents)  # grade documents
-        workflow.add_node("generate", generate)  # generatae
-        workflow.add_node("web_search", web_search)  # web search
+        # Define the nodes — each node has a sync and an async implementation so the
+        # same compiled graph serves both invoke() and ainvoke(), timed into chat_node_seconds
+        nodes = {
+            "retrieve": (retrieve, aretrieve),
+            "grade_documents": (grade_documents, agrade_documents),
+            "generate": (generate, agenerate),
+            "web_search": (web_search, aweb_search),
+        }
+        for name, (func, afunc) in nodes.items():
+            workflow.add_node(
+                name, RunnableLambda(metrics.timed_node(name, func), afunc=metrics.timed_node(name, afunc), name=name)
+            )
 
         # Build graph
         workflow.set_entry_point("retrieve")
@@ -336,11 +733,259 @@ class RAGChat:
         # display(Image(custom_graph.get_graph(xray=True).draw_mermaid_png())) # imageGenerate
         self.custom_graph = workflow.compile()
 
-    def get_answer(self, question: dict):
-        config = {"configurable": {"thread_id": str(uuid.uuid4())}}
+    def get_answer(self, question: dict, fallback: bool = True):
+        """With fallback=False a failure of the primary provider raises instead of failing over."""
+        config = self._run_config()
+
+        state_dict = self.router.invoke(
+            {"question": question["input"], "steps": []}, config, fallback=fallback
+        )
+
+        return {"response": state_dict["generation"], "steps": state_dict["steps"]}
+
+    async def aget_answer(self, question: dict):
+        """Async counterpart of get_answer — LLM, embedding and search calls never block the event loop."""
+        config = self._run_config()
 
-        state_dict = self.custom_graph.invoke(
+        state_dict = await self.router.ainvoke(
             {"question": question["input"], "steps": []}, config
         )
 
         return {"response": state_dict["generation"], "steps": state_dict["steps"]}
+
+    async def astream_answer(self, question: dict):
+        """
+        Run the graph and yield events as they happen.
+
+        Yields:
+            ("step", node_name) when a graph node finishes,
+            ("token", text) for each chunk produced by rag_chain,
+            ("done", {"response": ..., "steps": ...}) once at the end.
+
+        A failure before the first token fails over to the fallback provider,
+        which re-runs the graph; steps already reported are not repeated.
+        """
+        config = self._run_config()
+
+        final_state, reported = {}, set()
+        async for mode, chunk in self.router.astream(
+            {"question": question["input"], "steps": []},
+            config,
+            stream_mode=["updates", "custom"],
+            committed=lambda event: event[0] == "custom",
+        ):
+            if mode == "custom":
+                yield "token", chunk["token"]
+                continue
+            for node, update in chunk.items():
+                final_state.update(update or {})
+                if node not in reported:
+                    reported.add(node)
+                    yield "step", node
+
+        yield "done", {"response": final_state["generation"], "steps": final_state["steps"]}
+
+    def get_answers(self, questions: list) -> list:
+        """Blocking wrapper around aget_answers; not for use inside a running event loop."""
+        return asyncio.run(self.aget_answers(questions))
+
+    async def aget_answers(self, questions: list) -> list:
+        """
+        Answer many questions at once, sharing work between them.
+
+        Duplicate questions (after whitespace normalisation) are answered once.
+        Questions are embedded as queries in one call, so they share the
+        embedding cache with single chats, and when the retriever is backed
+        by FAISS they are searched with one matrix query. The LLM calls then
+        run as one shared pass on the provider the LLM router picks: every
+        (question, document) pair that needs the grader is graded
+        concurrently, and web searches and generations run with at most
+        batch_concurrency calls in flight. A question the shared pass could
+        not answer is retried on its own through the router, so it may still
+        be answered by the fallback.
+
+        Returns one item per question, in input order: {"response", "steps"}
+        like get_answer, or {"error": message}.
+        """
+        unique = list(dict.fromkeys(normalize_text(q) for q in questions))
+        config = {**self._run_config(), "max_concurrency": self.batch_concurrency}
+
+        try:
+            retrieved = await self._aretrieve_many(unique)
+        except Exception as e:
+            logger.warning(f"Batch retrieval failed ({e}), answering questions one by one")
+            retrieved = [e] * len(unique)
+        retrieved = {q: results for q, results in zip(unique, retrieved) if not isinstance(results, Exception)}
+
+        answers = {}
+        if retrieved:
+            try:
+                answers = await self.router.arun(lambda provider: self._aanswer_on(provider, retrieved, config))
+            except Exception as e:
+                logger.warning(f"Shared batch pass failed ({e}), answering questions one by one")
+
+        semaphore = asyncio.Semaphore(self.batch_concurrency)
+
+        async def retry(question):
+            async with semaphore:
+                try:
+                    answers[question] = await self.aget_answer({"input": question})
+                except Exception as e:
+                    logger.warning(f"Batch question failed: {e}")
+                    answers[question] = {"error": str(e) or type(e).__name__}
+
+        await asyncio.gather(*(retry(q) for q in unique if q not in answers))
+        return [answers[normalize_text(q)] for q in questions]
+
+    async def _aanswer_on(self, provider: str, retrieved: dict, config) -> dict:
+        """_aanswer_retrieved on `provider`'s pipeline, building it first if it is the lazy fallback."""
+        pipeline = self._pipelines[provider]
+        if isinstance(pipeline, LazyRunnable):
+            pipeline = await pipeline.aget()
+        return await pipeline._aanswer_retrieved(retrieved, config)
+
+    async def _aanswer_retrieved(self, retrieved: dict, config) -> dict:
+        """
+        The shared LLM pass of aget_answers on this pipeline's LLM, for
+        {question: [(document, score), ...]}. Returns {question: answer} for
+        the questions it answered. Raises if no question got an answer and
+        an LLM call failed, so the router counts it against the provider.
+        """
+        states = {}
+        for question, results in retrieved.items():
+            documents, scores = self._unpack_scored(results)
+            states[question] = {"documents": documents, "scores": scores, "steps": ["retrieve_documents"]}
+
+        await self._agrade_many(states, config)
+        llm_errors = [state for state in states.values() if isinstance(state, Exception)]
+
+        semaphore = asyncio.Semaphore(self.batch_concurrency)
+
+        async def web_search(question, state):
+            async with semaphore:
+                state["steps"].append("web_search")
+                web_documents = self._web_results_to_documents(await self.web_search_tool.ainvoke({"query": question}))
+            state["documents"] = state["documents"] + web_documents
+
+        searching = [(q, state) for q, state in states.items() if isinstance(state, dict) and state["search"] == "Yes"]
+        searched = await asyncio.gather(*(web_search(q, state) for q, state in searching), return_exceptions=True)
+        for (question, _), result in zip(searching, searched):
+            if isinstance(result, Exception):
+                states[question] = result
+
+        generating = [q for q, state in states.items() if isinstance(state, dict)]
+        generations = await self.rag_chain.abatch(
+            [
+                {"documents": self.pack_context(states[q]["documents"], states[q]["scores"]), "question": q}
+                for q in generating
+            ],
+            config,
+            return_exceptions=True,
+        )
+        answers = {}
+        for question, generation in zip(generating, generations):
+            if isinstance(generation, Exception):
+                llm_errors.append(generation)
+                continue
+            states[question]["steps"].append("generate_answer")
+            answers[question] = {"response": generation, "steps": states[question]["steps"]}
+        if llm_errors and not answers:
+            raise llm_errors[0]
+        return answers
+
+    async def _aretrieve_many(self, questions: list) -> list:
+        """[(document, score), ...] per question, searching FAISS-backed stores with one matrix query."""
+        faiss = isinstance(self.vectorstore, FAISS) and self._default_faiss(self.vectorstore)
+        if not faiss and not isinstance(self.vectorstore, MMapVectorStore):
+            return await self.retriever.abatch(
+                questions, config={"max_concurrency": self.batch_concurrency}, return_exceptions=True
+            )
+        # One embedding call for the batch; CachedEmbeddings keeps them in the single-chat query cache
+        if isinstance(self.embeddings, CachedEmbeddings):
+            vectors = await self.embeddings.aembed_queries(questions)
+        else:
+            vectors = await self.embeddings.aembed_documents(questions)
+        if isinstance(self.vectorstore, MMapVectorStore):
+            return await asyncio.to_thread(
+                self.vectorstore.similarity_search_with_relevance_scores_by_vectors, vectors, k=3, score_threshold=0.1
+            )
+        return await asyncio.to_thread(self._search_many, self.vectorstore, vectors)
+
+    @staticmethod
+    def _default_faiss(vectorstore) -> bool:
+        """Whether `vectorstore` scores like db/faiss_db, which uses LangChain's defaults: squared L2, no override."""
+        return (
+            vectorstore.distance_strategy == DistanceStrategy.EUCLIDEAN_DISTANCE
+            and vectorstore.override_relevance_score_fn is None
+        )
+
+    @staticmethod
+    def _search_many(vectorstore, vectors, k: int = 3, score_threshold: float = 0.1) -> list:
+        """
+        Batched counterpart of as_retriever for a FAISS store with the
+        defaults checked by _default_faiss: the same hits and scores for many
+        query vectors at once. Like db/faiss_db, the store must not normalise
+        vectors, as that setting is private to LangChain.
+        """
+        distances, indices = vectorstore.index.search(np.asarray(vectors, dtype=np.float32), k)
+        results = []
+        for row_distances, row_indices in zip(distances, indices):
+            hits = []
+            for distance, index in zip(row_distances, row_indices):
+                if index == -1:
+                    continue
+                score = euclidean_relevance(float(distance))
+                if score >= score_threshold:
+                    hits.append((vectorstore.docstore.search(vectorstore.index_to_docstore_id[index]), score))
+            results.append(hits)
+        return results
+
+    async def _agrade_many(self, states: dict, config) -> None:
+        """
+        Tier and grade the documents of every question in `states` whose
+        state is not already an error, with one concurrent grader batch over
+        all unique (question, document) pairs. A failed grade turns that
+        question's state into the error.
+        """
+        active = {question: state for question, state in states.items() if isinstance(state, dict)}
+        pairs = {}
+        for question, state in active.items():
+            state["tiers"] = self.relevance_tiers(state["scores"])
+            for document in self._uncertain(state["documents"], state["tiers"]):
+                pairs.setdefault((question, document.page_content), None)
+        grades = await self.retrieval_grader.abatch(
+            [{"question": question, "document": content} for question, content in pairs],
+            config,
+            return_exceptions=True,
+        )
+        pairs = dict(zip(pairs, grades))
+
+        for question, state in active.items():
+            tiers = state.pop("tiers")
+            llm_grades = [pairs[(question, d.page_content)] for d in self._uncertain(state["documents"], tiers)]
+            errors = [grade for grade in llm_grades if isinstance(grade, Exception)]
+            if errors:
+                states[question] = errors[0]
+                continue
+            state["steps"].append("grade_document_retrieval")
+            state["steps"].extend(self.TIER_STEPS[tier] for tier in tiers)
+            grades = self._merge_tier_grades(tiers, [grade["score"] for grade in llm_grades])
+            state["documents"], state["scores"], state["search"] = self._filter_graded(
+                state["documents"], grades, state["scores"]
+            )
+
+    @staticmethod
+    def _run_config():
+        # Token-usage callbacks reach every LLM call made inside the graph run
+        return {"configurable": {"thread_id": str(uuid.uuid4())}, "callbacks": metrics.callbacks()}
+
+    @staticmethod
+    def _web_results_to_documents(web_results):
+        # TavilySearch returns {"results": [{"content": ..., "url": ...}, ...]}
+        if isinstance(web_results, dict):
+            hits = web_results.get("results", [])
+        elif isinstance(web_results, list):
+            hits = web_results
+        else:
+            hits = []
+        return [Document(page_content=d["content"], metadata={"url": d.get("url", "")}) for d in hits]
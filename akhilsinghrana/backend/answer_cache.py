@@ -0,0 +1,76 @@
+"""
+Configuration and construction of the chat answer cache.
+
+Shared by the app (main.get_answer_cache) and the cache pre-warming job
+(prewarm), which must not import the app: importing this module only reads
+the CACHE_* settings, it opens no store and touches no file.
+"""
+import os
+import json
+import logging
+
+from dotenv import load_dotenv
+
+from akhilsinghrana.backend.cache_store import CacheStore, MemoryCacheStore, SQLiteCacheStore
+from akhilsinghrana.backend.semantic_cache import SemanticCache, normalize_question
+
+load_dotenv(os.path.join(os.path.dirname(__file__), ".env"))
+logger = logging.getLogger(__name__)
+
+_BACKEND_DIR = os.path.dirname(__file__)
+CACHE_MAX_SIZE = int(os.getenv("CACHE_MAX_SIZE", 256))
+CACHE_SIMILARITY_THRESHOLD = float(os.getenv("CACHE_SIMILARITY_THRESHOLD", 0.92))
+CACHE_TTL_SECONDS = float(os.getenv("CACHE_TTL_SECONDS", 7 * 24 * 3600))
+CACHE_BACKEND = os.getenv("CACHE_BACKEND", "sqlite")  # "sqlite" or "memory"
+CACHE_DB_PATH = os.getenv("CACHE_DB_PATH", os.path.join(_BACKEND_DIR, "db", "answer_cache.sqlite3"))
+BOT_CACHE_FILE = os.path.join(_BACKEND_DIR, "bot_cache.json")
+
+
+def create_cache_store() -> CacheStore:
+    if CACHE_BACKEND == "memory":
+        return MemoryCacheStore()
+    if CACHE_BACKEND == "sqlite":
+        return SQLiteCacheStore(CACHE_DB_PATH)
+    raise ValueError(f"Unknown CACHE_BACKEND {CACHE_BACKEND!r}")
+
+
+def seed_cache_store(store: CacheStore, cache_file: str) -> None:
+    """
+    Add the answers in the shipped bot_cache.json that `store` does not
+    hold yet; answers already in the store are kept. Vectors are filled in
+    by SemanticCache.warm().
+    """
+    try:
+        with open(cache_file, "r") as f:
+            legacy = json.load(f)
+        added = 0
+        for key, reply in legacy.items():
+            question = json.loads(key)["input"]
+            if store.get(normalize_question(question)) is None:
+                store.put(normalize_question(question), question, reply)
+                added += 1
+        store.flush()
+        logger.info(f"Seeded answer cache with {added} of {len(legacy)} entries from {cache_file}")
+    except (FileNotFoundError, json.JSONDecodeError, KeyError, TypeError) as e:
+        logger.warning(f"Could not seed answer cache from {cache_file}: {e}")
+
+
+def create_answer_cache(embeddings, cache_file: str = BOT_CACHE_FILE) -> SemanticCache:
+    """
+    Semantic cache for chat answers, persisted in the CACHE_BACKEND store
+    (topped up from `cache_file`, so a store kept across releases still
+    gets newly shipped answers) and warmed with its entries.
+    Paraphrases of a cached question ("who is akhil?", "Who is Akhil") hit
+    the same entry; see SemanticCache for matching and eviction rules.
+    """
+    store = create_cache_store()
+    seed_cache_store(store, cache_file)
+    cache = SemanticCache(
+        embeddings,
+        store=store,
+        threshold=CACHE_SIMILARITY_THRESHOLD,
+        max_size=CACHE_MAX_SIZE,
+        ttl=CACHE_TTL_SECONDS,
+    )
+    cache.warm()
+    return cache
@@ -0,0 +1,120 @@
+import os
+import gzip
+import json
+import asyncio
+import hashlib
+import logging
+import threading
+
+logger = logging.getLogger(__name__)
+
+
+class BlogPost:
+    """
+    One blog post, ready to send: the {"html": ...} JSON body plus its gzip
+    encoding, each with a strong ETag.
+    """
+
+    def __init__(self, slug: str, html: str, mtime_ns: int, size: int) -> None:
+        self.slug = slug
+        self.mtime_ns = mtime_ns
+        self.size = size
+        body = json.dumps({"html": html}).encode("utf-8")
+        digest = hashlib.sha256(body).hexdigest()[:32]
+        # Encodings are different byte sequences, so each gets its own strong ETag
+        self.variants = {"identity": (body, f'"{digest}"')}
+        self.variants["gzip"] = (gzip.compress(body, compresslevel=9, mtime=0), f'"{digest}-gzip"')
+        self.etags = {etag for _, etag in self.variants.values()}
+
+    def select(self, accept_encoding: str = ""):
+        """Return (encoding, body, etag) for the best encoding the client accepts."""
+        accepted = _accepted_encodings(accept_encoding)
+        if "gzip" in accepted:
+            return ("gzip", *self.variants["gzip"])
+        return ("identity", *self.variants["identity"])
+
+    def not_modified(self, if_none_match: str) -> bool:
+        """True if If-None-Match names any representation of this post (or is "*")."""
+        if not if_none_match:
+            return False
+        tags = {tag.strip().removeprefix("W/") for tag in if_none_match.split(",")}
+        return "*" in tags or bool(tags & self.etags)
+
+
+class BlogStore:
+    """
+    All *.html posts in `directory`, read and encoded once.
+
+    Posts are addressed by slug (file name without .html) through a dict, so
+    a request can only ever reach a file that was indexed — no path is built
+    from user input. refresh() re-reads only files whose mtime or size changed
+    and drops deleted ones; watch() calls it every `poll_interval` seconds.
+    """
+
+    def __init__(self, directory: str, poll_interval: float = 2.0) -> None:
+        self.directory = directory
+        self.poll_interval = poll_interval
+        self._posts: dict = {}
+        self._lock = threading.Lock()
+        self.refresh()
+
+    def get(self, slug: str):
+        return self._posts.get(slug)
+
+    def __len__(self) -> int:
+        return len(self._posts)
+
+    def refresh(self) -> int:
+        """Pick up added, changed and removed posts; returns how many changed."""
+        with self._lock:
+            try:
+                entries = [e for e in os.scandir(self.directory) if e.name.endswith(".html") and e.is_file()]
+            except FileNotFoundError:
+                logger.warning(f"Blog directory {self.directory} not found — no posts to serve")
+                entries = []
+
+            posts, changed = {}, 0
+            for entry in entries:
+                slug = entry.name[: -len(".html")]
+                stat = entry.stat()
+                post = self._posts.get(slug)
+                if post is None or (post.mtime_ns, post.size) != (stat.st_mtime_ns, stat.st_size):
+                    try:
+                        with open(entry.path, "r", encoding="utf-8") as f:
+                            post = BlogPost(slug, f.read(), stat.st_mtime_ns, stat.st_size)
+                    except (OSError, UnicodeDecodeError) as e:
+                        logger.warning(f"Could not load blog post {entry.path}: {e}")
+                        continue
+                    changed += 1
+                posts[slug] = post
+            changed += len(self._posts.keys() - posts.keys())
+            # Swap in one assignment so readers never see a half-built index
+            self._posts = posts
+        if changed:
+            logger.info(f"Blog store: {len(posts)} posts loaded, {changed} changed")
+        return changed
+
+    async def watch(self) -> None:
+        """Poll the directory and hot-reload changed posts; run as a background task."""
+        while True:
+            await asyncio.sleep(self.poll_interval)
+            try:
+                await asyncio.to_thread(self.refresh)
+            except Exception as e:
+                logger.warning(f"Blog reload failed: {e}")
+
+
+def _accepted_encodings(header: str) -> set:
+    accepted = set()
+    for part in header.split(","):
+        name, _, params = part.strip().partition(";")
+        q = params.strip().removeprefix("q=")
+        try:
+            if params and float(q) == 0:
+                continue
+        except ValueError:
+            pass
+        accepted.add(name.strip().lower())
+    if "*" in accepted:
+        accepted.add("gzip")
+    return accepted
@@ -0,0 +1,241 @@
+import json
+import time
+import logging
+import sqlite3
+import threading
+from collections import OrderedDict
+
+logger = logging.getLogger(__name__)
+
+
+class CacheStore:
+    """
+    Persistence backend for the answer cache.
+
+    Records are keyed by normalised question and hold the original question,
+    the answer dict, the question embedding (float32 array or None) and the
+    creation time.
+    """
+
+    def get(self, key: str):
+        """Return {"question", "answer", "vector", "created"} for key, or None."""
+        raise NotImplementedError
+
+    def put(self, key: str, question: str, answer: dict, vector=None, created: float = None) -> None:
+        raise NotImplementedError
+
+    def delete(self, key: str) -> None:
+        raise NotImplementedError
+
+    def vectors(self, since: int = 0):
+        """
+        Return (cursor, [(key, vector, created), ...]) for records added after
+        `since`, without loading answers. Pass the returned cursor back in to
+        pick up only newer records.
+        """
+        raise NotImplementedError
+
+    def __len__(self) -> int:
+        raise NotImplementedError
+
+    def flush(self) -> None:
+        pass
+
+    def close(self) -> None:
+        self.flush()
+
+
+class MemoryCacheStore(CacheStore):
+    """Process-local store; nothing survives a restart."""
+
+    def __init__(self) -> None:
+        self._lock = threading.Lock()
+        self._records: OrderedDict = OrderedDict()  # key -> (seq, record)
+        self._seq = 0
+
+    def get(self, key):
+        with self._lock:
+            item = self._records.get(key)
+            return dict(item[1]) if item else None
+
+    def put(self, key, question, answer, vector=None, created=None):
+        with self._lock:
+            self._seq += 1
+            self._records.pop(key, None)
+            self._records[key] = (self._seq, {
+                "question": question,
+                "answer": answer,
+                "vector": vector,
+                "created": created or time.time(),
+            })
+
+    def delete(self, key):
+        with self._lock:
+            self._records.pop(key, None)
+
+    def vectors(self, since=0):
+        with self._lock:
+            rows = [(key, r["vector"], r["created"]) for key, (seq, r) in self._records.items() if seq > since]
+            return self._seq, rows
+
+    def __len__(self):
+        return len(self._records)
+
+
+class SQLiteCacheStore(CacheStore):
+    """
+    SQLite (WAL mode) store shared by every uvicorn worker on the host.
+
+    Writes are write-behind: put/delete land in an in-memory pending map that
+    reads consult first, and a background thread commits them in batches —
+    every `flush_interval` seconds or once `batch_size` writes are pending —
+    each batch in a single transaction. A batch being committed stays visible
+    to reads until the commit returns.
+    """
+
+    def __init__(self, path: str, flush_interval: float = 1.0, batch_size: int = 64) -> None:
+        self.path = path
+        self.flush_interval = flush_interval
+        self.batch_size = batch_size
+
+        self._local = threading.local()
+        self._lock = threading.Lock()
+        self._pending: OrderedDict = OrderedDict()  # key -> record, or None for a delete
+        self._flushing: dict = {}  # the batch being committed, same layout
+        self._flush_lock = threading.Lock()
+        self._wake = threading.Event()
+        self._stopped = threading.Event()
+
+        with self._connect() as conn:
+            conn.execute(
+                """CREATE TABLE IF NOT EXISTS answers (
+                    seq INTEGER PRIMARY KEY AUTOINCREMENT,
+                    key TEXT UNIQUE NOT NULL,
+                    question TEXT NOT NULL,
+                    answer TEXT NOT NULL,
+                    vector BLOB,
+                    created REAL NOT NULL
+                )"""
+            )
+
+        self._flusher = threading.Thread(target=self._run_flusher, name="cache-store-flusher", daemon=True)
+        self._flusher.start()
+
+    def _connect(self) -> sqlite3.Connection:
+        conn = getattr(self._local, "conn", None)
+        if conn is None:
+            conn = sqlite3.connect(self.path, timeout=10)
+            conn.execute("PRAGMA journal_mode=WAL")
+            conn.execute("PRAGMA synchronous=NORMAL")
+            self._local.conn = conn
+        return conn
+
+    # ── Reads ─────────────────────────────────────────────────────────────────
+
+    def get(self, key):
+        with self._lock:
+            for writes in (self._pending, self._flushing):
+                if key in writes:
+                    record = writes[key]
+                    return dict(record) if record else None
+        row = self._connect().execute(
+            "SELECT question, answer, vector, created FROM answers WHERE key = ?", (key,)
+        ).fetchone()
+        if row is None:
+            return None
+        return {
+            "question": row[0],
+            "answer": json.loads(row[1]),
+            "vector": self._decode_vector(row[2]),
+            "created": row[3],
+        }
+
+    def vectors(self, since=0):
+        rows = self._connect().execute(
+            "SELECT seq, key, vector, created FROM answers WHERE seq > ? ORDER BY seq", (since,)
+        ).fetchall()
+        cursor = rows[-1][0] if rows else since
+        with self._lock:
+            pending = {**self._flushing, **self._pending}
+        result = [(key, self._decode_vector(vector), created) for _, key, vector, created in rows if key not in pending]
+        # Unflushed writes from this process are visible immediately
+        result.extend((key, r["vector"], r["created"]) for key, r in pending.items() if r is not None)
+        return cursor, result
+
+    def __len__(self):
+        return self._connect().execute("SELECT COUNT(*) FROM answers").fetchone()[0]
+
+    # ── Writes ────────────────────────────────────────────────────────────────
+
+    def put(self, key, question, answer, vector=None, created=None):
+        record = {"question": question, "answer": answer, "vector": vector, "created": created or time.time()}
+        self._enqueue(key, record)
+
+    def delete(self, key):
+        self._enqueue(key, None)
+
+    def _enqueue(self, key, record):
+        with self._lock:
+            self._pending.pop(key, None)
+            self._pending[key] = record
+            if len(self._pending) >= self.batch_size:
+                self._wake.set()
+
+    def flush(self) -> None:
+        with self._flush_lock:
+            with self._lock:
+                batch, self._pending = self._pending, OrderedDict()
+                self._flushing = batch
+            try:
+                if batch:
+                    self._commit(batch)
+            finally:
+                with self._lock:
+                    self._flushing = {}
+
+    def _commit(self, batch: OrderedDict) -> None:
+        upserts = [
+            (key, r["question"], json.dumps(r["answer"]), self._encode_vector(r["vector"]), r["created"])
+            for key, r in batch.items()
+            if r is not None
+        ]
+        deletes = [(key,) for key, r in batch.items() if r is None]
+        conn = self._connect()
+        try:
+            with conn:
+                # Delete first so a rewritten key gets a fresh seq and other workers pick it up
+                conn.executemany("DELETE FROM answers WHERE key = ?", [(u[0],) for u in upserts] + deletes)
+                conn.executemany(
+                    "INSERT INTO answers (key, question, answer, vector, created) VALUES (?, ?, ?, ?, ?)",
+                    upserts,
+                )
+        except sqlite3.Error as e:
+            logger.warning(f"Cache flush failed, will retry: {e}")
+            with self._lock:
+                # Newer writes for the same key win over the failed batch
+                for key, record in batch.items():
+                    self._pending.setdefault(key, record)
+
+    def _run_flusher(self) -> None:
+        while not self._stopped.is_set():
+            self._wake.wait(self.flush_interval)
+            self._wake.clear()
+            self.flush()
+
+    def close(self) -> None:
+        self._stopped.set()
+        self._wake.set()
+        self._flusher.join(timeout=5)
+        self.flush()
+
+    @staticmethod
+    def _encode_vector(vector):
+        import numpy as np
+
+        return None if vector is None else np.asarray(vector, dtype=np.float32).tobytes()
+
+    @staticmethod
+    def _decode_vector(blob):
+        import numpy as np
+
+        return None if blob is None else np.frombuffer(blob, dtype=np.float32).copy()
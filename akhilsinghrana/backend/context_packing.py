@@ -0,0 +1,127 @@
+"""
+Packing retrieved and web documents into the generate prompt.
+
+pack_context() turns the documents of a graph state into compact prompt text:
+near-identical chunks (the same passage retrieved twice, a blog chunk echoed
+by a web result, overlapping splits) are kept once, the rest are ordered by
+relevance score (unscored ones, e.g. web results, last in their original
+order), each is rendered as one line tagged with its source, and the text is
+cut to a token budget. Token counts are estimates from a local regex
+tokenizer, close enough to Llama's BPE for budgeting without a tokenizer
+dependency or a network call.
+"""
+import re
+import logging
+
+from akhilsinghrana.backend import metrics
+
+logger = logging.getLogger(__name__)
+
+TOKEN_PATTERN = re.compile(r"\w+|[^\w\s]")
+SHINGLE_SIZE = 3
+# Chunks whose word 3-gram sets overlap at least this much (Jaccard) count as duplicates
+DUPLICATE_SIMILARITY = 0.8
+# A last chunk is only cut to fit if at least this many tokens of it would remain
+MIN_PARTIAL_TOKENS = 32
+SOURCE_KEYS = ("source", "url")
+HEADER_KEYS = ("Header 1", "Header 2", "Header 3")
+
+
+def estimate_tokens(text: str) -> int:
+    """Approximate BPE token count: one per punctuation mark, one per ~6 characters of each word."""
+    return sum(1 + (len(piece) - 1) // 6 for piece in TOKEN_PATTERN.findall(text))
+
+
+def _shingles(text: str) -> set:
+    words = re.findall(r"\w+", text.lower())
+    if len(words) <= SHINGLE_SIZE:
+        return {tuple(words)}
+    return {tuple(words[i : i + SHINGLE_SIZE]) for i in range(len(words) - SHINGLE_SIZE + 1)}
+
+
+def _is_duplicate(shingles: set, kept: list) -> bool:
+    for other in kept:
+        overlap = len(shingles & other)
+        if not overlap:
+            continue
+        # Near-identical, or wholly contained in the other chunk
+        if overlap / len(shingles | other) >= DUPLICATE_SIMILARITY or overlap == min(len(shingles), len(other)):
+            return True
+    return False
+
+
+def source_tag(metadata: dict) -> str:
+    """Source file or URL and enclosing headers, e.g. "post.html › Section › Subsection"; may be empty."""
+    source = next((metadata[key] for key in SOURCE_KEYS if metadata.get(key)), "")
+    headers = [metadata[key] for key in HEADER_KEYS if metadata.get(key)]
+    return " › ".join([str(source), *headers] if source else headers)
+
+
+def render(index: int, document) -> str:
+    text = " ".join(document.page_content.split())
+    tag = source_tag(document.metadata or {})
+    return f"[{index}] ({tag}) {text}" if tag else f"[{index}] {text}"
+
+
+def _truncate(line: str, tokens: int) -> str:
+    """The longest prefix of `line` ending on a word boundary that fits in `tokens`, with an ellipsis."""
+    cut, used = 0, 0
+    for match in TOKEN_PATTERN.finditer(line):
+        used += 1 + (len(match.group()) - 1) // 6
+        if used > tokens - 1:  # one token for the ellipsis
+            break
+        cut = match.end()
+    return line[:cut].rstrip() + " …"
+
+
+def pack_context(documents: list, scores: list = None, budget: int = 1500) -> tuple:
+    """
+    Return (prompt text, stats) for `documents` with optional per-document
+    `scores`. stats: chunks, duplicates, dropped (over budget), truncated (0/1),
+    tokens (of the text), raw_tokens (of the documents' repr, which is what the
+    prompt used to receive) and saved. budget <= 0 means no limit.
+    """
+    scores = list(scores or [])
+    scores += [None] * (len(documents) - len(scores))
+    order = sorted(range(len(documents)), key=lambda i: (scores[i] is None, -(scores[i] or 0.0), i))
+
+    unique, seen, duplicates = [], [], 0
+    for i in order:
+        if not documents[i].page_content.strip():
+            continue
+        shingles = _shingles(documents[i].page_content)
+        if _is_duplicate(shingles, seen):
+            duplicates += 1
+            continue
+        seen.append(shingles)
+        unique.append(documents[i])
+
+    lines, used, truncated = [], 0, 0
+    for document in unique:
+        line = render(len(lines) + 1, document)
+        tokens = estimate_tokens(line) + 1  # the newline between chunks
+        if budget > 0 and used + tokens > budget:
+            if budget - used >= MIN_PARTIAL_TOKENS:
+                lines.append(_truncate(line, budget - used - 1))
+                truncated = 1
+            break
+        lines.append(line)
+        used += tokens
+
+    text = "\n".join(lines)
+    stats = {
+        "chunks": len(lines),
+        "duplicates": duplicates,
+        "dropped": len(unique) - len(lines),
+        "truncated": truncated,
+        "tokens": estimate_tokens(text),
+        "raw_tokens": estimate_tokens(repr(documents)),
+    }
+    stats["saved"] = max(0, stats["raw_tokens"] - stats["tokens"])
+    metrics.CONTEXT_TOKENS.labels(kind="packed").inc(stats["tokens"])
+    metrics.CONTEXT_TOKENS.labels(kind="saved").inc(stats["saved"])
+    logger.info(
+        f"Packed {stats['chunks']}/{len(documents)} chunks into ~{stats['tokens']} tokens, "
+        f"saving ~{stats['saved']} ({duplicates} duplicate, {stats['dropped']} over budget)"
+    )
+    return text, stats
@@ -0,0 +1,241 @@
+import asyncio
+import hashlib
+import logging
+import sqlite3
+import threading
+import unicodedata
+from collections import OrderedDict
+
+import numpy as np
+from langchain_core.embeddings import Embeddings
+
+from akhilsinghrana.backend import metrics
+
+logger = logging.getLogger(__name__)
+
+
+def normalize_text(text: str) -> str:
+    """Unicode-normalise and collapse whitespace; case and punctuation are kept."""
+    return " ".join(unicodedata.normalize("NFC", text).split())
+
+
+class CachedEmbeddings(Embeddings):
+    """
+    Embeddings wrapper that remembers vectors it has already computed.
+
+    Lookups go to an in-memory LRU of `max_size` vectors, then to an optional
+    SQLite file of float32 vectors at `disk_path`, and only then to the wrapped
+    model. Query and document vectors are cached separately, texts repeated
+    within one embed_documents or embed_queries batch are embedded once, and
+    stats() reports the hit rate. The async methods read and write the SQLite
+    file in a worker thread, so a disk lookup never blocks the event loop.
+    """
+
+    def __init__(self, inner: Embeddings, max_size: int = 2048, disk_path: str = None) -> None:
+        self.inner = inner
+        self.max_size = max_size
+        self.disk_path = disk_path
+        self.hits = 0
+        self.disk_hits = 0
+        self.misses = 0
+
+        self._lock = threading.Lock()
+        self._memory: OrderedDict = OrderedDict()  # key -> list[float]
+        self._local = threading.local()
+        # Vectors from different models must never be mixed up in a shared disk store
+        self._namespace = str(getattr(inner, "model", None) or type(inner).__name__)
+        if disk_path:
+            with self._connect() as conn:
+                conn.execute("CREATE TABLE IF NOT EXISTS vectors (key TEXT PRIMARY KEY, vector BLOB NOT NULL)")
+
+    # ── Embeddings interface ──────────────────────────────────────────────────
+
+    def embed_query(self, text: str) -> list:
+        text = normalize_text(text)
+        key = self._key("query", text)
+        vector = self._lookup([key])[0]
+        if vector is None:
+            with metrics.EMBEDDING_SECONDS.labels(kind="query").time():
+                vector = self.inner.embed_query(text)
+            self._store({key: vector})
+        return vector
+
+    async def aembed_query(self, text: str) -> list:
+        text = normalize_text(text)
+        key = self._key("query", text)
+        vector = (await self._alookup([key]))[0]
+        if vector is None:
+            with metrics.EMBEDDING_SECONDS.labels(kind="query").time():
+                vector = await self.inner.aembed_query(text)
+            await self._astore({key: vector})
+        return vector
+
+    def embed_documents(self, texts: list) -> list:
+        keys, known, missing = self._plan(texts)
+        if missing:
+            with metrics.EMBEDDING_SECONDS.labels(kind="documents").time():
+                vectors = self.inner.embed_documents(list(missing))
+            known.update(self._store(dict(zip(missing.values(), vectors))))
+        return [known[key] for key in keys]
+
+    async def aembed_documents(self, texts: list) -> list:
+        keys, known, missing = await self._aplan(texts)
+        if missing:
+            with metrics.EMBEDDING_SECONDS.labels(kind="documents").time():
+                vectors = await self.inner.aembed_documents(list(missing))
+            known.update(await self._astore(dict(zip(missing.values(), vectors))))
+        return [known[key] for key in keys]
+
+    def embed_queries(self, texts: list) -> list:
+        """
+        embed_query for many texts: cached query vectors are reused and the
+        misses are embedded in one embed_documents call of the wrapped model.
+        """
+        keys, known, missing = self._plan(texts, kind="query")
+        if missing:
+            with metrics.EMBEDDING_SECONDS.labels(kind="query").time():
+                vectors = self.inner.embed_documents(list(missing))
+            known.update(self._store(dict(zip(missing.values(), vectors))))
+        return [known[key] for key in keys]
+
+    async def aembed_queries(self, texts: list) -> list:
+        keys, known, missing = await self._aplan(texts, kind="query")
+        if missing:
+            with metrics.EMBEDDING_SECONDS.labels(kind="query").time():
+                vectors = await self.inner.aembed_documents(list(missing))
+            known.update(await self._astore(dict(zip(missing.values(), vectors))))
+        return [known[key] for key in keys]
+
+    # ── Introspection ─────────────────────────────────────────────────────────
+
+    def stats(self) -> dict:
+        with self._lock:
+            lookups = self.hits + self.disk_hits + self.misses
+            return {
+                "size": len(self._memory),
+                "hits": self.hits,
+                "disk_hits": self.disk_hits,
+                "misses": self.misses,
+                "hit_rate": (self.hits + self.disk_hits) / lookups if lookups else 0.0,
+            }
+
+    # ── Internals ─────────────────────────────────────────────────────────────
+
+    def _key(self, kind: str, text: str) -> str:
+        return hashlib.sha1(f"{self._namespace}\0{kind}\0{text}".encode("utf-8")).hexdigest()
+
+    def _plan(self, texts, kind: str = "document"):
+        """Return (key per text, {key: cached vector}, {unique uncached text: key})."""
+        keys, unique = self._unique(texts, kind)
+        return (keys, *self._partition(unique, self._lookup(list(unique))))
+
+    async def _aplan(self, texts, kind: str = "document"):
+        keys, unique = self._unique(texts, kind)
+        return (keys, *self._partition(unique, await self._alookup(list(unique))))
+
+    def _unique(self, texts, kind: str):
+        texts = [normalize_text(t) for t in texts]
+        keys = [self._key(kind, t) for t in texts]
+        return keys, dict(zip(keys, texts))
+
+    @staticmethod
+    def _partition(unique: dict, vectors: list):
+        cached = dict(zip(unique, vectors))
+        missing = {unique[key]: key for key, vector in cached.items() if vector is None}
+        known = {key: vector for key, vector in cached.items() if vector is not None}
+        return known, missing
+
+    def _lookup(self, keys):
+        vectors, hits = self._memory_get(keys)
+        if self.disk_path and hits < len(keys):
+            vectors = self._disk_fill(keys, vectors)
+        return self._counted(vectors, hits)
+
+    async def _alookup(self, keys):
+        """_lookup with the disk read, if memory misses, in a worker thread."""
+        vectors, hits = self._memory_get(keys)
+        if self.disk_path and hits < len(keys):
+            vectors = await asyncio.to_thread(self._disk_fill, keys, vectors)
+        return self._counted(vectors, hits)
+
+    def _memory_get(self, keys):
+        """(vector or None per key, number found) from the in-memory LRU."""
+        vectors, hits = [], 0
+        with self._lock:
+            for key in keys:
+                vector = self._memory.get(key)
+                if vector is not None:
+                    self._memory.move_to_end(key)
+                    hits += 1
+                vectors.append(vector)
+        return vectors, hits
+
+    def _disk_fill(self, keys, vectors) -> list:
+        """`vectors` with its gaps filled from the disk store, where it has them."""
+        found = self._disk_get([key for key, vector in zip(keys, vectors) if vector is None])
+        self._remember(found)
+        with self._lock:
+            self.disk_hits += len(found)
+        metrics.EMBEDDING_CACHE.labels(result="disk_hit").inc(len(found))
+        return [found.get(key) if vector is None else vector for key, vector in zip(keys, vectors)]
+
+    def _counted(self, vectors, hits: int) -> list:
+        misses = sum(vector is None for vector in vectors)
+        with self._lock:
+            self.hits += hits
+            self.misses += misses
+        metrics.EMBEDDING_CACHE.labels(result="hit").inc(hits)
+        metrics.EMBEDDING_CACHE.labels(result="miss").inc(misses)
+        return vectors
+
+    def _store(self, vectors: dict) -> dict:
+        vectors = {key: list(map(float, vector)) for key, vector in vectors.items()}
+        self._remember(vectors)
+        if self.disk_path:
+            self._disk_put(vectors)
+        return vectors
+
+    async def _astore(self, vectors: dict) -> dict:
+        """_store with the disk write, if any, in a worker thread."""
+        if self.disk_path:
+            return await asyncio.to_thread(self._store, vectors)
+        return self._store(vectors)
+
+    def _remember(self, vectors: dict) -> None:
+        with self._lock:
+            for key, vector in vectors.items():
+                self._memory[key] = vector
+                self._memory.move_to_end(key)
+            while len(self._memory) > self.max_size:
+                self._memory.popitem(last=False)
+
+    def _connect(self) -> sqlite3.Connection:
+        conn = getattr(self._local, "conn", None)
+        if conn is None:
+            conn = sqlite3.connect(self.disk_path, timeout=10)
+            conn.execute("PRAGMA journal_mode=WAL")
+            self._local.conn = conn
+        return conn
+
+    def _disk_get(self, keys) -> dict:
+        found = {}
+        try:
+            for i in range(0, len(keys), 500):  # stay under SQLite's bound-parameter limit
+                chunk = keys[i : i + 500]
+                rows = self._connect().execute(
+                    f"SELECT key, vector FROM vectors WHERE key IN ({','.join('?' * len(chunk))})", chunk
+                ).fetchall()
+                found.update((key, np.frombuffer(blob, dtype=np.float32).tolist()) for key, blob in rows)
+        except sqlite3.Error as e:
+            logger.warning(f"Embedding cache read failed: {e}")
+        return found
+
+    def _disk_put(self, vectors: dict) -> None:
+        try:
+            with self._connect() as conn:
+                conn.executemany(
+                    "INSERT OR REPLACE INTO vectors (key, vector) VALUES (?, ?)",
+                    [(key, np.asarray(vector, dtype=np.float32).tobytes()) for key, vector in vectors.items()],
+                )
+        except sqlite3.Error as e:
+            logger.warning(f"Embedding cache write failed: {e}")
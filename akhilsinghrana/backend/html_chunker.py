@@ -0,0 +1,134 @@
+"""
+Header-aware chunking of the blog HTML files.
+
+Each file is parsed once and walked in document order: every h1/h2/h3 opens a
+new section, and the text under it becomes one chunk whose metadata carries
+the file (source, slug) and the enclosing headers ("Header 1".."Header 3",
+the keys HTMLHeaderTextSplitter used). Sections longer than `max_chars` are
+split on line boundaries.
+
+iter_html_chunks() fans files out over a process pool with a bounded number
+of files in flight and yields chunks as a generator, so it can feed
+EmbeddingPipeline.run directly without holding the corpus in memory.
+"""
+import os
+import logging
+from collections import deque
+from concurrent.futures import ProcessPoolExecutor
+
+from bs4 import BeautifulSoup
+from bs4.element import PreformattedString
+from langchain_core.documents import Document
+
+logger = logging.getLogger(__name__)
+
+HEADERS = {"h1": "Header 1", "h2": "Header 2", "h3": "Header 3"}
+BLOCK_TAGS = ["p", "li", "pre", "blockquote", "td", "th", "dt", "dd", "figcaption", "h4", "h5", "h6", "div"]
+SKIPPED_TAGS = {"script", "style", "noscript", "head", "title", "template"}
+MAX_CHARS = 2000
+
+
+def html_files(folder: str) -> list:
+    return sorted(os.path.join(folder, f) for f in os.listdir(folder) if f.endswith(".html"))
+
+
+def chunk_html(html: str, source: str, max_chars: int = MAX_CHARS) -> list:
+    """Split one HTML document into header-scoped Documents."""
+    soup = BeautifulSoup(html, "lxml")
+    base_metadata = {"source": source, "slug": os.path.splitext(os.path.basename(source))[0]}
+    chunks, lines, headers = [], [], {}
+    current_header = current_block = None
+
+    def flush():
+        # A header directly followed by a subheader has no text of its own
+        has_body = len(lines) > (1 if headers else 0)
+        text = "\n".join(lines).strip()
+        lines.clear()
+        if not has_body or not text:
+            return
+        metadata = {**base_metadata, **headers}
+        for part in _split(text, max_chars):
+            chunks.append(Document(page_content=part, metadata=dict(metadata)))
+
+    for string in soup.find_all(string=True):
+        # Comments, doctypes and CDATA are PreformattedStrings
+        if isinstance(string, PreformattedString) or any(p.name in SKIPPED_TAGS for p in string.parents):
+            continue
+        header = string.find_parent(list(HEADERS))
+        if header is not None:
+            if header is current_header:
+                continue  # rest of a header already taken whole via get_text
+            current_header = header
+            flush()
+            # A new h2 closes the previous h2 and any h3 beneath it
+            for name, key in HEADERS.items():
+                if name >= header.name:
+                    headers.pop(key, None)
+            title = header.get_text(" ", strip=True)
+            headers[HEADERS[header.name]] = title
+            lines.append(title)
+            continue
+        text = " ".join(string.split())
+        if not text:
+            continue
+        # Inline runs (links, emphasis) stay on their block's line
+        block = string.find_parent(BLOCK_TAGS)
+        if block is current_block and lines:
+            lines[-1] = f"{lines[-1]} {text}"
+        else:
+            lines.append(text)
+            current_block = block
+    flush()
+    return chunks
+
+
+def chunk_html_file(path: str, max_chars: int = MAX_CHARS) -> list:
+    with open(path, "r", encoding="utf-8") as f:
+        return chunk_html(f.read(), os.path.basename(path), max_chars)
+
+
+def iter_html_chunks(paths, workers: int = None, max_chars: int = MAX_CHARS):
+    """
+    Yield the chunks of every file in `paths`, in file order.
+
+    With more than one worker, files are chunked on a process pool with at
+    most 2x workers files in flight; workers=None uses the CPU count.
+    """
+    paths = list(paths)
+    workers = min(workers or os.cpu_count() or 1, len(paths))
+    if workers <= 1:
+        for path in paths:
+            yield from chunk_html_file(path, max_chars)
+        return
+
+    with ProcessPoolExecutor(max_workers=workers) as pool:
+        pending = deque()
+        for path in paths:
+            pending.append(pool.submit(chunk_html_file, path, max_chars))
+            if len(pending) >= workers * 2:
+                yield from pending.popleft().result()
+        while pending:
+            yield from pending.popleft().result()
+
+
+def _split(text: str, max_chars: int):
+    if len(text) <= max_chars:
+        return [text]
+    parts, current = [], ""
+    for line in text.split("\n"):
+        while len(line) > max_chars:  # a single paragraph longer than the limit
+            cut = line.rfind(" ", 0, max_chars)
+            cut = cut if cut > 0 else max_chars
+            if current:
+                parts.append(current)
+                current = ""
+            parts.append(line[:cut])
+            line = line[cut:].lstrip()
+        if current and len(current) + 1 + len(line) > max_chars:
+            parts.append(current)
+            current = line
+        else:
+            current = f"{current}\n{line}" if current else line
+    if current:
+        parts.append(current)
+    return parts
@@ -0,0 +1,279 @@
+"""
+Building and incremental maintenance of the FAISS index in db/faiss_db.
+
+A manifest (manifest.json, next to index.faiss and index.pkl) maps the
+content hash of every indexed chunk to its docstore id. An update re-chunks
+the sources, embeds only chunks whose hash is not in the manifest and
+deletes vectors whose hash no longer appears.
+
+Sources are chunked by html_chunker and streamed through the hashing and
+embedding steps, so only chunk hashes are held for the whole corpus.
+Embedding goes through EmbeddingPipeline: fixed-size batches on a thread
+pool, retried with exponential backoff and checkpointed to disk so an
+interrupted build picks up where it stopped.
+
+    python -m akhilsinghrana.backend.indexing --folder ./akhilsinghrana/frontend/public/blogs
+"""
+import os
+import json
+import time
+import uuid
+import random
+import hashlib
+import logging
+import argparse
+from concurrent.futures import ThreadPoolExecutor, FIRST_COMPLETED, wait
+from itertools import islice
+
+import numpy as np
+
+logger = logging.getLogger(__name__)
+
+MANIFEST_FILE = "manifest.json"
+
+
+def chunk_hash(document) -> str:
+    payload = json.dumps({"text": document.page_content, "metadata": document.metadata}, sort_keys=True)
+    return hashlib.sha256(payload.encode("utf-8")).hexdigest()
+
+
+def load_manifest(directory: str):
+    """Return {chunk hash: docstore id}, or None if the index has no manifest yet."""
+    try:
+        with open(os.path.join(directory, MANIFEST_FILE), "r", encoding="utf-8") as f:
+            return json.load(f)["chunks"]
+    except FileNotFoundError:
+        return None
+
+
+def save_manifest(directory: str, manifest: dict) -> None:
+    # Write-then-rename so a crash never leaves a truncated manifest behind
+    path = os.path.join(directory, MANIFEST_FILE)
+    tmp_path = f"{path}.tmp"
+    with open(tmp_path, "w", encoding="utf-8") as f:
+        json.dump({"version": 1, "chunks": manifest}, f, indent=1, sort_keys=True)
+    os.replace(tmp_path, path)
+
+
+def manifest_from_vectorstore(vectorstore):
+    """
+    Rebuild a manifest from an index saved before manifests existed.
+    Returns (manifest, duplicate_ids): ids of repeated chunks are not kept.
+    """
+    manifest, duplicate_ids = {}, []
+    for doc_id in vectorstore.index_to_docstore_id.values():
+        digest = chunk_hash(vectorstore.docstore.search(doc_id))
+        if digest in manifest:
+            duplicate_ids.append(doc_id)
+        else:
+            manifest[digest] = doc_id
+    return manifest, duplicate_ids
+
+
+def iter_new_chunks(documents, manifest: dict):
+    """
+    Yield (id, document) for each chunk whose hash is not in `manifest` yet,
+    recording it there under a fresh id. Lazy, so a chunk stream can be
+    deduplicated on its way into EmbeddingPipeline.run_items.
+    """
+    for doc in documents:
+        digest = chunk_hash(doc)
+        if digest not in manifest:
+            manifest[digest] = str(uuid.uuid4())
+            yield manifest[digest], doc
+
+
+def build_manifest(documents):
+    """Assign a fresh id to every unique chunk: returns (manifest, unique documents, their ids)."""
+    manifest = {}
+    items = list(iter_new_chunks(documents, manifest))
+    return manifest, [doc for _, doc in items], [doc_id for doc_id, _ in items]
+
+
+class EmbeddingPipeline:
+    """
+    Embed documents in batches of `batch_size` on `workers` threads and add
+    each batch to a FAISS index as soon as it completes.
+
+    A failing batch is retried up to `max_retries` times with exponential
+    backoff (`backoff` * 2^attempt seconds, plus jitter). With a
+    `checkpoint_dir`, every embedded batch is saved there under a hash of its
+    texts, so re-running after a crash only embeds the batches that never
+    finished. Call clear_checkpoint() once the index has been saved.
+    """
+
+    def __init__(
+        self,
+        embeddings,
+        batch_size: int = 32,
+        workers: int = 4,
+        max_retries: int = 5,
+        backoff: float = 1.0,
+        checkpoint_dir: str = None,
+    ) -> None:
+        self.embeddings = embeddings
+        self.batch_size = batch_size
+        self.workers = workers
+        self.max_retries = max_retries
+        self.backoff = backoff
+        self.checkpoint_dir = checkpoint_dir
+
+    def run(self, documents, ids=None, vectorstore=None):
+        """
+        Embed `documents` (any iterable — consumed lazily) and add them to
+        `vectorstore`, creating a FAISS index if it is None.
+
+        Returns (vectorstore, stats) with chunk/batch counts, retries, batches
+        resumed from the checkpoint and chunks_per_second.
+        """
+        items = zip(ids, documents) if ids is not None else ((str(uuid.uuid4()), d) for d in documents)
+        return self.run_items(items, vectorstore)
+
+    def run_items(self, items, vectorstore=None):
+        """Like run, but takes an iterable of (id, document) pairs."""
+        from langchain_community.vectorstores import FAISS
+
+        if self.checkpoint_dir:
+            os.makedirs(self.checkpoint_dir, exist_ok=True)
+        items = iter(items)
+        batches = iter(lambda: list(islice(items, self.batch_size)), [])
+        stats = {"chunks": 0, "batches": 0, "retries": 0, "resumed_batches": 0}
+        start = time.perf_counter()
+
+        def add(batch, vectors):
+            nonlocal vectorstore
+            texts = [doc.page_content for _, doc in batch]
+            text_embeddings = list(zip(texts, vectors))
+            metadatas = [doc.metadata for _, doc in batch]
+            batch_ids = [doc_id for doc_id, _ in batch]
+            if vectorstore is None:
+                vectorstore = FAISS.from_embeddings(text_embeddings, self.embeddings, metadatas=metadatas, ids=batch_ids)
+            else:
+                vectorstore.add_embeddings(text_embeddings, metadatas=metadatas, ids=batch_ids)
+            stats["chunks"] += len(batch)
+            stats["batches"] += 1
+            elapsed = time.perf_counter() - start
+            logger.info(f"Embedded {stats['chunks']} chunks ({stats['chunks'] / elapsed:.1f} chunks/s)")
+
+        # Keep at most 2x workers batches in flight so memory stays flat on large corpora
+        with ThreadPoolExecutor(max_workers=self.workers) as pool:
+            pending = {}
+            for batch in batches:
+                pending[pool.submit(self._embed_batch, batch, stats)] = batch
+                if len(pending) >= self.workers * 2:
+                    done, _ = wait(pending, return_when=FIRST_COMPLETED)
+                    for future in done:
+                        add(pending.pop(future), future.result())
+            for future in list(pending):
+                add(pending.pop(future), future.result())
+
+        elapsed = time.perf_counter() - start
+        stats["seconds"] = round(elapsed, 3)
+        stats["chunks_per_second"] = round(stats["chunks"] / elapsed, 1) if elapsed else 0.0
+        if vectorstore is None:
+            raise ValueError("No documents to index")
+        return vectorstore, stats
+
+    def _embed_batch(self, batch, stats):
+        texts = [doc.page_content for _, doc in batch]
+        checkpoint = self._checkpoint_path(texts)
+        if checkpoint and os.path.exists(checkpoint):
+            stats["resumed_batches"] += 1
+            return np.load(checkpoint).tolist()
+
+        for attempt in range(self.max_retries + 1):
+            try:
+                vectors = self.embeddings.embed_documents(texts)
+                break
+            except Exception as e:
+                if attempt == self.max_retries:
+                    raise
+                stats["retries"] += 1
+                delay = self.backoff * 2**attempt * (1 + random.random() / 2)
+                logger.warning(f"Embedding batch failed ({e}), retrying in {delay:.1f}s")
+                time.sleep(delay)
+
+        if checkpoint:
+            tmp_path = f"{checkpoint}.tmp.npy"
+            np.save(tmp_path, np.asarray(vectors, dtype=np.float32))
+            os.replace(tmp_path, checkpoint)
+        return vectors
+
+    def _checkpoint_path(self, texts):
+        if not self.checkpoint_dir:
+            return None
+        digest = hashlib.sha256("\0".join(texts).encode("utf-8")).hexdigest()
+        return os.path.join(self.checkpoint_dir, f"{digest}.npy")
+
+    def clear_checkpoint(self) -> None:
+        if not self.checkpoint_dir or not os.path.isdir(self.checkpoint_dir):
+            return
+        for name in os.listdir(self.checkpoint_dir):
+            if name.endswith(".npy"):
+                os.remove(os.path.join(self.checkpoint_dir, name))
+        os.rmdir(self.checkpoint_dir)
+
+
+def update_index(vectorstore, documents, manifest: dict = None, pipeline: EmbeddingPipeline = None):
+    """
+    Bring `vectorstore` in line with `documents`, embedding only new chunks.
+
+    Returns (manifest, stats) where stats counts added, removed and unchanged chunks.
+    """
+    duplicate_ids = []
+    if manifest is None:
+        manifest, duplicate_ids = manifest_from_vectorstore(vectorstore)
+
+    # Only hashes are kept for the whole corpus; new chunks stream straight into the pipeline
+    seen, added = set(), {}
+
+    def new_chunks():
+        for doc in documents:
+            digest = chunk_hash(doc)
+            if digest in seen:
+                continue
+            seen.add(digest)
+            if digest not in manifest:
+                added[digest] = str(uuid.uuid4())
+                yield added[digest], doc
+
+    pipeline = pipeline or EmbeddingPipeline(vectorstore.embedding_function)
+    pipeline.run_items(new_chunks(), vectorstore=vectorstore)
+
+    removed_ids = [doc_id for digest, doc_id in manifest.items() if digest not in seen] + duplicate_ids
+    if removed_ids:
+        vectorstore.delete(removed_ids)
+    new_manifest = {digest: doc_id for digest, doc_id in manifest.items() if digest in seen}
+    new_manifest.update(added)
+
+    stats = {
+        "added": len(added),
+        "removed": len(removed_ids),
+        "unchanged": len(seen) - len(added),
+    }
+    return new_manifest, stats
+
+
+def main(argv=None) -> None:
+    parser = argparse.ArgumentParser(description="Update the FAISS index, embedding only new or changed chunks.")
+    parser.add_argument("--folder", required=True, help="Directory of blog HTML files to index")
+    parser.add_argument("--batch-size", type=int, default=32, help="Chunks per embedding request")
+    parser.add_argument("--workers", type=int, default=4, help="Concurrent embedding requests")
+    parser.add_argument("--ingest-workers", type=int, default=None, help="Processes chunking HTML (default: CPU count)")
+    args = parser.parse_args(argv)
+
+    logging.basicConfig(level=logging.INFO)
+    from akhilsinghrana.backend.RAG_Chat import RAGChat
+
+    options = {
+        "folder": args.folder,
+        "batch_size": args.batch_size,
+        "workers": args.workers,
+        "ingest_workers": args.ingest_workers,
+    }
+    stats = RAGChat(**options).update_vector_store(**options)
+    print(f"added={stats['added']} removed={stats['removed']} unchanged={stats['unchanged']}")
+
+
+if __name__ == "__main__":
+    main()
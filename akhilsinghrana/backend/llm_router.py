@@ -0,0 +1,333 @@
+"""
+Failover between chat pipelines compiled for different LLM providers.
+
+LLMRouter holds one precompiled runnable (the RAG graph) per provider, in
+order of preference, and sends each run to the first provider whose circuit
+breaker lets it through. A failure or timeout fails the run over to the next
+provider, so switching costs no rebuild and nothing shared is mutated. After
+`failure_threshold` consecutive failures a breaker opens and its provider is
+skipped; once `reset_timeout` has passed a single probe run is let through
+(half-open) and its outcome closes or re-opens the breaker, so traffic goes
+back to the preferred provider as soon as it recovers. A provider that is
+rarely needed can be given as a LazyRunnable, built on its first run.
+
+With `hedge_percentile` set, an async run that takes longer than that
+percentile of the provider's recent latencies also starts the next provider,
+and whichever finishes first wins.
+"""
+import copy
+import time
+import asyncio
+import logging
+import threading
+from collections import deque
+
+from akhilsinghrana.backend import metrics
+
+logger = logging.getLogger(__name__)
+
+
+class ProvidersUnavailable(RuntimeError):
+    """Every provider failed, or every circuit breaker is open."""
+
+
+class CircuitBreaker:
+    """Closed → open after `failure_threshold` consecutive failures → half-open after `reset_timeout`."""
+
+    CLOSED, OPEN, HALF_OPEN = "closed", "open", "half_open"
+
+    def __init__(self, failure_threshold: int = 3, reset_timeout: float = 30.0, clock=time.monotonic) -> None:
+        self.failure_threshold = failure_threshold
+        self.reset_timeout = reset_timeout
+        self._clock = clock
+        self._lock = threading.Lock()
+        self._failures = 0
+        self._opened_at = None
+        self._probing = False
+
+    @property
+    def state(self) -> str:
+        with self._lock:
+            return self._state()
+
+    def _state(self) -> str:
+        if self._opened_at is None:
+            return self.CLOSED
+        if self._clock() - self._opened_at >= self.reset_timeout:
+            return self.HALF_OPEN
+        return self.OPEN
+
+    def allow(self) -> bool:
+        """Whether a call may go through; in half-open state only one probe at a time does."""
+        with self._lock:
+            state = self._state()
+            if state == self.CLOSED:
+                return True
+            if state == self.HALF_OPEN and not self._probing:
+                self._probing = True
+                return True
+            return False
+
+    def record_success(self) -> None:
+        with self._lock:
+            self._failures = 0
+            self._opened_at = None
+            self._probing = False
+
+    def record_failure(self) -> None:
+        with self._lock:
+            self._failures += 1
+            if self._probing or self._failures >= self.failure_threshold:
+                self._opened_at = self._clock()
+            self._probing = False
+
+    def release(self) -> None:
+        """Give back a probe slot without a verdict (e.g. the call was cancelled by a hedge)."""
+        with self._lock:
+            self._probing = False
+
+
+class LatencyWindow:
+    """The last `size` successful run durations, for hedging thresholds."""
+
+    def __init__(self, size: int = 100) -> None:
+        self._samples = deque(maxlen=size)
+
+    def add(self, seconds: float) -> None:
+        self._samples.append(seconds)
+
+    def __len__(self) -> int:
+        return len(self._samples)
+
+    def percentile(self, q: float) -> float:
+        ordered = sorted(self._samples)
+        return ordered[min(len(ordered) - 1, int(q * len(ordered)))]
+
+
+class LazyRunnable:
+    """
+    Stands in for the runnable `factory()` returns, building it on the first
+    call. A failed build raises from that call, so the router counts it
+    against the provider, and is retried on the next one.
+    """
+
+    def __init__(self, factory) -> None:
+        self._factory = factory
+        self._runnable = None
+        self._lock = threading.Lock()
+
+    @property
+    def built(self) -> bool:
+        return self._runnable is not None
+
+    def get(self):
+        with self._lock:
+            if self._runnable is None:
+                self._runnable = self._factory()
+            return self._runnable
+
+    async def aget(self):
+        # Building can block (client set-up, graph compilation), so it runs off the event loop
+        return self._runnable if self._runnable is not None else await asyncio.to_thread(self.get)
+
+    def invoke(self, inputs, config=None, **kwargs):
+        return self.get().invoke(inputs, config, **kwargs)
+
+    async def ainvoke(self, inputs, config=None, **kwargs):
+        return await (await self.aget()).ainvoke(inputs, config, **kwargs)
+
+    async def astream(self, inputs, config=None, **kwargs):
+        stream = (await self.aget()).astream(inputs, config, **kwargs)
+        try:
+            async for chunk in stream:
+                yield chunk
+        finally:
+            await stream.aclose()
+
+
+class Provider:
+    def __init__(self, name: str, runnable, breaker: CircuitBreaker) -> None:
+        self.name = name
+        self.runnable = runnable
+        self.breaker = breaker
+        self.latency = LatencyWindow()
+
+
+class LLMRouter:
+    """
+    Route runs of `runnables` ({provider name: runnable}, preferred first).
+
+    `timeout` bounds one ainvoke() run on one provider; invoke() and astream()
+    rely on the LLM clients' own per-call timeouts. `hedge_percentile` (e.g. 0.95) enables hedging
+    once a provider has `hedge_min_samples` latencies recorded.
+    """
+
+    def __init__(
+        self,
+        runnables: dict,
+        timeout: float = 60.0,
+        failure_threshold: int = 3,
+        reset_timeout: float = 30.0,
+        hedge_percentile: float = None,
+        hedge_min_samples: int = 20,
+        clock=time.monotonic,
+    ) -> None:
+        if not runnables:
+            raise ValueError("LLMRouter needs at least one provider")
+        self.providers = [
+            Provider(name, runnable, CircuitBreaker(failure_threshold, reset_timeout, clock))
+            for name, runnable in runnables.items()
+        ]
+        self.timeout = timeout
+        self.hedge_percentile = hedge_percentile
+        self.hedge_min_samples = hedge_min_samples
+
+    def states(self) -> dict:
+        return {provider.name: provider.breaker.state for provider in self.providers}
+
+    # ── Routing ───────────────────────────────────────────────────────────────
+
+    def _candidates(self, fallback: bool = True):
+        """Providers whose breaker admits a call, in preference order (lazily, so probes aren't wasted)."""
+        for provider in self.providers if fallback else self.providers[:1]:
+            if provider.breaker.allow():
+                yield provider
+
+    def _failed(self, provider: Provider, error: Exception) -> None:
+        provider.breaker.record_failure()
+        logger.warning(f"LLM provider {provider.name} failed ({error!r}), state {provider.breaker.state}")
+
+    def _succeeded(self, provider: Provider, seconds: float = None) -> None:
+        provider.breaker.record_success()
+        if seconds is not None:
+            provider.latency.add(seconds)
+        if provider is not self.providers[0]:
+            metrics.LLM_FALLBACKS.labels(provider=provider.name).inc()
+
+    def _unavailable(self, error: Exception):
+        if error is None:
+            return ProvidersUnavailable(f"All circuit breakers are open: {self.states()}")
+        return ProvidersUnavailable(f"All LLM providers failed, last error: {error!r}")
+
+    def invoke(self, inputs: dict, config=None, fallback: bool = True):
+        """Run on the first available provider; with fallback=False only the preferred one is tried."""
+        error = None
+        for provider in self._candidates(fallback):
+            start = time.perf_counter()
+            try:
+                result = provider.runnable.invoke(copy.deepcopy(inputs), config)
+            except Exception as e:
+                self._failed(provider, e)
+                error = e
+                continue
+            self._succeeded(provider, time.perf_counter() - start)
+            return result
+        raise self._unavailable(error) from error
+
+    async def ainvoke(self, inputs: dict, config=None):
+        error = None
+        candidates = self._candidates()
+        for provider in candidates:
+            try:
+                return await self._ainvoke_hedged(provider, candidates, inputs, config)
+            except Exception as e:
+                error = e
+        raise self._unavailable(error) from error
+
+    async def arun(self, fn):
+        """
+        Await `fn(provider_name)` on the first provider whose breaker admits
+        it, failing over like ainvoke. For LLM work that is not a run of the
+        providers' runnables (e.g. RAGChat.aget_answers' shared pass); it is
+        not timed out, hedged or counted towards the hedging latencies.
+        """
+        error = None
+        for provider in self._candidates():
+            try:
+                result = await fn(provider.name)
+            except asyncio.CancelledError:
+                provider.breaker.release()
+                raise
+            except Exception as e:
+                self._failed(provider, e)
+                error = e
+                continue
+            self._succeeded(provider)
+            return result
+        raise self._unavailable(error) from error
+
+    async def _run(self, provider: Provider, inputs: dict, config):
+        start = time.perf_counter()
+        try:
+            result = await asyncio.wait_for(provider.runnable.ainvoke(copy.deepcopy(inputs), config), self.timeout)
+        except asyncio.CancelledError:
+            provider.breaker.release()
+            raise
+        except Exception as e:
+            self._failed(provider, e)
+            raise
+        self._succeeded(provider, time.perf_counter() - start)
+        return result
+
+    def _hedge_delay(self, provider: Provider):
+        if self.hedge_percentile is None or len(provider.latency) < self.hedge_min_samples:
+            return None
+        return provider.latency.percentile(self.hedge_percentile)
+
+    async def _ainvoke_hedged(self, provider: Provider, candidates, inputs: dict, config):
+        """Run on `provider`; past the hedge delay also start the next candidate and take the first success."""
+        delay = self._hedge_delay(provider)
+        if delay is None:
+            return await self._run(provider, inputs, config)
+        pending = {asyncio.ensure_future(self._run(provider, inputs, config))}
+        try:
+            done, pending = await asyncio.wait(pending, timeout=delay)
+            if not done:
+                backup = next(candidates, None)
+                if backup is not None:
+                    logger.info(f"{provider.name} slower than {delay:.2f}s, hedging with {backup.name}")
+                    pending.add(asyncio.ensure_future(self._run(backup, inputs, config)))
+            error = None
+            while True:
+                for task in done:
+                    if task.exception() is None:
+                        return task.result()
+                    error = task.exception()
+                if not pending:
+                    raise error
+                done, pending = await asyncio.wait(pending, return_when=asyncio.FIRST_COMPLETED)
+        finally:
+            for task in pending:
+                task.cancel()
+
+    async def astream(self, inputs: dict, config=None, committed=None, **kwargs):
+        """
+        Stream a run, failing over to the next provider only until a chunk for
+        which `committed(chunk)` is true has been yielded (by default, any
+        chunk). Chunks from before a failover are yielded again by the retry;
+        callers that stream partial progress should de-duplicate them.
+        """
+        committed = committed or (lambda chunk: True)
+        error = None
+        for provider in self._candidates():
+            start = time.perf_counter()
+            stream = provider.runnable.astream(copy.deepcopy(inputs), config, **kwargs)
+            has_committed = False
+            try:
+                async for chunk in stream:
+                    has_committed = has_committed or committed(chunk)
+                    yield chunk
+            except (GeneratorExit, asyncio.CancelledError):
+                provider.breaker.release()
+                raise
+            except Exception as e:
+                self._failed(provider, e)
+                if has_committed:
+                    raise
+                error = e
+                continue
+            finally:
+                await stream.aclose()
+            self._succeeded(provider, time.perf_counter() - start)
+            return
+        raise self._unavailable(error) from error
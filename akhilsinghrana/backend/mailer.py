@@ -0,0 +1,285 @@
+"""
+Contact-form email delivery off the request path.
+
+Mailer.submit() writes each message to a spool directory (one JSON file,
+written atomically) and puts it on an asyncio.Queue. A pool of workers sends
+queued messages through SMTPSender calls run in threads, each worker with
+its own SMTP connection that stays open and authenticated between messages.
+A failed send is retried with exponential backoff; a message's spool file is
+removed only once the server has accepted it, and anything still spooled at
+startup is replayed. Messages that exhaust their retries are renamed to
+*.failed and left for manual inspection.
+
+Every uvicorn worker shares the spool directory, so a worker holds an
+exclusive flock on each spool file it has queued until the file is removed
+or renamed. A replay skips files another worker holds; the lock goes away
+with its process, so messages of a worker that died are picked up by the
+next one to start.
+"""
+import os
+import json
+import time
+import uuid
+import fcntl
+import random
+import asyncio
+import logging
+import smtplib
+import threading
+from email.mime.text import MIMEText
+from email.mime.multipart import MIMEMultipart
+
+from akhilsinghrana.backend import metrics
+
+logger = logging.getLogger(__name__)
+
+
+class SMTPSender:
+    """
+    Blocking SMTP client that keeps one connection open across messages.
+    Connects (and runs STARTTLS / login when configured) on first use and
+    reconnects once if the server has dropped the connection in between.
+    """
+
+    def __init__(
+        self,
+        host: str,
+        port: int = 587,
+        username: str = None,
+        password: str = None,
+        recipient: str = None,
+        starttls: bool = True,
+        timeout: float = 30.0,
+    ) -> None:
+        self.host = host
+        self.port = port
+        self.username = username
+        self.password = password
+        self.recipient = recipient
+        self.starttls = starttls
+        self.timeout = timeout
+        self.connections = 0  # number of connects, for logging and tests
+        self._smtp = None
+        self._lock = threading.Lock()
+
+    @classmethod
+    def from_env(cls) -> "SMTPSender":
+        return cls(
+            host=os.getenv("SMTP_SERVER"),
+            port=int(os.getenv("SMTP_PORT", 587)),
+            username=os.getenv("SMTP_USERNAME"),
+            password=os.getenv("SMTP_PASSWORD"),
+            recipient=os.getenv("RECIPIENT_EMAIL"),
+            starttls=os.getenv("SMTP_STARTTLS", "true").lower() == "true",
+        )
+
+    def build_message(self, item: dict) -> MIMEMultipart:
+        msg = MIMEMultipart()
+        msg["From"] = self.username or self.recipient
+        msg["To"] = self.recipient
+        msg["Subject"] = f"New Contact Form Submission from {item['name']}"
+        msg.attach(MIMEText(f"Name: {item['name']}\nEmail: {item['email']}\nMessage: {item['message']}", "plain"))
+        return msg
+
+    def send(self, item: dict) -> None:
+        msg = self.build_message(item)
+        with self._lock:
+            try:
+                try:
+                    self._connection().send_message(msg)
+                except smtplib.SMTPServerDisconnected:
+                    # Idle connections get closed server-side; one fresh connection is worth a try
+                    self._reset()
+                    self._connection().send_message(msg)
+            except Exception:
+                self._reset()
+                raise
+
+    def _connection(self) -> smtplib.SMTP:
+        if self._smtp is None:
+            smtp = smtplib.SMTP(self.host, self.port, timeout=self.timeout)
+            try:
+                if self.starttls:
+                    smtp.starttls()
+                if self.username:
+                    smtp.login(self.username, self.password)
+            except Exception:
+                smtp.close()
+                raise
+            self._smtp = smtp
+            self.connections += 1
+        return self._smtp
+
+    def _reset(self) -> None:
+        if self._smtp is not None:
+            try:
+                self._smtp.quit()
+            except Exception:
+                self._smtp.close()
+            self._smtp = None
+
+    def close(self) -> None:
+        with self._lock:
+            self._reset()
+
+
+class Mailer:
+    """
+    Durable, retrying delivery of contact messages on `workers` workers.
+    `sender_factory` builds one sender (anything with send(item) and close())
+    per worker. Call start() from the app's startup and stop() on shutdown.
+    """
+
+    def __init__(
+        self,
+        sender_factory,
+        spool_dir: str,
+        workers: int = 2,
+        max_retries: int = 5,
+        backoff: float = 2.0,
+    ) -> None:
+        self.sender_factory = sender_factory
+        self.spool_dir = spool_dir
+        self.workers = workers
+        self.max_retries = max_retries
+        self.backoff = backoff
+        self.sent = 0
+        self.failed = 0
+        self._queue: asyncio.Queue = asyncio.Queue()
+        self._claimed: dict = {}  # spool path -> open file holding its lock, for every queued message
+        self._tasks = []
+        self._senders = []
+
+    async def start(self) -> None:
+        """Replay messages left in the spool by a previous run, then start the workers."""
+        os.makedirs(self.spool_dir, exist_ok=True)
+        replayed = 0
+        for name in sorted(os.listdir(self.spool_dir)):
+            path = os.path.join(self.spool_dir, name)
+            if not name.endswith(".json") or path in self._claimed:
+                continue
+            item = self._claim(path)
+            if item is not None:
+                self._queue.put_nowait((path, item))
+                metrics.EMAIL_QUEUE_DEPTH.inc()
+                replayed += 1
+        if replayed:
+            logger.info(f"Replaying {replayed} spooled messages")
+        for i in range(self.workers):
+            sender = self.sender_factory()
+            self._senders.append(sender)
+            self._tasks.append(asyncio.create_task(self._run_worker(sender), name=f"mailer-{i}"))
+
+    async def submit(self, item: dict) -> None:
+        """Persist `item` ({"name", "email", "message"}) and queue it for delivery."""
+        path = await asyncio.to_thread(self._spool, item)
+        await self._queue.put((path, item))
+        metrics.EMAIL_QUEUE_DEPTH.inc()
+
+    async def join(self) -> None:
+        """Wait until every queued message has been delivered or given up on."""
+        await self._queue.join()
+
+    async def stop(self) -> None:
+        # Undelivered messages stay in the spool and are replayed on the next start
+        for task in self._tasks:
+            task.cancel()
+        await asyncio.gather(*self._tasks, return_exceptions=True)
+        self._tasks.clear()
+        for sender in self._senders:
+            await asyncio.to_thread(sender.close)
+        self._senders.clear()
+        for path in list(self._claimed):
+            self._release(path)
+
+    def __len__(self) -> int:
+        return self._queue.qsize()
+
+    async def _run_worker(self, sender) -> None:
+        while True:
+            path, item = await self._queue.get()
+            try:
+                await self._deliver(sender, path, item)
+            except Exception:
+                # e.g. the spool file could not be removed or renamed; keep this worker serving the queue
+                logger.exception(f"Unexpected error handling spooled email {path}")
+            finally:
+                # Only once the file is gone or renamed, so no other worker can claim it
+                self._release(path)
+                self._queue.task_done()
+                metrics.EMAIL_QUEUE_DEPTH.dec()
+
+    async def _deliver(self, sender, path: str, item: dict) -> None:
+        for attempt in range(self.max_retries + 1):
+            try:
+                with metrics.EMAIL_SECONDS.time():
+                    await asyncio.to_thread(sender.send, item)
+                break
+            except Exception as e:
+                if attempt == self.max_retries:
+                    self.failed += 1
+                    metrics.EMAILS.labels(result="failed").inc()
+                    logger.error(f"Giving up on email after {attempt + 1} attempts: {e}")
+                    await asyncio.to_thread(os.replace, path, f"{path[: -len('.json')]}.failed")
+                    return
+                delay = self.backoff * 2**attempt * (1 + random.random() / 2)
+                logger.warning(f"Sending email failed ({e}), retrying in {delay:.1f}s")
+                metrics.EMAILS.labels(result="retried").inc()
+                await asyncio.sleep(delay)
+        self.sent += 1
+        metrics.EMAILS.labels(result="sent").inc()
+        logger.info("Email sent successfully")
+        try:
+            await asyncio.to_thread(os.remove, path)
+        except FileNotFoundError:
+            pass
+
+    def _spool(self, item: dict) -> str:
+        # Time-ordered names so a replay keeps submission order
+        os.makedirs(self.spool_dir, exist_ok=True)
+        path = os.path.join(self.spool_dir, f"{time.time_ns()}-{uuid.uuid4().hex[:8]}.json")
+        tmp_path = f"{path}.tmp"
+        f = open(tmp_path, "w", encoding="utf-8")
+        try:
+            json.dump(item, f)
+            f.flush()
+            os.fsync(f.fileno())
+            # Locked before it gets a name other workers replay
+            fcntl.flock(f.fileno(), fcntl.LOCK_EX)
+            os.replace(tmp_path, path)
+        except BaseException:
+            f.close()
+            try:
+                os.remove(tmp_path)
+            except FileNotFoundError:
+                pass
+            raise
+        self._claimed[path] = f
+        return path
+
+    def _claim(self, path: str):
+        """Lock a spooled message for this worker and return it, or None if another worker holds it."""
+        try:
+            f = open(path, "r", encoding="utf-8")
+        except FileNotFoundError:
+            return None
+        try:
+            fcntl.flock(f.fileno(), fcntl.LOCK_EX | fcntl.LOCK_NB)
+            # The holder may have sent and removed it between our open and lock
+            if os.stat(path).st_ino != os.fstat(f.fileno()).st_ino:
+                raise FileNotFoundError(path)
+            item = json.load(f)
+        except (BlockingIOError, FileNotFoundError):
+            f.close()
+            return None
+        except (OSError, json.JSONDecodeError) as e:
+            f.close()
+            logger.warning(f"Skipping unreadable spooled message {path}: {e}")
+            return None
+        self._claimed[path] = f
+        return item
+
+    def _release(self, path: str) -> None:
+        f = self._claimed.pop(path, None)
+        if f is not None:
+            f.close()
@@ -4,18 +4,28 @@ import json
 import time
 import gc
 import logging
-import smtplib
-from collections import deque, defaultdict, OrderedDict
-from email.mime.text import MIMEText
-from email.mime.multipart import MIMEMultipart
+import threading
 from functools import lru_cache
 
-from fastapi import FastAPI, Request, Form, HTTPException, BackgroundTasks
+from fastapi import FastAPI, Request, Form, HTTPException, BackgroundTasks, Depends
 from fastapi.middleware.cors import CORSMiddleware
-from fastapi.responses import JSONResponse
-from pydantic import BaseModel
+from fastapi.responses import JSONResponse, Response, StreamingResponse
+from pydantic import BaseModel, Field
 from dotenv import load_dotenv
-from akhilsinghrana.backend.RAG_Chat import RAGChat
+from akhilsinghrana.backend import metrics
+from akhilsinghrana.backend.blog_store import BlogStore
+from akhilsinghrana.backend.mailer import Mailer, SMTPSender
+from akhilsinghrana.backend.rate_limit import (
+    MemoryRateLimitStore,
+    RateLimit,
+    RateLimitPolicy,
+    RateLimitStore,
+    SQLiteRateLimitStore,
+)
+from akhilsinghrana.backend.answer_cache import BOT_CACHE_FILE, create_answer_cache
+from akhilsinghrana.backend.query_log import QueryLog
+from akhilsinghrana.backend.semantic_cache import SemanticCache, normalize_question
+from akhilsinghrana.backend.singleflight import SingleFlight
 
 load_dotenv(os.path.join(os.path.dirname(__file__), ".env"))
 logging.basicConfig(level=logging.INFO)
@@ -23,10 +33,9 @@ logger = logging.getLogger(__name__)
 
 _BACKEND_DIR = os.path.dirname(__file__)
 PAGES_DIR = os.getenv("PAGES_DIR", os.path.join(_BACKEND_DIR, "..", "frontend", "public", "blogs"))
+BLOG_RELOAD_INTERVAL = float(os.getenv("BLOG_RELOAD_INTERVAL", 2.0))  # seconds; 0 disables hot reload
 CORS_ORIGINS = os.getenv("CORS_ORIGINS", "http://localhost:3000").split(",")
 
-custom_chatBot = RAGChat(recreateVectorDB=False, folder=PAGES_DIR)
-
 app = FastAPI()
 
 app.add_middleware(
@@ -37,6 +46,85 @@ app.add_middleware(
     allow_headers=["*"],
 )
 
+# ── Chatbot (lazy) ────────────────────────────────────────────────────────────
+
+# RAGChat pulls in langchain/langgraph/FAISS and loads the index, so it is
+# imported and built by a startup task rather than at import time; /contact
+# and /api/blog serve while it warms up.
+custom_chatBot = None
+_chatbot_lock = threading.Lock()
+_warmup_task: asyncio.Task = None
+_warmup_error: Exception = None
+# After a failed build, requests fail fast for this long instead of each rebuilding the chatbot
+CHATBOT_RETRY_SECONDS = float(os.getenv("CHATBOT_RETRY_SECONDS", 30))
+_chatbot_failure: tuple = None  # (time.monotonic(), error) of the last failed build
+
+def get_chatbot():
+    global custom_chatBot, _chatbot_failure, _warmup_error
+    with _chatbot_lock:
+        if custom_chatBot is None:
+            if _chatbot_failure is not None and time.monotonic() - _chatbot_failure[0] < CHATBOT_RETRY_SECONDS:
+                raise RuntimeError(f"Chatbot unavailable: {_chatbot_failure[1]}") from _chatbot_failure[1]
+            from akhilsinghrana.backend.RAG_Chat import RAGChat
+
+            try:
+                custom_chatBot = RAGChat(recreateVectorDB=False, folder=PAGES_DIR)
+            except Exception as e:
+                _chatbot_failure = (time.monotonic(), e)
+                raise
+            _chatbot_failure = _warmup_error = None
+    return custom_chatBot
+
+async def aget_chatbot():
+    """The chatbot, waiting for warm-up to finish if it is still running."""
+    if custom_chatBot is not None:
+        return custom_chatBot
+    if _warmup_task is not None and not _warmup_task.done():
+        await asyncio.shield(_warmup_task)
+    return await asyncio.to_thread(get_chatbot)
+
+async def warm_up():
+    """Build the chatbot and answer cache, then send one probe embedding so the first chat is fast."""
+    global _warmup_error
+    start = time.perf_counter()
+    try:
+        chatbot = await asyncio.to_thread(get_chatbot)
+        await aget_answer_cache()
+    except Exception as e:
+        _warmup_error = e
+        logger.error(f"Chatbot warm-up failed: {e}")
+        return
+    try:
+        await chatbot.embeddings.aembed_query("warm-up")
+    except Exception as e:
+        # Not fatal: the endpoint may just be cold, and chat has its own fallbacks
+        logger.warning(f"Warm-up probe embedding failed: {e}")
+    logger.info(f"Chatbot ready in {time.perf_counter() - start:.1f}s")
+
+def is_ready() -> bool:
+    return custom_chatBot is not None and (_warmup_task is None or _warmup_task.done())
+
+@app.get("/healthz")
+async def healthz():
+    """Liveness: the process is up and serving."""
+    return {"status": "ok"}
+
+@app.get("/readyz")
+async def readyz():
+    """Readiness: the chat stack is loaded and warmed up (or was built by a request after a failed warm-up)."""
+    if is_ready():
+        return {"status": "ready", "llm_providers": custom_chatBot.router.states()}
+    if _warmup_error is not None:
+        return JSONResponse(status_code=503, content={"status": "failed", "detail": str(_warmup_error)})
+    return JSONResponse(status_code=503, content={"status": "warming_up"})
+
+@app.get("/metrics")
+async def metrics_endpoint():
+    """Prometheus scrape target; 404 when METRICS_ENABLED=false."""
+    if not metrics.ENABLED:
+        raise HTTPException(status_code=404, detail="Metrics are disabled")
+    return Response(content=metrics.render(), media_type="text/plain; version=0.0.4; charset=utf-8")
+
 # ── Email queue ───────────────────────────────────────────────────────────────
 
 class QueueItem(BaseModel):
@@ -44,22 +132,12 @@ class QueueItem(BaseModel):
     email: str
     message: str
 
-queue: deque = deque()
+MAIL_WORKERS = int(os.getenv("MAIL_WORKERS", 2))
+MAIL_MAX_RETRIES = int(os.getenv("MAIL_MAX_RETRIES", 5))
+MAIL_SPOOL_DIR = os.getenv("MAIL_SPOOL_DIR", os.path.join(_BACKEND_DIR, "db", "mail_spool"))
 
-def process_queue_item(item: QueueItem):
-    try:
-        send_email(item.name, item.email, item.message)
-        logger.info("Email sent successfully")
-    except Exception as e:
-        logger.error(f"Error sending email: {str(e)}")
-
-async def run_queue_tasks():
-    while True:
-        if queue:
-            item = queue.popleft()
-            process_queue_item(item)
-        else:
-            await asyncio.sleep(0.5)
+# Contact messages are spooled to disk and sent by background workers over reused SMTP connections
+mailer = Mailer(SMTPSender.from_env, MAIL_SPOOL_DIR, workers=MAIL_WORKERS, max_retries=MAIL_MAX_RETRIES)
 
 async def periodic_garbage_collection():
     while True:
@@ -68,33 +146,48 @@ async def periodic_garbage_collection():
 
 @app.on_event("startup")
 async def startup_event():
-    # Both background tasks registered in a single startup handler
-    asyncio.create_task(run_queue_tasks())
+    global _warmup_task
+    _warmup_task = asyncio.create_task(warm_up())
+    await mailer.start()
     asyncio.create_task(periodic_garbage_collection())
+    if BLOG_RELOAD_INTERVAL > 0:
+        asyncio.create_task(blog_store.watch())
+
+@app.on_event("shutdown")
+async def shutdown_event():
+    await mailer.stop()
+    # Commit write-behind cache entries before the worker exits
+    if _answer_cache is not None:
+        await asyncio.to_thread(_answer_cache.store.close)
+    rate_limit_store.close()
+    if query_log is not None:
+        query_log.close()
 
 # ── Rate limiting ─────────────────────────────────────────────────────────────
 
-request_history: defaultdict = defaultdict(list)
-
-def is_rate_limited(client_ip: str, max_requests: int = 20, time_frame: int = 60) -> bool:
-    """Chat rate limit: 20 requests per 60 seconds per IP."""
-    current_time = time.time()
-    key = f"chat:{client_ip}"
-    request_history[key] = [t for t in request_history[key] if current_time - t < time_frame]
-    if len(request_history[key]) >= max_requests:
-        return True
-    request_history[key].append(current_time)
-    return False
-
-def is_contact_rate_limited(client_ip: str, max_requests: int = 3, time_frame: int = 3600) -> bool:
-    """Contact rate limit: 3 submissions per hour per IP."""
-    current_time = time.time()
-    key = f"contact:{client_ip}"
-    request_history[key] = [t for t in request_history[key] if current_time - t < time_frame]
-    if len(request_history[key]) >= max_requests:
-        return True
-    request_history[key].append(current_time)
-    return False
+# Limits are "<requests>/<seconds>" per client IP. Use the sqlite backend when
+# running several uvicorn workers so they share one set of counters.
+RATE_LIMIT_BACKEND = os.getenv("RATE_LIMIT_BACKEND", "memory")  # "memory" or "sqlite"
+RATE_LIMIT_DB = os.getenv("RATE_LIMIT_DB", os.path.join(_BACKEND_DIR, "db", "rate_limits.sqlite3"))
+RATE_LIMIT_ALGORITHM = os.getenv("RATE_LIMIT_ALGORITHM", "sliding_window")  # or "token_bucket"
+CHAT_RATE_LIMIT = RateLimitPolicy.parse("chat", os.getenv("CHAT_RATE_LIMIT", "20/60"), RATE_LIMIT_ALGORITHM)
+CONTACT_RATE_LIMIT = RateLimitPolicy.parse("contact", os.getenv("CONTACT_RATE_LIMIT", "3/3600"), RATE_LIMIT_ALGORITHM)
+# One batch request answers up to CHAT_BATCH_MAX_SIZE questions, so it has its own, tighter budget
+CHAT_BATCH_RATE_LIMIT = RateLimitPolicy.parse(
+    "chat_batch", os.getenv("CHAT_BATCH_RATE_LIMIT", "10/3600"), RATE_LIMIT_ALGORITHM
+)
+
+def create_rate_limit_store() -> RateLimitStore:
+    if RATE_LIMIT_BACKEND == "memory":
+        return MemoryRateLimitStore()
+    if RATE_LIMIT_BACKEND == "sqlite":
+        return SQLiteRateLimitStore(RATE_LIMIT_DB)
+    raise ValueError(f"Unknown RATE_LIMIT_BACKEND {RATE_LIMIT_BACKEND!r}")
+
+rate_limit_store = create_rate_limit_store()
+chat_rate_limit = RateLimit(CHAT_RATE_LIMIT, lambda: rate_limit_store, "Too many requests. Please slow down.")
+contact_rate_limit = RateLimit(CONTACT_RATE_LIMIT, lambda: rate_limit_store, "Too many requests. Please try again later.")
+chat_batch_rate_limit = RateLimit(CHAT_BATCH_RATE_LIMIT, lambda: rate_limit_store, "Too many batch requests.")
 
 # ── Contact endpoint ──────────────────────────────────────────────────────────
 
@@ -114,111 +207,222 @@ async def contact(
         logger.info(f"Honeypot triggered from {client_ip}")
         return {"status": "ok", "message": "Message received"}
 
-    if is_contact_rate_limited(client_ip):
-        raise HTTPException(status_code=429, detail="Too many requests. Please try again later.")
+    # Checked after the honeypot so bot submissions don't use up a visitor's quota
+    await contact_rate_limit.check(request)
 
-    queue.append(QueueItem(name=name, email=email, message=message))
+    await mailer.submit(QueueItem(name=name, email=email, message=message).model_dump())
     return {"status": "ok", "message": "Message received"}
 
-def send_email(name: str, email: str, message: str):
-    smtp_server = os.getenv("SMTP_SERVER")
-    smtp_port = int(os.getenv("SMTP_PORT", 587))
-    smtp_username = os.getenv("SMTP_USERNAME")
-    smtp_password = os.getenv("SMTP_PASSWORD")
-    recipient_email = os.getenv("RECIPIENT_EMAIL")
-
-    msg = MIMEMultipart()
-    msg["From"] = smtp_username
-    msg["To"] = recipient_email
-    msg["Subject"] = f"New Contact Form Submission from {name}"
-    msg.attach(MIMEText(f"Name: {name}\nEmail: {email}\nMessage: {message}", "plain"))
-
-    with smtplib.SMTP(smtp_server, smtp_port) as server:
-        server.starttls()
-        server.login(smtp_username, smtp_password)
-        server.send_message(msg)
-
 # ── Blog endpoint ─────────────────────────────────────────────────────────────
 
+# Posts are read and compressed once; requests are served from memory
+blog_store = BlogStore(PAGES_DIR, poll_interval=BLOG_RELOAD_INTERVAL)
+
 @app.get("/api/blog/{slug}")
-async def get_blog(slug: str):
-    blog_path = os.path.join(PAGES_DIR, f"{slug}.html")
-    try:
-        with open(blog_path, "r", encoding="utf-8") as f:
-            content = f.read()
-        return {"html": content}
-    except FileNotFoundError:
+async def get_blog(slug: str, request: Request):
+    post = blog_store.get(slug)
+    if post is None:
         raise HTTPException(status_code=404, detail="Blog not found")
+    encoding, body, etag = post.select(request.headers.get("accept-encoding", ""))
+    headers = {"ETag": etag, "Cache-Control": "no-cache", "Vary": "Accept-Encoding"}
+    if post.not_modified(request.headers.get("if-none-match", "")):
+        return Response(status_code=304, headers=headers)
+    if encoding != "identity":
+        headers["Content-Encoding"] = encoding
+    return Response(content=body, media_type="application/json", headers=headers)
 
 # ── Chat endpoint ─────────────────────────────────────────────────────────────
 
 class ChatMessage(BaseModel):
     message: str
 
-MAX_CACHE_SIZE = 30
-_BOT_CACHE_FILE = os.path.join(os.path.dirname(__file__), "bot_cache.json")
-_bot_cache: OrderedDict = OrderedDict()
+_answer_cache: SemanticCache = None
+_answer_cache_lock = threading.Lock()
+# Visitor questions feed the cache pre-warming job (python -m akhilsinghrana.backend.prewarm); "" disables
+QUERY_LOG_PATH = os.getenv("QUERY_LOG_PATH", os.path.join(_BACKEND_DIR, "db", "query_log.jsonl"))
+query_log = QueryLog(QUERY_LOG_PATH) if QUERY_LOG_PATH else None
+
+async def log_question(message: str) -> None:
+    if query_log is not None:
+        # A plain file append, but it may block on a slow disk; keep it off the event loop
+        await asyncio.to_thread(query_log.append, message)
+
+def get_answer_cache(cache_file: str = BOT_CACHE_FILE) -> SemanticCache:
+    """The app's answer cache (see answer_cache.create_answer_cache), built on first use."""
+    global _answer_cache
+    with _answer_cache_lock:
+        if _answer_cache is None:
+            _answer_cache = create_answer_cache(get_chatbot().embeddings, cache_file)
+    return _answer_cache
+
+async def aget_answer_cache(cache_file: str = BOT_CACHE_FILE) -> SemanticCache:
+    # First call reads the store and may embed seeded questions, so keep it off the event loop
+    return _answer_cache or await asyncio.to_thread(get_answer_cache, cache_file)
+
+def get_cached_answer(message: str, cache_file: str = BOT_CACHE_FILE) -> dict:
+    """
+    Store-backed cache for chat answers, shared by every provider the
+    chatbot's LLM router may answer with.
+    """
+    with metrics.ANSWER_SECONDS.labels(path="sync").time():
+        cache = get_answer_cache(cache_file)
+        cached = cache.get(message)
+        if cached is not None:
+            logger.info("Cache hit")
+            metrics.ANSWER_CACHE.labels(result="hit").inc()
+            return cached
+
+        logger.info("Cache miss — calling LLM")
+        metrics.ANSWER_CACHE.labels(result="miss").inc()
+        bot_reply = get_chatbot().get_answer({"input": message})
+        cache.put(message, bot_reply)
+        return bot_reply
+
+# Concurrent misses for the same normalised question share one graph run
+_inflight_answers = SingleFlight()
+
+async def _answer_and_cache(message: str, cache: SemanticCache) -> dict:
+    logger.info("Cache miss — calling LLM")
+    metrics.ANSWER_CACHE.labels(result="miss").inc()
+    chatbot = await aget_chatbot()
+    bot_reply = await chatbot.aget_answer({"input": message})
+    await cache.aput(message, bot_reply)
+    return bot_reply
 
-def get_cached_answer(message: str, cache_file: str = _BOT_CACHE_FILE) -> dict:
+async def aget_cached_answer(message: str, cache_file: str = BOT_CACHE_FILE) -> dict:
     """
-    File-backed cache for chat answers. Avoids lru_cache issues with mutable
-    state and chatbot fallback (HF swap invalidates lru_cache implicitly).
+    Async variant of get_cached_answer used by the chat endpoint; keeps the event loop free.
+    Duplicate questions arriving while the first is still being answered await
+    that same run; if it fails they all get the error and nothing is cached.
     """
-    global _bot_cache
+    with metrics.ANSWER_SECONDS.labels(path="async").time():
+        key = normalize_question(message)
+        cache = await aget_answer_cache(cache_file)
+        if not _inflight_answers.running(key):
+            cached = await cache.aget(message)
+            if cached is not None:
+                logger.info("Cache hit")
+                metrics.ANSWER_CACHE.labels(result="hit").inc()
+                return cached
+        return await _inflight_answers.do(key, lambda: _answer_and_cache(message, cache))
+
+@app.post("/api/chat", dependencies=[Depends(chat_rate_limit)])
+async def chat_endpoint(chat_message: ChatMessage):
+    await log_question(chat_message.message)
+    # Provider failover (Groq → HF) happens inside the chatbot's LLM router
+    try:
+        response = await aget_cached_answer(chat_message.message)
+        return {"response": response["response"]}
+    except Exception as e:
+        gc.collect()
+        logger.error(f"Chat failed: {e}")
+        raise HTTPException(status_code=500, detail="Chat service temporarily unavailable")
 
-    # Load from disk on first call
-    if not _bot_cache:
-        try:
-            with open(cache_file, "r") as f:
-                _bot_cache = json.load(f, object_pairs_hook=OrderedDict)
-        except (FileNotFoundError, json.JSONDecodeError):
-            _bot_cache = OrderedDict()
+# ── Batch chat endpoint ───────────────────────────────────────────────────────
 
-    question_key = json.dumps({"input": message})
+CHAT_BATCH_MAX_SIZE = int(os.getenv("CHAT_BATCH_MAX_SIZE", 100))
 
-    if question_key in _bot_cache:
-        logger.info("Cache hit")
-        _bot_cache.move_to_end(question_key)
-        return _bot_cache[question_key]
+class ChatBatch(BaseModel):
+    messages: list[str] = Field(min_length=1, max_length=CHAT_BATCH_MAX_SIZE)
 
+@app.post("/api/chat/batch", dependencies=[Depends(chat_batch_rate_limit)])
+async def chat_batch_endpoint(batch: ChatBatch):
+    """
+    Answer many questions in one request (evaluation and FAQ jobs). Retrieval,
+    grading and generation are shared across the batch; answers always come
+    fresh from the chatbot and are then added to the answer cache. Results are
+    in input order, each {"response", "steps"} or {"error"}.
+    """
+    chatbot = await aget_chatbot()
+    replies = await chatbot.aget_answers(batch.messages)
+    answered = {message: reply for message, reply in zip(batch.messages, replies) if "error" not in reply}
+    if answered:
+        cache = await aget_answer_cache()
+        await asyncio.to_thread(cache.load, list(answered.items()))
+    for message, reply in zip(batch.messages, replies):
+        if "error" in reply:
+            logger.error(f"Batch question {message!r} failed: {reply['error']}")
+    return {
+        "results": [
+            {"response": reply["response"], "steps": reply["steps"]}
+            if "error" not in reply
+            else {"error": "Chat service temporarily unavailable"}
+            for reply in replies
+        ]
+    }
+
+# ── Streaming chat endpoint ───────────────────────────────────────────────────
+
+def _sse(event: str, data: dict) -> str:
+    return f"event: {event}\ndata: {json.dumps(data)}\n\n"
+
+async def _stream_and_cache(message: str, cache: SemanticCache, events: asyncio.Queue) -> dict:
+    """Run the graph for `message`, putting ("step"/"token", payload) on `events`; None marks the end."""
     logger.info("Cache miss — calling LLM")
-    bot_reply = custom_chatBot.get_answer({"input": message})
-
-    # Evict oldest if at capacity
-    if len(_bot_cache) >= MAX_CACHE_SIZE:
-        _bot_cache.popitem(last=False)
-
-    _bot_cache[question_key] = bot_reply
-    _bot_cache.move_to_end(question_key)
-
+    metrics.ANSWER_CACHE.labels(result="miss").inc()
     try:
-        with open(cache_file, "w") as f:
-            json.dump(_bot_cache, f)
-    except Exception as e:
-        logger.warning(f"Could not save cache: {e}")
-
-    return bot_reply
-
-@app.post("/api/chat")
-async def chat_endpoint(request: Request, chat_message: ChatMessage):
-    client_ip = request.client.host
-    if is_rate_limited(client_ip):
-        raise HTTPException(status_code=429, detail="Too many requests. Please slow down.")
+        bot_reply = None
+        chatbot = await aget_chatbot()
+        async for kind, payload in chatbot.astream_answer({"input": message}):
+            if kind in ("step", "token"):
+                events.put_nowait((kind, payload))
+            else:
+                bot_reply = payload
+        await cache.aput(message, bot_reply)
+        return bot_reply
+    finally:
+        events.put_nowait(None)
+
+async def stream_cached_answer(message: str, cache_file: str = BOT_CACHE_FILE):
+    """
+    Server-Sent Events for one chat message: a `step` event as each graph node
+    finishes, `token` events while the answer is generated, then `done`.
+    Cache hits are replayed as a single token event.
+
+    The first request for a question leads the graph run and streams it;
+    identical requests arriving meanwhile (streaming or not) share that run
+    and get its answer replayed like a cache hit. The run is shielded, so the
+    others still get their answer if the leader's client disconnects.
+    """
+    cache = await aget_answer_cache(cache_file)
+    key = normalize_question(message)
+    if not _inflight_answers.running(key):
+        cached = await cache.aget(message)
+        if cached is not None:
+            logger.info("Cache hit")
+            metrics.ANSWER_CACHE.labels(result="hit").inc()
+            yield _sse("token", {"token": cached["response"]})
+            yield _sse("done", {"response": cached["response"], "steps": cached["steps"], "cached": True})
+            return
+
+    events = asyncio.Queue()
+    flight, leader = _inflight_answers.start(key, lambda: _stream_and_cache(message, cache, events))
+    if leader:
+        while (event := await events.get()) is not None:
+            kind, payload = event
+            yield _sse(kind, {kind: payload})
     try:
-        response = get_cached_answer(chat_message.message)
-        return {"response": response["response"]}
+        bot_reply = await asyncio.shield(flight)
     except Exception as e:
         gc.collect()
-        logger.warning(f"Groq failed ({e}), falling back to HuggingFace")
-        try:
-            custom_chatBot.llm = custom_chatBot.get_hf_llm()
-            custom_chatBot.create_execution_pipeline()
-            response = get_cached_answer(chat_message.message)
-            return {"response": response["response"]}
-        except Exception as e2:
-            gc.collect()
-            logger.error(f"HF fallback also failed: {e2}")
-            raise HTTPException(status_code=500, detail="Chat service temporarily unavailable")
+        logger.error(f"Streaming chat failed: {e}")
+        yield _sse("error", {"detail": "Chat service temporarily unavailable"})
+        return
+
+    if not leader:
+        logger.info("Cache hit")
+        metrics.ANSWER_CACHE.labels(result="hit").inc()
+        yield _sse("token", {"token": bot_reply["response"]})
+    yield _sse("done", {"response": bot_reply["response"], "steps": bot_reply["steps"], "cached": not leader})
+
+@app.post("/api/chat/stream", dependencies=[Depends(chat_rate_limit)])
+async def chat_stream_endpoint(chat_message: ChatMessage):
+    await log_question(chat_message.message)
+    return StreamingResponse(
+        stream_cached_answer(chat_message.message, BOT_CACHE_FILE),
+        media_type="text/event-stream",
+        headers={"Cache-Control": "no-cache", "X-Accel-Buffering": "no"},
+    )
 
 
 if __name__ == "__main__":
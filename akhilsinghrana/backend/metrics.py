@@ -0,0 +1,312 @@
+"""
+Minimal Prometheus instrumentation, rendered at /metrics.
+
+Counters, gauges and histograms with labels, in the text exposition format,
+without a client library dependency. Set METRICS_ENABLED=false to turn every
+metric into a no-op and leave wrapped functions unwrapped, so disabled
+instrumentation costs nothing on the hot path. Values are per process: with
+several uvicorn workers each one reports its own.
+"""
+import os
+import time
+import bisect
+import inspect
+import functools
+import threading
+
+ENABLED = os.getenv("METRICS_ENABLED", "true").lower() == "true"
+
+DEFAULT_BUCKETS = (0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0, 30.0, 60.0)
+
+
+class _Metric:
+    kind = ""
+
+    def __init__(self, name: str, documentation: str, labelnames=()) -> None:
+        self.name = name
+        self.documentation = documentation
+        self.labelnames = tuple(labelnames)
+        self._lock = threading.Lock()
+        self._children: dict = {}
+        REGISTRY.append(self)
+
+    def labels(self, **labels):
+        key = tuple(str(labels[name]) for name in self.labelnames)
+        child = self._children.get(key)
+        if child is None:
+            with self._lock:
+                child = self._children.setdefault(key, self._new_child())
+        return child
+
+    def _new_child(self):
+        raise NotImplementedError
+
+    def _default(self):
+        # Unlabelled metrics have a single child
+        return self.labels()
+
+    def render(self) -> list:
+        lines = [f"# HELP {self.name} {self.documentation}", f"# TYPE {self.name} {self.kind}"]
+        for key, child in sorted(self._children.items()):
+            lines.extend(child.render(self.name, dict(zip(self.labelnames, key))))
+        return lines
+
+
+class _Value:
+    def __init__(self) -> None:
+        self._lock = threading.Lock()
+        self.value = 0.0
+
+    def inc(self, amount: float = 1.0) -> None:
+        with self._lock:
+            self.value += amount
+
+    def dec(self, amount: float = 1.0) -> None:
+        self.inc(-amount)
+
+    def set(self, value: float) -> None:
+        with self._lock:
+            self.value = value
+
+    def render(self, name, labels):
+        return [f"{name}{_format_labels(labels)} {_format_value(self.value)}"]
+
+
+class _HistogramValue:
+    def __init__(self, buckets) -> None:
+        self._lock = threading.Lock()
+        self.buckets = buckets
+        self.counts = [0] * len(buckets)
+        self.sum = 0.0
+        self.count = 0
+
+    def observe(self, value: float) -> None:
+        index = bisect.bisect_left(self.buckets, value)
+        with self._lock:
+            if index < len(self.counts):
+                self.counts[index] += 1
+            self.sum += value
+            self.count += 1
+
+    def time(self):
+        return _Timer(self)
+
+    def render(self, name, labels):
+        lines, cumulative = [], 0
+        for bound, count in zip(self.buckets, self.counts):
+            cumulative += count
+            lines.append(f"{name}_bucket{_format_labels({**labels, 'le': _format_value(bound)})} {cumulative}")
+        lines.append(f"{name}_bucket{_format_labels({**labels, 'le': '+Inf'})} {self.count}")
+        lines.append(f"{name}_sum{_format_labels(labels)} {_format_value(self.sum)}")
+        lines.append(f"{name}_count{_format_labels(labels)} {self.count}")
+        return lines
+
+
+class _Timer:
+    def __init__(self, histogram) -> None:
+        self.histogram = histogram
+
+    def __enter__(self):
+        self.start = time.perf_counter()
+        return self
+
+    def __exit__(self, *exc):
+        self.histogram.observe(time.perf_counter() - self.start)
+        return False
+
+
+class Counter(_Metric):
+    kind = "counter"
+
+    def _new_child(self):
+        return _Value()
+
+    def inc(self, amount: float = 1.0) -> None:
+        self._default().inc(amount)
+
+
+class Gauge(_Metric):
+    kind = "gauge"
+
+    def _new_child(self):
+        return _Value()
+
+    def set(self, value: float) -> None:
+        self._default().set(value)
+
+    def inc(self, amount: float = 1.0) -> None:
+        self._default().inc(amount)
+
+    def dec(self, amount: float = 1.0) -> None:
+        self._default().dec(amount)
+
+
+class Histogram(_Metric):
+    kind = "histogram"
+
+    def __init__(self, name: str, documentation: str, labelnames=(), buckets=DEFAULT_BUCKETS) -> None:
+        self.buckets = tuple(sorted(buckets))
+        super().__init__(name, documentation, labelnames)
+
+    def _new_child(self):
+        return _HistogramValue(self.buckets)
+
+    def observe(self, value: float) -> None:
+        self._default().observe(value)
+
+    def time(self):
+        return self._default().time()
+
+
+class _NoOp:
+    """Stands in for every metric and child when metrics are disabled."""
+
+    def labels(self, **labels):
+        return self
+
+    def inc(self, amount: float = 1.0) -> None:
+        pass
+
+    dec = inc
+
+    def set(self, value: float) -> None:
+        pass
+
+    def observe(self, value: float) -> None:
+        pass
+
+    def time(self):
+        return _NULL_TIMER
+
+
+class _NullTimer:
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc):
+        return False
+
+
+_NULL_TIMER = _NullTimer()
+_NOOP = _NoOp()
+REGISTRY: list = []
+
+
+def _metric(cls, *args, **kwargs):
+    return cls(*args, **kwargs) if ENABLED else _NOOP
+
+
+def _escape(value: str) -> str:
+    return value.replace("\\", "\\\\").replace('"', '\\"').replace("\n", "\\n")
+
+
+def _format_labels(labels: dict) -> str:
+    if not labels:
+        return ""
+    return "{" + ",".join(f'{key}="{_escape(str(value))}"' for key, value in labels.items()) + "}"
+
+
+def _format_value(value: float) -> str:
+    return repr(float(value)) if value != int(value) else f"{int(value)}.0"
+
+
+def render() -> str:
+    """All metrics in the Prometheus text exposition format."""
+    lines = []
+    for metric in REGISTRY:
+        lines.extend(metric.render())
+    return "\n".join(lines) + "\n"
+
+
+# ── Metrics ───────────────────────────────────────────────────────────────────
+
+NODE_SECONDS = _metric(Histogram, "chat_node_seconds", "Time spent in each chat graph node.", ["node"])
+ANSWER_SECONDS = _metric(
+    Histogram, "chat_answer_seconds", "Time to produce a chat answer, cache lookup included.", ["path"]
+)
+ANSWER_CACHE = _metric(Counter, "chat_answer_cache_total", "Answer cache lookups by result.", ["result"])
+LLM_TOKENS = _metric(Counter, "llm_tokens_total", "LLM tokens used, by kind (prompt or completion).", ["kind"])
+LLM_FALLBACKS = _metric(Counter, "llm_fallbacks_total", "Switches to the fallback LLM provider.", ["provider"])
+EMBEDDING_SECONDS = _metric(
+    Histogram, "embedding_request_seconds", "Embedding endpoint calls that missed the cache.", ["kind"]
+)
+EMBEDDING_CACHE = _metric(Counter, "embedding_cache_total", "Embedding lookups by result.", ["result"])
+CONTEXT_TOKENS = _metric(
+    Counter, "context_tokens_total", "Estimated generate-prompt context tokens, packed and saved.", ["kind"]
+)
+WEB_SEARCH_CACHE = _metric(
+    Counter, "web_search_cache_total", "Web search lookups by result (hit, joined, miss).", ["result"]
+)
+WEB_SEARCH_SPECULATIVE = _metric(
+    Counter,
+    "web_search_speculative_total",
+    "Web searches started during grading, by outcome (used, cancelled, wasted).",
+    ["result"],
+)
+RATE_LIMITED = _metric(Counter, "rate_limit_rejections_total", "Requests rejected with 429.", ["policy"])
+EMAIL_QUEUE_DEPTH = _metric(Gauge, "email_queue_depth", "Contact emails waiting to be sent.")
+EMAIL_SECONDS = _metric(Histogram, "email_send_seconds", "Time to hand one email to the SMTP server.")
+EMAILS = _metric(Counter, "emails_total", "Contact emails by outcome (sent, retried, failed).", ["result"])
+
+
+# ── Instrumentation helpers ───────────────────────────────────────────────────
+
+
+def timed_node(name: str, fn):
+    """Wrap a graph node (sync or async) so its duration lands in chat_node_seconds."""
+    if not ENABLED:
+        return fn
+    histogram = NODE_SECONDS.labels(node=name)
+    if inspect.iscoroutinefunction(fn):
+
+        @functools.wraps(fn)
+        async def async_wrapper(state):
+            with histogram.time():
+                return await fn(state)
+
+        return async_wrapper
+
+    @functools.wraps(fn)
+    def wrapper(state):
+        with histogram.time():
+            return fn(state)
+
+    return wrapper
+
+
+@functools.cache
+def _token_usage_callback_class():
+    # Defined on first use: the base class would pull LangChain into every import of metrics
+    from langchain_core.callbacks import BaseCallbackHandler
+
+    class TokenUsageCallback(BaseCallbackHandler):
+        """Counts prompt and completion tokens reported by every LLM call in a run."""
+
+        def on_llm_end(self, response, **kwargs) -> None:
+            usage = (response.llm_output or {}).get("token_usage") or {}
+            prompt, completion = usage.get("prompt_tokens"), usage.get("completion_tokens")
+            if prompt is None and completion is None:
+                # Chat models that only report usage on the message (e.g. when streaming)
+                prompt = completion = 0
+                for generations in response.generations:
+                    for generation in generations:
+                        metadata = getattr(getattr(generation, "message", None), "usage_metadata", None) or {}
+                        prompt += metadata.get("input_tokens", 0)
+                        completion += metadata.get("output_tokens", 0)
+            if prompt:
+                LLM_TOKENS.labels(kind="prompt").inc(prompt)
+            if completion:
+                LLM_TOKENS.labels(kind="completion").inc(completion)
+
+    return TokenUsageCallback
+
+
+def __getattr__(name: str):
+    if name == "TokenUsageCallback":
+        return _token_usage_callback_class()
+    raise AttributeError(f"module {__name__!r} has no attribute {name!r}")
+
+
+def callbacks() -> list:
+    """LangChain callbacks to pass in a run's config; empty when metrics are disabled."""
+    return [_token_usage_callback_class()()] if ENABLED else []
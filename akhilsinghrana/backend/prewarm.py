@@ -0,0 +1,302 @@
+"""
+Pre-warm the chat answer cache as a build step, before the image is built.
+
+Candidate questions come from content/site-content.json (about, skills,
+education, publications, blogs), from the blog headings, and from the most
+frequent questions in the query log main.py keeps (QUERY_LOG_PATH).
+Questions the shipped cache already answers are skipped. The rest go through
+RAGChat.get_answer on `concurrency` threads, paced by a token bucket so the
+Groq rate limit is respected, with a backoff and retry when a call is rate
+limited anyway. Only the primary provider is used: an answer from the
+fallback model is not what the site normally serves, so it is not cached.
+Answers are merged into bot_cache.json, which ships in the image; on
+startup the app adds the questions its answer store lacks, so a store kept
+across releases picks them up too. --into-store also loads them into the
+configured store (CACHE_BACKEND) right away.
+
+The report (JSON) includes the projected hit ratio: the most recent
+`holdout` share of the query log, which is not used to pick candidates, is
+replayed against the cache before and after pre-warming.
+
+    python -m akhilsinghrana.backend.prewarm --concurrency 4 --rate 30/60
+"""
+import os
+import re
+import sys
+import json
+import time
+import logging
+import argparse
+import threading
+from collections import Counter
+from concurrent.futures import ThreadPoolExecutor
+
+from akhilsinghrana.backend import answer_cache, html_chunker
+from akhilsinghrana.backend.cache_store import MemoryCacheStore
+from akhilsinghrana.backend.query_log import QueryLog
+from akhilsinghrana.backend.rate_limit import RateLimitPolicy
+from akhilsinghrana.backend.semantic_cache import SemanticCache, normalize_question
+
+logger = logging.getLogger(__name__)
+
+_BACKEND_DIR = os.path.dirname(__file__)
+SITE_CONTENT = os.path.join(_BACKEND_DIR, "content", "site-content.json")
+BOT_CACHE = os.path.join(_BACKEND_DIR, "bot_cache.json")
+BLOG_DIR = os.path.join(_BACKEND_DIR, "..", "frontend", "public", "blogs")
+QUERY_LOG = os.getenv("QUERY_LOG_PATH") or os.path.join(_BACKEND_DIR, "db", "query_log.jsonl")
+# Blog section titles that make no sense as a question on their own
+GENERIC_HEADINGS = {"conclusion", "introduction", "summary", "key highlights", "overview", "references"}
+
+
+# ── Candidate questions ───────────────────────────────────────────────────────
+
+
+def site_questions(content: dict) -> list:
+    """Questions a visitor is likely to ask about the site content."""
+    about = content.get("about", {})
+    name = about.get("name", "Akhil")
+    first = name.split()[0]
+    questions = [
+        f"Who is {first}",
+        f"Tell me about {name}",
+        f"What does {first} do",
+        f"What is {first}'s current role",
+        f"What is {first}'s experience",
+        f"What is {first}'s education",
+        f"What publications has {first} written",
+        f"What blogs has {first} written",
+        f"How can I contact {first}",
+    ]
+    if about.get("skills"):
+        questions.append(f"What are {first}'s skills")
+    questions += [f"Does {first} have experience with {skill}" for skill in about.get("skills", [])]
+    for item in content.get("education", []):
+        if item.get("school"):
+            questions.append(f"What did {first} study at {item['school']}")
+    for publication in content.get("publications", []):
+        if publication.get("title"):
+            questions.append(f"What is the paper \"{publication['title']}\" about")
+    for blog in content.get("blogs", []):
+        if blog.get("title"):
+            questions.append(f"What is the blog post \"{blog['title']}\" about")
+    return questions
+
+
+def heading_questions(documents, first_name: str = "Akhil") -> list:
+    """One question per distinct blog section heading (Header 2/3), numbering stripped."""
+    headings = []
+    for document in documents:
+        for key in ("Header 2", "Header 3"):
+            heading = re.sub(r"^\d+\.\s*", "", document.metadata.get(key, "")).strip()
+            if heading and heading.lower() not in GENERIC_HEADINGS and heading not in headings:
+                headings.append(heading)
+    return [f"What does {first_name}'s blog say about {heading}" for heading in headings]
+
+
+def frequent_questions(questions, top: int) -> list:
+    """The `top` most asked questions, counting paraphrases with the same normalised text together."""
+    counts, phrasings = Counter(), {}
+    for question in questions:
+        key = normalize_question(question)
+        if not key:
+            continue
+        counts[key] += 1
+        phrasings.setdefault(key, Counter())[question.strip()] += 1
+    return [phrasings[key].most_common(1)[0][0] for key, _ in counts.most_common(top)]
+
+
+def split_log(entries: list, holdout: float) -> tuple:
+    """(older questions for candidate selection, most recent `holdout` share for replay)."""
+    questions = [question for _, question in entries]
+    cut = len(questions) - int(len(questions) * holdout)
+    return questions[:cut], questions[cut:]
+
+
+def unique_questions(*groups) -> list:
+    seen, questions = set(), []
+    for group in groups:
+        for question in group:
+            key = normalize_question(question)
+            if key and key not in seen:
+                seen.add(key)
+                questions.append(question)
+    return questions
+
+
+# ── bot_cache.json ────────────────────────────────────────────────────────────
+
+
+def load_bot_cache(path: str) -> dict:
+    """{question: reply} from the legacy bot_cache.json format ({'{"input": question}': reply})."""
+    try:
+        with open(path, "r", encoding="utf-8") as f:
+            legacy = json.load(f)
+    except FileNotFoundError:
+        return {}
+    return {json.loads(key)["input"]: reply for key, reply in legacy.items()}
+
+
+def save_bot_cache(path: str, answers: dict) -> None:
+    tmp = f"{path}.tmp"
+    with open(tmp, "w", encoding="utf-8") as f:
+        json.dump({json.dumps({"input": question}): reply for question, reply in answers.items()}, f)
+    os.replace(tmp, path)
+
+
+# ── Answering ─────────────────────────────────────────────────────────────────
+
+
+class Pacer:
+    """Spaces calls out with a token bucket (e.g. "30/60") shared by all worker threads."""
+
+    def __init__(self, spec: str, clock=time.monotonic, sleep=time.sleep) -> None:
+        self.policy = RateLimitPolicy.parse("prewarm", spec, "token_bucket")
+        self._clock = clock
+        self._sleep = sleep
+        self._lock = threading.Lock()
+        self._state = None
+        self._paused_until = 0.0
+
+    def wait(self) -> None:
+        while True:
+            with self._lock:
+                now = self._clock()
+                delay = self._paused_until - now
+                if delay <= 0:
+                    allowed, delay, self._state = self.policy.step(self._state, now)
+                    if allowed:
+                        return
+            self._sleep(delay)
+
+    def backoff(self, seconds: float) -> None:
+        """Hold every thread for `seconds`, after the LLM provider reported a rate limit."""
+        with self._lock:
+            self._paused_until = max(self._paused_until, self._clock() + seconds)
+
+
+def is_rate_limited(error: BaseException) -> bool:
+    """Whether `error`, or an error it was raised from (e.g. through the LLM router), is an HTTP 429."""
+    seen = set()
+    while error is not None and id(error) not in seen:
+        seen.add(id(error))
+        status = getattr(error, "status_code", None) or getattr(getattr(error, "response", None), "status_code", None)
+        if status == 429 or "rate limit" in str(error).lower():
+            return True
+        error = error.__cause__ or error.__context__
+    return False
+
+
+def answer_all(chatbot, questions: list, concurrency: int, pacer: Pacer, max_retries: int = 3, backoff: float = 30.0):
+    """({question: reply}, {question: error message}) from chatbot.get_answer, `concurrency` at a time."""
+
+    def answer(question):
+        for attempt in range(max_retries + 1):
+            pacer.wait()
+            try:
+                return chatbot.get_answer({"input": question}, fallback=False)
+            except Exception as e:
+                if not is_rate_limited(e) or attempt == max_retries:
+                    raise
+                logger.warning(f"Rate limited on {question!r}, backing off {backoff * 2**attempt:.0f}s")
+                pacer.backoff(backoff * 2**attempt)
+
+    answers, failures = {}, {}
+    with ThreadPoolExecutor(max_workers=concurrency) as pool:
+        futures = {question: pool.submit(answer, question) for question in questions}
+        for i, (question, future) in enumerate(futures.items(), start=1):
+            try:
+                answers[question] = future.result()
+            except Exception as e:
+                logger.warning(f"Could not answer {question!r}: {e}")
+                failures[question] = str(e) or type(e).__name__
+            logger.info(f"[{i}/{len(questions)}] {question}")
+    return answers, failures
+
+
+def hit_ratio(embeddings, answers: dict, replay: list, threshold: float) -> float:
+    """Share of the `replay` questions an answer cache holding `answers` would have served."""
+    if not replay:
+        return 0.0
+    cache = SemanticCache(embeddings, store=MemoryCacheStore(), threshold=threshold, max_size=max(1, len(answers)))
+    cache.load(answers.items())
+    return round(sum(answer is not None for answer in cache.get_many(replay)) / len(replay), 4)
+
+
+# ── Job ───────────────────────────────────────────────────────────────────────
+
+
+def run(args, chatbot=None) -> dict:
+    start = time.perf_counter()
+    with open(args.site_content, "r", encoding="utf-8") as f:
+        content = json.load(f)
+    first_name = content.get("about", {}).get("name", "Akhil").split()[0]
+    documents = html_chunker.iter_html_chunks(html_chunker.html_files(args.blogs), workers=1)
+    history, replay = split_log(QueryLog(args.query_log).read(), args.holdout)
+    candidates = {
+        "site_content": site_questions(content),
+        "blog_headings": heading_questions(documents, first_name),
+        "query_log": frequent_questions(history, args.top),
+    }
+
+    if chatbot is None:
+        from akhilsinghrana.backend.RAG_Chat import RAGChat
+
+        chatbot = RAGChat(recreateVectorDB=False, folder=args.blogs)
+    threshold = answer_cache.CACHE_SIMILARITY_THRESHOLD
+    shipped = {} if args.refresh else load_bot_cache(args.output)
+    known = SemanticCache(chatbot.embeddings, threshold=threshold, max_size=max(1, len(shipped)))
+    known.load(shipped.items())
+    questions = unique_questions(*candidates.values())
+    cached = known.get_many(questions) if shipped else [None] * len(questions)
+    pending = [question for question, answer in zip(questions, cached) if answer is None]
+    logger.info(f"{len(questions)} candidate questions, {len(pending)} not cached yet")
+
+    answers, failures = answer_all(chatbot, pending, args.concurrency, Pacer(args.rate), args.max_retries)
+    merged = {**shipped, **answers}
+    save_bot_cache(args.output, merged)
+    if args.into_store and answers:
+        cache = answer_cache.create_answer_cache(chatbot.embeddings)
+        cache.load(answers.items())
+        cache.store.close()
+
+    report = {
+        "candidates": {source: len(group) for source, group in candidates.items()},
+        "unique_candidates": len(questions),
+        "already_cached": len(questions) - len(pending),
+        "answered": len(answers),
+        "failed": failures,
+        "cache_entries": len(merged),
+        "replay": {
+            "questions": len(replay),
+            "hit_ratio_before": hit_ratio(chatbot.embeddings, shipped, replay, threshold),
+            "hit_ratio_after": hit_ratio(chatbot.embeddings, merged, replay, threshold),
+        },
+        "seconds": round(time.perf_counter() - start, 1),
+    }
+    max_size = answer_cache.CACHE_MAX_SIZE
+    if len(merged) > max_size:
+        logger.warning(f"{len(merged)} cached answers exceed CACHE_MAX_SIZE={max_size}, some will be evicted")
+    return report
+
+
+def main_cli(argv=None) -> None:
+    parser = argparse.ArgumentParser(description="Pre-warm the chat answer cache (JSON report on stdout).")
+    parser.add_argument("--site-content", default=SITE_CONTENT)
+    parser.add_argument("--blogs", default=BLOG_DIR, help="Folder of blog HTML files")
+    parser.add_argument("--query-log", default=QUERY_LOG)
+    parser.add_argument("--top", type=int, default=100, help="Most frequent logged questions to answer")
+    parser.add_argument("--holdout", type=float, default=0.2, help="Most recent share of the log kept for replay")
+    parser.add_argument("--output", default=BOT_CACHE, help="bot_cache.json to merge answers into")
+    parser.add_argument("--refresh", action="store_true", help="Re-answer everything instead of keeping cached answers")
+    parser.add_argument("--into-store", action="store_true", help="Also load answers into the CACHE_BACKEND store")
+    parser.add_argument("--concurrency", type=int, default=4)
+    parser.add_argument("--rate", default=os.getenv("PREWARM_RATE", "30/60"), help="Questions per seconds, e.g. 30/60")
+    parser.add_argument("--max-retries", type=int, default=3, help="Retries per question when rate limited")
+    args = parser.parse_args(argv)
+
+    print(json.dumps(run(args), indent=2))
+
+
+if __name__ == "__main__":
+    logging.basicConfig(level=logging.INFO, stream=sys.stderr)
+    main_cli()
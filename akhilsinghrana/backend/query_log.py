@@ -0,0 +1,80 @@
+"""
+Append-only log of visitor chat questions, read by the cache pre-warming job
+(see prewarm).
+
+One JSON line per question, {"ts": unix time, "question": text}; nothing
+about the client is recorded. Past `max_bytes` the file is rotated to
+`<path>.1`, keeping one older generation, so the log needs no cleanup.
+Several uvicorn workers may append to the same file: each line is a single
+write to a file opened for appending, and a worker notices another one's
+rotation and reopens the new file.
+"""
+import os
+import json
+import time
+import logging
+import threading
+
+logger = logging.getLogger(__name__)
+
+
+class QueryLog:
+    def __init__(self, path: str, max_bytes: int = 10 * 2**20) -> None:
+        self.path = path
+        self.max_bytes = max_bytes
+        self._lock = threading.Lock()
+        self._file = None
+
+    def append(self, question: str) -> None:
+        """Record one question; failures are logged, never raised, so chat is not affected."""
+        line = json.dumps({"ts": round(time.time(), 3), "question": question}, ensure_ascii=False) + "\n"
+        try:
+            with self._lock:
+                f = self._open()
+                f.write(line)
+                f.flush()
+                if f.tell() > self.max_bytes:
+                    self._rotate()
+        except OSError as e:
+            logger.warning(f"Could not write query log {self.path}: {e}")
+
+    def read(self) -> list:
+        """(timestamp, question) pairs, oldest first, across the rotated and current files."""
+        entries = []
+        for path in (f"{self.path}.1", self.path):
+            try:
+                with open(path, "r", encoding="utf-8") as f:
+                    for line in f:
+                        try:
+                            record = json.loads(line)
+                            entries.append((float(record["ts"]), str(record["question"])))
+                        except (ValueError, KeyError, TypeError):
+                            continue  # a torn or foreign line
+            except FileNotFoundError:
+                continue
+        entries.sort(key=lambda entry: entry[0])
+        return entries
+
+    def close(self) -> None:
+        with self._lock:
+            if self._file is not None:
+                self._file.close()
+                self._file = None
+
+    def _open(self):
+        if self._file is not None:
+            try:
+                rotated = os.stat(self.path).st_ino != os.fstat(self._file.fileno()).st_ino
+            except FileNotFoundError:
+                rotated = True
+            if not rotated:
+                return self._file
+            self._file.close()
+        os.makedirs(os.path.dirname(self.path) or ".", exist_ok=True)
+        self._file = open(self.path, "a", encoding="utf-8")
+        return self._file
+
+    def _rotate(self) -> None:
+        self._file.close()
+        self._file = None
+        os.replace(self.path, f"{self.path}.1")
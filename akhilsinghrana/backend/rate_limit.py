@@ -0,0 +1,258 @@
+"""
+Per-client rate limiting with O(1) state per key.
+
+Two algorithms, both keeping three floats per client instead of a list of
+timestamps:
+
+- "sliding_window": counts in the current and previous fixed window, with
+  the previous one weighted by how much of it still overlaps the sliding
+  window. A close approximation of a true sliding log, without the log.
+- "token_bucket": a bucket of `limit` tokens refilled at limit/window per
+  second. Allows bursts up to `limit` after a quiet period.
+
+State lives in a RateLimitStore: MemoryRateLimitStore for a single process,
+or SQLiteRateLimitStore so every uvicorn worker on the host shares one set
+of counters. Both drop keys that have been idle long enough that their
+state would have reset anyway.
+"""
+import math
+import time
+import asyncio
+import logging
+import sqlite3
+import threading
+from collections import OrderedDict
+
+from fastapi import HTTPException, Request
+
+from akhilsinghrana.backend import metrics
+
+logger = logging.getLogger(__name__)
+
+ALGORITHMS = ("sliding_window", "token_bucket")
+
+
+class RateLimitPolicy:
+    """`limit` requests per `window` seconds, counted per client under `name`."""
+
+    def __init__(self, name: str, limit: int, window: float, algorithm: str = "sliding_window") -> None:
+        if algorithm not in ALGORITHMS:
+            raise ValueError(f"algorithm must be one of {ALGORITHMS}, got {algorithm!r}")
+        if limit < 1 or window <= 0:
+            raise ValueError(f"Invalid rate limit {limit}/{window}s for {name!r}")
+        self.name = name
+        self.limit = limit
+        self.window = window
+        self.algorithm = algorithm
+
+    @classmethod
+    def parse(cls, name: str, spec: str, algorithm: str = "sliding_window") -> "RateLimitPolicy":
+        """Build a policy from "<limit>/<seconds>", e.g. "20/60"."""
+        try:
+            limit, window = spec.split("/")
+            return cls(name, int(limit), float(window), algorithm)
+        except ValueError as e:
+            raise ValueError(f"Rate limit for {name!r} must look like '20/60', got {spec!r}") from e
+
+    def step(self, state, now: float):
+        """
+        Apply one request to `state` (None for a new client).
+        Returns (allowed, retry_after seconds, new state).
+        """
+        if self.algorithm == "token_bucket":
+            return self._token_bucket(state, now)
+        return self._sliding_window(state, now)
+
+    def idle_after(self) -> float:
+        """Seconds of inactivity after which a client's state is indistinguishable from new."""
+        return 2 * self.window
+
+    def _sliding_window(self, state, now):
+        window_start = now - now % self.window
+        if state is None:
+            current, previous = 0.0, 0.0
+        else:
+            start, current, previous = state
+            if window_start - start >= 2 * self.window:
+                current, previous = 0.0, 0.0
+            elif window_start != start:
+                current, previous = 0.0, current
+        overlap = 1 - (now - window_start) / self.window
+        if previous * overlap + current + 1 > self.limit:
+            # Wait until enough of the previous window has slid out (or the next window starts)
+            if previous:
+                needed = (previous * overlap + current + 1 - self.limit) / previous * self.window
+                retry_after = min(needed, window_start + self.window - now)
+            else:
+                retry_after = window_start + self.window - now
+            return False, retry_after, (window_start, current, previous)
+        return True, 0.0, (window_start, current + 1, previous)
+
+    def _token_bucket(self, state, now):
+        rate = self.limit / self.window
+        if state is None:
+            tokens = float(self.limit)
+        else:
+            tokens, last, _ = state
+            tokens = min(float(self.limit), tokens + (now - last) * rate)
+        if tokens < 1:
+            return False, (1 - tokens) / rate, (tokens, now, 0.0)
+        return True, 0.0, (tokens - 1, now, 0.0)
+
+
+class RateLimitStore:
+    """Holds per-key algorithm state and applies a policy step atomically."""
+
+    # True if hit() may block on I/O and should run off the event loop
+    blocking = False
+
+    def hit(self, key: str, policy: RateLimitPolicy, now: float = None):
+        """Count one request for `key`; returns (allowed, retry_after seconds)."""
+        raise NotImplementedError
+
+    def __len__(self) -> int:
+        raise NotImplementedError
+
+    def close(self) -> None:
+        pass
+
+
+class MemoryRateLimitStore(RateLimitStore):
+    """
+    Process-local store. Keys are kept in least-recently-used order; idle
+    ones are swept every `sweep_interval` seconds and at most `max_keys` are
+    held, so a scan from many addresses cannot grow memory without bound.
+    """
+
+    def __init__(self, max_keys: int = 100_000, sweep_interval: float = 60.0) -> None:
+        self.max_keys = max_keys
+        self.sweep_interval = sweep_interval
+        self._lock = threading.Lock()
+        self._entries: OrderedDict = OrderedDict()  # key -> (state, expires)
+        self._last_sweep = 0.0
+
+    def hit(self, key, policy, now=None):
+        now = time.time() if now is None else now
+        with self._lock:
+            entry = self._entries.pop(key, None)
+            state = entry[0] if entry and entry[1] > now else None
+            allowed, retry_after, state = policy.step(state, now)
+            self._entries[key] = (state, now + policy.idle_after())
+            if len(self._entries) > self.max_keys:
+                self._entries.popitem(last=False)
+            if now - self._last_sweep >= self.sweep_interval:
+                self._sweep(now)
+        return allowed, retry_after
+
+    def _sweep(self, now: float) -> None:
+        self._last_sweep = now
+        expired = [key for key, (_, expires) in self._entries.items() if expires <= now]
+        for key in expired:
+            del self._entries[key]
+
+    def __len__(self):
+        return len(self._entries)
+
+
+class SQLiteRateLimitStore(RateLimitStore):
+    """
+    SQLite (WAL mode) store shared by every worker on the host. Each hit is
+    one BEGIN IMMEDIATE read-modify-write transaction, so concurrent workers
+    never double-spend a slot. Expired rows are deleted every `sweep_interval`
+    seconds.
+    """
+
+    blocking = True
+
+    def __init__(self, path: str, sweep_interval: float = 60.0) -> None:
+        self.path = path
+        self.sweep_interval = sweep_interval
+        self._local = threading.local()
+        self._last_sweep = 0.0
+        self._connect().execute(
+            """CREATE TABLE IF NOT EXISTS rate_limits (
+                key TEXT PRIMARY KEY,
+                a REAL NOT NULL,
+                b REAL NOT NULL,
+                c REAL NOT NULL,
+                expires REAL NOT NULL
+            )"""
+        )
+
+    def _connect(self) -> sqlite3.Connection:
+        conn = getattr(self._local, "conn", None)
+        if conn is None:
+            # Autocommit mode: transactions are opened explicitly with BEGIN IMMEDIATE
+            conn = sqlite3.connect(self.path, timeout=10, isolation_level=None)
+            conn.execute("PRAGMA journal_mode=WAL")
+            conn.execute("PRAGMA synchronous=NORMAL")
+            self._local.conn = conn
+        return conn
+
+    def hit(self, key, policy, now=None):
+        now = time.time() if now is None else now
+        conn = self._connect()
+        try:
+            conn.execute("BEGIN IMMEDIATE")
+            try:
+                row = conn.execute("SELECT a, b, c, expires FROM rate_limits WHERE key = ?", (key,)).fetchone()
+                state = row[:3] if row and row[3] > now else None
+                allowed, retry_after, state = policy.step(state, now)
+                conn.execute(
+                    "INSERT OR REPLACE INTO rate_limits (key, a, b, c, expires) VALUES (?, ?, ?, ?, ?)",
+                    (key, *state, now + policy.idle_after()),
+                )
+                if now - self._last_sweep >= self.sweep_interval:
+                    self._last_sweep = now
+                    conn.execute("DELETE FROM rate_limits WHERE expires <= ?", (now,))
+                conn.execute("COMMIT")
+            except BaseException:
+                conn.execute("ROLLBACK")
+                raise
+        except sqlite3.Error as e:
+            # Fail open: a locked or broken limiter must not take the site down
+            logger.warning(f"Rate limit check failed, allowing request: {e}")
+            return True, 0.0
+        return allowed, retry_after
+
+    def __len__(self):
+        return self._connect().execute("SELECT COUNT(*) FROM rate_limits").fetchone()[0]
+
+    def close(self):
+        conn = getattr(self._local, "conn", None)
+        if conn is not None:
+            conn.close()
+            self._local.conn = None
+
+
+class RateLimit:
+    """
+    Enforce `policy` per client IP. Use as a route dependency
+    (`dependencies=[Depends(chat_limit)]`) or await check(request) inside a
+    handler when the limit should apply only after earlier checks pass.
+    Over the limit raises 429 with a Retry-After header.
+    """
+
+    def __init__(self, policy: RateLimitPolicy, store, detail: str = "Too many requests.") -> None:
+        self.policy = policy
+        self.detail = detail
+        # A callable is resolved per request, so the store can be swapped (e.g. in tests)
+        self._store = store if callable(store) else lambda: store
+
+    async def check(self, request: Request) -> None:
+        store = self._store()
+        key = f"{self.policy.name}:{request.client.host}"
+        if store.blocking:
+            allowed, retry_after = await asyncio.to_thread(store.hit, key, self.policy)
+        else:
+            allowed, retry_after = store.hit(key, self.policy)
+        if not allowed:
+            metrics.RATE_LIMITED.labels(policy=self.policy.name).inc()
+            raise HTTPException(
+                status_code=429,
+                detail=self.detail,
+                headers={"Retry-After": str(max(1, math.ceil(retry_after)))},
+            )
+
+    async def __call__(self, request: Request) -> None:
+        await self.check(request)
@@ -0,0 +1,274 @@
+import re
+import time
+import logging
+import threading
+import unicodedata
+from collections import OrderedDict
+
+from akhilsinghrana.backend.cache_store import CacheStore, MemoryCacheStore
+
+logger = logging.getLogger(__name__)
+
+
+def normalize_question(text: str) -> str:
+    """Lower-case, strip punctuation and collapse whitespace: "Who is Akhil?" -> "who is akhil"."""
+    text = unicodedata.normalize("NFKC", text).lower()
+    text = re.sub(r"[^\w\s]", " ", text)
+    return " ".join(text.split())
+
+
+class SemanticCache:
+    """
+    Chat answer cache keyed by question meaning rather than exact text.
+
+    Questions are keyed by their normalised text but embedded as asked, which
+    is the same query vector the retriever needs, so an embedding cache serves
+    both. A lookup returns the stored answer of the nearest cached question
+    when their cosine similarity is at least `threshold`; exact normalised
+    matches skip the embedding call entirely.
+    The cache holds at most `max_size` entries (least recently used evicted
+    first) and entries older than `ttl` seconds are dropped on access.
+
+    Only keys and vectors are held in memory; answers are read from `store` on
+    a hit. Records written by other processes sharing the store are picked up
+    on exact-key lookups straight away and by the similarity index every
+    `sync_interval` seconds.
+
+    FAISS and NumPy are imported on first use, so importing the app module
+    doesn't pay for them before uvicorn binds the port.
+    """
+
+    def __init__(
+        self,
+        embeddings,
+        store: CacheStore = None,
+        threshold: float = 0.92,
+        max_size: int = 256,
+        ttl: float = None,
+        sync_interval: float = 30.0,
+    ) -> None:
+        self.embeddings = embeddings
+        self.store = store if store is not None else MemoryCacheStore()
+        self.threshold = threshold
+        self.max_size = max_size
+        self.ttl = ttl
+        self.sync_interval = sync_interval
+        self.hits = 0
+        self.misses = 0
+
+        self._lock = threading.RLock()
+        self._entries: OrderedDict = OrderedDict()  # id -> {"key", "created", "has_vector"}, LRU order
+        self._ids_by_key: dict = {}  # normalised question -> id
+        self._index = None  # faiss.IndexIDMap2 over unit vectors, created on first insert
+        self._next_id = 0
+        self._store_cursor = 0
+        self._last_sync = 0.0
+
+    # ── Lookup ────────────────────────────────────────────────────────────────
+
+    def get(self, question: str):
+        """Return the cached answer for `question` (or a close paraphrase), else None."""
+        answer = self._get_exact(normalize_question(question))
+        if answer is not None:
+            return answer
+        return self._get_nearest(self._embed_query(question))
+
+    async def aget(self, question: str):
+        """Async counterpart of get — the embedding call doesn't block the event loop."""
+        answer = self._get_exact(normalize_question(question))
+        if answer is not None:
+            return answer
+        return self._get_nearest(await self._aembed_query(question))
+
+    def get_many(self, questions: list) -> list:
+        """Answers (None for misses) for many questions, embedding those without an exact match in one call."""
+        answers = [self._get_exact(normalize_question(question)) for question in questions]
+        missing = [i for i, answer in enumerate(answers) if answer is None]
+        if missing:
+            vectors = self._embed_documents([questions[i] for i in missing])
+            for i, vector in zip(missing, vectors):
+                answers[i] = self._get_nearest(vector)
+        return answers
+
+    def _get_exact(self, key: str):
+        with self._lock:
+            self._maybe_sync()
+            entry_id = self._ids_by_key.get(key)
+            if entry_id is not None:
+                return self._hit(entry_id)
+            # Another worker may have answered this question since our last sync
+            record = self.store.get(key)
+            if record is None or self._is_stale(record["created"]):
+                return None
+            entry_id = self._add_entry(key, record["vector"], record["created"])
+            return self._hit(entry_id, record)
+
+    def _get_nearest(self, vector):
+        with self._lock:
+            if vector is not None and self._index is not None and self._index.ntotal:
+                similarities, ids = self._index.search(vector.reshape(1, -1), min(4, self._index.ntotal))
+                for similarity, entry_id in zip(similarities[0], ids[0]):
+                    if entry_id < 0 or similarity < self.threshold:
+                        break
+                    answer = self._hit(int(entry_id))
+                    if answer is not None:
+                        return answer
+            self.misses += 1
+            return None
+
+    def _hit(self, entry_id: int, record: dict = None):
+        entry = self._entries[entry_id]
+        if record is None:
+            record = self.store.get(entry["key"])
+        if record is None or self._is_stale(entry["created"]):
+            self._remove(entry_id, delete_from_store=record is not None)
+            return None
+        self.hits += 1
+        self._entries.move_to_end(entry_id)
+        return record["answer"]
+
+    # ── Insert ────────────────────────────────────────────────────────────────
+
+    def put(self, question: str, answer: dict) -> None:
+        self._insert(question, answer, self._embed_query(question))
+
+    async def aput(self, question: str, answer: dict) -> None:
+        self._insert(question, answer, await self._aembed_query(question))
+
+    def load(self, items) -> None:
+        """Bulk-insert (question, answer) pairs, embedding all questions in a single call."""
+        items = list(items)
+        if not items:
+            return
+        vectors = self._embed_documents([question for question, _ in items])
+        for (question, answer), vector in zip(items, vectors):
+            self._insert(question, answer, vector)
+
+    def _insert(self, question: str, answer: dict, vector) -> None:
+        key = normalize_question(question)
+        created = time.time()
+        with self._lock:
+            self.store.put(key, question, answer, vector, created)
+            self._add_entry(key, vector, created)
+
+    def _add_entry(self, key: str, vector, created: float) -> int:
+        import faiss
+        import numpy as np
+
+        if key in self._ids_by_key:
+            self._remove(self._ids_by_key[key], delete_from_store=False)
+        while len(self._entries) >= self.max_size:
+            self._remove(next(iter(self._entries)))
+
+        entry_id = self._next_id
+        self._next_id += 1
+        self._entries[entry_id] = {"key": key, "created": created, "has_vector": vector is not None}
+        self._ids_by_key[key] = entry_id
+        if vector is not None:
+            vector = np.asarray(vector, dtype=np.float32)
+            if self._index is None:
+                self._index = faiss.IndexIDMap2(faiss.IndexFlatIP(vector.shape[0]))
+            self._index.add_with_ids(vector.reshape(1, -1), np.array([entry_id], dtype=np.int64))
+        return entry_id
+
+    # ── Store sync ────────────────────────────────────────────────────────────
+
+    def warm(self) -> None:
+        """
+        Build the in-memory index from the store. Records persisted without a
+        vector (e.g. seeded from the legacy bot_cache.json) are embedded in one
+        batch and written back.
+        """
+        with self._lock:
+            self._sync()
+            keys = [entry["key"] for entry in self._entries.values() if not entry["has_vector"]]
+            records = [(key, self.store.get(key)) for key in keys]
+            records = [(key, record) for key, record in records if record is not None]
+        if not records:
+            return
+        vectors = self._embed_documents([record["question"] for _, record in records])
+        with self._lock:
+            for (key, record), vector in zip(records, vectors):
+                if vector is None:
+                    continue
+                self.store.put(key, record["question"], record["answer"], vector, record["created"])
+                self._add_entry(key, vector, record["created"])
+
+    def _maybe_sync(self) -> None:
+        if time.time() - self._last_sync >= self.sync_interval:
+            self._sync()
+
+    def _sync(self) -> None:
+        self._last_sync = time.time()
+        self._store_cursor, rows = self.store.vectors(self._store_cursor)
+        for key, vector, created in sorted(rows, key=lambda row: row[2]):
+            if not self._is_stale(created):
+                self._add_entry(key, vector, created)
+
+    # ── Eviction ──────────────────────────────────────────────────────────────
+
+    def _is_stale(self, created: float) -> bool:
+        return self.ttl is not None and time.time() - created > self.ttl
+
+    def _remove(self, entry_id: int, delete_from_store: bool = True) -> None:
+        import numpy as np
+
+        entry = self._entries.pop(entry_id)
+        self._ids_by_key.pop(entry["key"], None)
+        if self._index is not None:
+            self._index.remove_ids(np.array([entry_id], dtype=np.int64))
+        if delete_from_store:
+            self.store.delete(entry["key"])
+
+    # ── Introspection ─────────────────────────────────────────────────────────
+
+    def items(self):
+        """(question, answer) pairs from least to most recently used."""
+        with self._lock:
+            records = [self.store.get(entry["key"]) for entry in self._entries.values()]
+        return [(r["question"], r["answer"]) for r in records if r is not None]
+
+    def stats(self) -> dict:
+        with self._lock:
+            lookups = self.hits + self.misses
+            return {
+                "size": len(self._entries),
+                "hits": self.hits,
+                "misses": self.misses,
+                "hit_ratio": self.hits / lookups if lookups else 0.0,
+            }
+
+    def __len__(self) -> int:
+        return len(self._entries)
+
+    # ── Embedding ─────────────────────────────────────────────────────────────
+
+    def _embed_query(self, question: str):
+        try:
+            return self._unit([self.embeddings.embed_query(question)])[0]
+        except Exception as e:
+            logger.warning(f"Could not embed question for semantic cache: {e}")
+            return None
+
+    async def _aembed_query(self, question: str):
+        try:
+            return self._unit([await self.embeddings.aembed_query(question)])[0]
+        except Exception as e:
+            logger.warning(f"Could not embed question for semantic cache: {e}")
+            return None
+
+    def _embed_documents(self, questions: list) -> list:
+        try:
+            return list(self._unit(self.embeddings.embed_documents(questions)))
+        except Exception as e:
+            logger.warning(f"Could not embed cached questions ({e}) — only exact matches will hit")
+            return [None] * len(questions)
+
+    @staticmethod
+    def _unit(vectors):
+        import faiss
+        import numpy as np
+
+        vectors = np.asarray(vectors, dtype=np.float32)
+        faiss.normalize_L2(vectors)
+        return vectors
@@ -0,0 +1,44 @@
+import asyncio
+
+
+class SingleFlight:
+    """
+    Coalesce concurrent async calls that share a key into one execution.
+
+    The first caller for a key starts `fn()` as a task; callers arriving while
+    it runs await the same task and receive the same result or exception.
+    The task is shielded, so a caller that disconnects does not cancel the
+    work for everyone else. Once it finishes, the next call starts afresh.
+    """
+
+    def __init__(self) -> None:
+        self._inflight: dict = {}
+
+    async def do(self, key, fn):
+        task, _ = self.start(key, fn)
+        return await asyncio.shield(task)
+
+    def start(self, key, fn):
+        """
+        Start `fn()` for `key` unless a call is already running, without
+        waiting for it. Returns (task, True if this call started it).
+        """
+        task = self._inflight.get(key)
+        if task is not None:
+            return task, False
+        task = asyncio.ensure_future(fn())
+        self._inflight[key] = task
+        task.add_done_callback(lambda done: self._forget(key, done))
+        return task, True
+
+    def running(self, key) -> bool:
+        return key in self._inflight
+
+    def _forget(self, key, task) -> None:
+        if self._inflight.get(key) is task:
+            del self._inflight[key]
+        if not task.cancelled():
+            task.exception()  # mark retrieved even if every waiter went away
+
+    def __len__(self) -> int:
+        return len(self._inflight)
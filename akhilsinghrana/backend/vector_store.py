@@ -0,0 +1,383 @@
+"""
+Memory-mapped, pickle-free vector store.
+
+A store is a directory holding:
+
+    index.faiss   FAISS index over the float32 vectors: "flat" (exact),
+                  "hnsw" (graph) or "ivfpq" (compressed, exactly re-ranked)
+    docs.bin      one compact JSON record per chunk (id, text, metadata)
+    docs.idx      little-endian uint64 offsets of the records in docs.bin
+    meta.json     format version, dimension, count, index type, search
+                  parameters and a fingerprint of the FAISS index it was
+                  converted from
+
+The index's vector storage and both document files are memory-mapped on
+load, so every uvicorn worker shares one copy in the page cache and startup
+does not read the corpus. Row i of the index is record i, so fetching a hit
+is two offset reads and a JSON decode of that record alone. Distances are
+squared L2 like the LangChain FAISS store, so relevance scores (and the
+relevance thresholds tuned on them) carry over unchanged.
+
+Convert the existing index with:
+
+    python -m akhilsinghrana.backend.vector_store --index hnsw
+
+or let RAGChat do it on startup (open_or_build): a store whose fingerprint
+no longer matches db/faiss_db is rebuilt, by one worker at a time.
+"""
+import os
+import json
+import math
+import mmap
+import fcntl
+import shutil
+import hashlib
+import logging
+import argparse
+import tempfile
+import contextlib
+
+import numpy as np
+from langchain_core.documents import Document
+from langchain_core.vectorstores import VectorStore
+
+logger = logging.getLogger(__name__)
+
+FORMAT_VERSION = 1
+INDEX_TYPES = ("flat", "hnsw", "ivfpq")
+_BACKEND_DIR = os.path.dirname(__file__)
+
+
+def _faiss():
+    import faiss
+
+    return faiss
+
+
+def _read_flags(faiss) -> int:
+    # IO_FLAG_MMAP_IFC (faiss >= 1.10) maps the stored vectors instead of copying them into each process
+    mmap_flag = getattr(faiss, "IO_FLAG_MMAP_IFC", None)
+    if mmap_flag is None:
+        logger.warning(f"faiss {faiss.__version__} cannot memory-map index storage; loading it into memory")
+        mmap_flag = 0
+    return mmap_flag | faiss.IO_FLAG_READ_ONLY
+
+
+def faiss_fingerprint(directory: str) -> str:
+    """Content hash of the LangChain FAISS index saved in `directory`, or None if there is none."""
+    digest = hashlib.sha256()
+    found = False
+    for name in ("index.faiss", "index.pkl"):
+        path = os.path.join(directory, name)
+        if not os.path.exists(path):
+            continue
+        found = True
+        digest.update(name.encode("utf-8"))
+        with open(path, "rb") as f:
+            for block in iter(lambda: f.read(1 << 20), b""):
+                digest.update(block)
+    return digest.hexdigest() if found else None
+
+
+@contextlib.contextmanager
+def _build_lock(directory: str):
+    """Hold an exclusive flock on `{directory}.lock`, so workers build or swap one store at a time."""
+    parent = os.path.dirname(os.path.abspath(directory))
+    os.makedirs(parent, exist_ok=True)
+    with open(f"{directory}.lock", "a") as f:
+        fcntl.flock(f.fileno(), fcntl.LOCK_EX)
+        try:
+            yield
+        finally:
+            fcntl.flock(f.fileno(), fcntl.LOCK_UN)
+
+
+def euclidean_relevance(distance: float) -> float:
+    """Relevance in 0..1 for a squared L2 distance; the LangChain FAISS store's default mapping."""
+    return 1.0 - distance / math.sqrt(2)
+
+
+def _pq_subquantizers(dim: int) -> int:
+    """Largest divisor of dim giving sub-vectors of at least 8 dimensions, capped at 64."""
+    return max(m for m in range(1, min(64, dim // 8 or 1) + 1) if dim % m == 0)
+
+
+class MMapVectorStore(VectorStore):
+    """
+    Read-only vector store in the format described above. Build one with
+    build() or from_faiss() and open it with load(); it answers the
+    VectorStore search API (and so RAGChat.as_retriever) and batched
+    searches via similarity_search_with_score_by_vectors().
+    """
+
+    def __init__(self, directory: str, embedding, index, meta: dict) -> None:
+        self.directory = directory
+        self.embedding = embedding
+        self.index = index
+        self.meta = meta
+        self._offsets = np.memmap(os.path.join(directory, "docs.idx"), dtype="<u8", mode="r")
+        with open(os.path.join(directory, "docs.bin"), "rb") as f:
+            self._records = mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ)
+
+    @property
+    def embeddings(self):
+        return self.embedding
+
+    def __len__(self) -> int:
+        return self.meta["count"]
+
+    # ── Building and loading ──────────────────────────────────────────────────
+
+    @classmethod
+    def load(cls, directory: str, embedding=None) -> "MMapVectorStore":
+        with open(os.path.join(directory, "meta.json"), "r", encoding="utf-8") as f:
+            meta = json.load(f)
+        if meta.get("version") != FORMAT_VERSION:
+            raise ValueError(f"Unsupported vector store format {meta.get('version')!r} in {directory}")
+        faiss = _faiss()
+        index = faiss.read_index(os.path.join(directory, "index.faiss"), _read_flags(faiss))
+        params = meta["params"]
+        if meta["index"] == "hnsw":
+            index.hnsw.efSearch = params["ef_search"]
+        elif meta["index"] == "ivfpq":
+            index.k_factor = params["k_factor"]
+            faiss.extract_index_ivf(index.base_index).nprobe = params["nprobe"]
+        return cls(directory, embedding, index, meta)
+
+    @classmethod
+    def open_or_build(
+        cls, directory: str, source_directory: str, load_source, embedding=None, index: str = "flat"
+    ) -> "MMapVectorStore":
+        """
+        Load the store in `directory` if it was converted from the FAISS
+        index in `source_directory` as it is now, with `index`; otherwise
+        convert `load_source()` (that index, loaded) into it. Concurrent
+        callers hold a lock while checking, so one builds and the rest load
+        its result.
+        """
+        source = faiss_fingerprint(source_directory)
+        with _build_lock(directory):
+            try:
+                with open(os.path.join(directory, "meta.json"), "r", encoding="utf-8") as f:
+                    meta = json.load(f)
+            except (OSError, ValueError):
+                meta = {}
+            if meta.get("source") == source and meta.get("index") == index and meta.get("version") == FORMAT_VERSION:
+                return cls.load(directory, embedding)
+            logger.info(f"{directory} does not match {source_directory}, rebuilding it")
+            return cls.from_faiss(load_source(), directory, index=index, source=source)
+
+    @classmethod
+    def build(
+        cls,
+        directory: str,
+        vectors,
+        documents,
+        embedding=None,
+        index: str = "flat",
+        normalize_L2: bool = False,
+        source: str = None,
+        **params,
+    ) -> "MMapVectorStore":
+        """
+        Write `vectors` (n x dim) and their `documents` to `directory`,
+        replacing any store there, and load the result. `source` is recorded
+        in meta.json to identify what the store was built from. Processes
+        that may build the same store at once go through open_or_build, which
+        serialises them.
+
+        params: hnsw_m, ef_construction, ef_search for "hnsw"; nlist, m
+        (sub-quantizers), nbits, nprobe, k_factor (candidates re-ranked per
+        hit) for "ivfpq". Defaults suit corpora of 10k-1M chunks.
+        """
+        if index not in INDEX_TYPES:
+            raise ValueError(f"Unknown index type {index!r}, expected one of {INDEX_TYPES}")
+        vectors = np.ascontiguousarray(vectors, dtype=np.float32)
+        documents = list(documents)
+        if vectors.ndim != 2 or not len(vectors) or len(vectors) != len(documents):
+            raise ValueError(f"Need one vector per document, got {vectors.shape} vectors for {len(documents)} documents")
+        faiss = _faiss()
+        if normalize_L2:
+            vectors = vectors.copy()
+            faiss.normalize_L2(vectors)
+
+        count, dim = vectors.shape
+        faiss_index, params = cls._create_index(faiss, index, vectors, params)
+
+        # A unique staging directory next to the target, so concurrent builds never write into each other's files
+        parent, name = os.path.split(os.path.abspath(directory))
+        os.makedirs(parent, exist_ok=True)
+        tmp_dir = tempfile.mkdtemp(prefix=f"{name}.", suffix=".tmp", dir=parent)
+        try:
+            os.chmod(tmp_dir, 0o755)  # mkdtemp's 0700 would outlive the rename
+            faiss.write_index(faiss_index, os.path.join(tmp_dir, "index.faiss"))
+            offsets = [0]
+            with open(os.path.join(tmp_dir, "docs.bin"), "wb") as f:
+                for document in documents:
+                    record = {"id": document.id, "text": document.page_content, "metadata": document.metadata}
+                    offsets.append(offsets[-1] + f.write(json.dumps(record, separators=(",", ":")).encode("utf-8")))
+            np.asarray(offsets, dtype="<u8").tofile(os.path.join(tmp_dir, "docs.idx"))
+            meta = {
+                "version": FORMAT_VERSION,
+                "dim": dim,
+                "count": count,
+                "index": index,
+                "normalize_L2": normalize_L2,
+                "params": params,
+                "source": source,
+            }
+            with open(os.path.join(tmp_dir, "meta.json"), "w", encoding="utf-8") as f:
+                json.dump(meta, f, indent=2)
+        except BaseException:
+            shutil.rmtree(tmp_dir, ignore_errors=True)
+            raise
+
+        # Swap directories so a concurrently starting worker never sees a half-written store
+        old_dir = None
+        if os.path.exists(directory):
+            old_dir = tempfile.mkdtemp(prefix=f"{name}.", suffix=".old", dir=parent)
+            os.replace(directory, old_dir)
+        os.replace(tmp_dir, directory)
+        if old_dir:
+            shutil.rmtree(old_dir, ignore_errors=True)
+        logger.info(f"Wrote {index} vector store with {count} chunks to {directory}")
+        return cls.load(directory, embedding)
+
+    @staticmethod
+    def _create_index(faiss, index: str, vectors, params: dict):
+        count, dim = vectors.shape
+        if index == "flat":
+            faiss_index = faiss.IndexFlatL2(dim)
+            faiss_index.add(vectors)
+            return faiss_index, {}
+
+        if index == "hnsw":
+            params = {"hnsw_m": 32, "ef_construction": 100, "ef_search": 64, **params}
+            faiss_index = faiss.IndexHNSWFlat(dim, params["hnsw_m"])
+            faiss_index.hnsw.efConstruction = params["ef_construction"]
+            faiss_index.add(vectors)
+            return faiss_index, params
+
+        # IVF-PQ finds candidates from compressed codes; IndexRefineFlat re-ranks
+        # them with exact distances from the (memory-mapped) full vectors
+        nlist = params.get("nlist") or max(1, min(int(count**0.5), count // 39))
+        # FAISS wants at least 39 training points per centroid, for the coarse and the PQ codebooks alike
+        nbits = params.get("nbits") or max(1, min(8, int(np.log2(max(2, count // 39)))))
+        params = {"nlist": nlist, "m": _pq_subquantizers(dim), "nbits": nbits, "nprobe": 16, "k_factor": 64, **params}
+        quantizer = faiss.IndexFlatL2(dim)
+        ivfpq = faiss.IndexIVFPQ(quantizer, dim, params["nlist"], params["m"], params["nbits"])
+        sample = vectors
+        if count > 64 * nlist:
+            sample = vectors[np.random.default_rng(0).choice(count, 64 * nlist, replace=False)]
+        ivfpq.train(sample)
+        faiss_index = faiss.IndexRefineFlat(ivfpq)
+        faiss_index.add(vectors)
+        return faiss_index, params
+
+    @classmethod
+    def from_faiss(
+        cls, vectorstore, directory: str, index: str = "flat", normalize_L2: bool = False, **params
+    ) -> "MMapVectorStore":
+        """
+        Convert a LangChain FAISS store (e.g. FAISS.load_local of db/faiss_db).
+
+        The store does not expose whether it normalises vectors, so pass
+        `normalize_L2` if it was created with it; db/faiss_db is not.
+        """
+        from langchain_community.vectorstores.utils import DistanceStrategy
+
+        if vectorstore.distance_strategy != DistanceStrategy.EUCLIDEAN_DISTANCE:
+            raise ValueError(f"Only Euclidean FAISS stores can be converted, not {vectorstore.distance_strategy}")
+        ntotal = vectorstore.index.ntotal
+        vectors = vectorstore.index.reconstruct_n(0, ntotal)
+        documents = []
+        for i in range(ntotal):
+            doc_id = vectorstore.index_to_docstore_id[i]
+            document = vectorstore.docstore.search(doc_id)
+            documents.append(Document(page_content=document.page_content, metadata=document.metadata, id=doc_id))
+        return cls.build(
+            directory,
+            vectors,
+            documents,
+            vectorstore.embedding_function,
+            index,
+            normalize_L2=normalize_L2,
+            **params,
+        )
+
+    @classmethod
+    def from_texts(cls, texts, embedding, metadatas=None, ids=None, directory: str = None, index="flat", **params):
+        if directory is None:
+            raise ValueError("MMapVectorStore.from_texts needs a target directory")
+        texts = list(texts)
+        metadatas = metadatas or [{} for _ in texts]
+        ids = ids or [None] * len(texts)
+        documents = [Document(page_content=t, metadata=m, id=i) for t, m, i in zip(texts, metadatas, ids)]
+        return cls.build(directory, embedding.embed_documents(texts), documents, embedding, index, **params)
+
+    def add_texts(self, texts, metadatas=None, **kwargs):
+        raise NotImplementedError("MMapVectorStore is read-only; rebuild it from the FAISS index instead")
+
+    # ── Search ────────────────────────────────────────────────────────────────
+
+    def _document(self, row: int) -> Document:
+        start, end = int(self._offsets[row]), int(self._offsets[row + 1])
+        record = json.loads(self._records[start:end])
+        return Document(page_content=record["text"], metadata=record["metadata"], id=record["id"])
+
+    def similarity_search_with_score_by_vectors(self, vectors, k: int = 4) -> list:
+        """[(document, squared L2 distance), ...] for each query vector, searched as one matrix."""
+        matrix = np.ascontiguousarray(vectors, dtype=np.float32)
+        if self.meta["normalize_L2"]:
+            matrix = matrix.copy()
+            _faiss().normalize_L2(matrix)
+        distances, rows = self.index.search(matrix, k)
+        return [
+            [(self._document(int(row)), float(distance)) for distance, row in zip(row_distances, row_ids) if row != -1]
+            for row_distances, row_ids in zip(distances, rows)
+        ]
+
+    def similarity_search_with_score_by_vector(self, embedding, k: int = 4, **kwargs) -> list:
+        return self.similarity_search_with_score_by_vectors([embedding], k)[0]
+
+    def similarity_search_with_score(self, query: str, k: int = 4, **kwargs) -> list:
+        return self.similarity_search_with_score_by_vector(self.embedding.embed_query(query), k)
+
+    def similarity_search(self, query: str, k: int = 4, **kwargs) -> list:
+        return [document for document, _ in self.similarity_search_with_score(query, k)]
+
+    def similarity_search_with_relevance_scores_by_vectors(self, vectors, k: int = 4, score_threshold: float = None):
+        """Batched similarity_search_with_relevance_scores for precomputed query vectors."""
+        relevance = self._select_relevance_score_fn()
+        results = []
+        for hits in self.similarity_search_with_score_by_vectors(vectors, k):
+            scored = [(document, relevance(distance)) for document, distance in hits]
+            if score_threshold is not None:
+                scored = [(document, score) for document, score in scored if score >= score_threshold]
+            results.append(scored)
+        return results
+
+    def _select_relevance_score_fn(self):
+        # LangChain's VectorStore hook behind similarity_search_with_relevance_scores
+        return euclidean_relevance
+
+
+def main(argv=None) -> None:
+    parser = argparse.ArgumentParser(description="Convert the FAISS index to the memory-mapped vector store format.")
+    parser.add_argument("--source", default=os.path.join(_BACKEND_DIR, "db", "faiss_db"), help="FAISS index directory")
+    parser.add_argument("--target", default=os.path.join(_BACKEND_DIR, "db", "mmap_db"), help="Output directory")
+    parser.add_argument("--index", choices=INDEX_TYPES, default="flat", help="ANN index type to build")
+    args = parser.parse_args(argv)
+
+    logging.basicConfig(level=logging.INFO)
+    from langchain_community.vectorstores import FAISS
+
+    with _build_lock(args.target):
+        # The pickled docstore is read one last time here; the output contains no pickle
+        source = FAISS.load_local(args.source, None, allow_dangerous_deserialization=True)
+        store = MMapVectorStore.from_faiss(source, args.target, index=args.index, source=faiss_fingerprint(args.source))
+    print(f"Wrote {len(store)} chunks ({args.index}) to {args.target}")
+
+
+if __name__ == "__main__":
+    main()
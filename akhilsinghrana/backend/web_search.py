@@ -0,0 +1,214 @@
+"""
+A TTL+LRU cache in front of the web search tool (Tavily).
+
+Results are keyed on the normalised query, so the same question asked twice
+within `ttl` seconds costs one search. Concurrent async lookups of a query
+that is already being searched share that search instead of starting another.
+prefetch() starts a search in the background, for a caller that may or may
+not need the result: RAGChat uses it to overlap the search with grading when
+retrieval scores are low, and settles it once grading has decided.
+"""
+import time
+import asyncio
+import logging
+import threading
+from collections import OrderedDict
+
+from akhilsinghrana.backend import metrics
+from akhilsinghrana.backend.embeddings import normalize_text
+
+logger = logging.getLogger(__name__)
+
+
+class _Flight:
+    """A search in progress, with the number of callers and prefetches holding it."""
+
+    def __init__(self, task: asyncio.Task) -> None:
+        self.task = task
+        self.holders = 0
+        self.needed = False
+
+
+class Prefetch:
+    """Handle on a background search started by CachedWebSearch.prefetch."""
+
+    def __init__(self, cache: "CachedWebSearch", key: str, flight: _Flight) -> None:
+        self._cache = cache
+        self._key = key
+        self._flight = flight
+        self._settled = False
+
+    def settle(self, needed: bool) -> None:
+        """
+        Report whether the result is needed. An unneeded search that is still
+        running is cancelled, unless someone else is waiting for it; one that
+        has finished stays cached for the next asker.
+        """
+        if self._settled:
+            return
+        self._settled = True
+        flight = self._flight
+        flight.holders -= 1
+        flight.needed = flight.needed or needed
+        if flight.needed or flight.holders:
+            result = "used"
+        elif flight.task.done():
+            result = "wasted"
+        else:
+            self._cache.discard(self._key)
+            result = "cancelled"
+        metrics.WEB_SEARCH_SPECULATIVE.labels(result=result).inc()
+
+    def cancel(self) -> None:
+        self.settle(needed=False)
+
+
+class CachedWebSearch:
+    """
+    Wraps a search tool with invoke()/ainvoke() taking {"query": ...}.
+
+    Keeps up to `max_size` results for `ttl` seconds (ttl <= 0 disables
+    caching but still shares concurrent searches). Failed searches are not
+    cached. `inner` may be swapped at any time; cached results are kept.
+    """
+
+    def __init__(self, inner=None, max_size: int = 256, ttl: float = 3600.0, clock=time.monotonic) -> None:
+        self.inner = inner
+        self.max_size = max_size
+        self.ttl = ttl
+        self.hits = 0
+        self.joined = 0
+        self.misses = 0
+        self._clock = clock
+        self._lock = threading.Lock()
+        self._results: OrderedDict = OrderedDict()  # key -> (expires at, result)
+        self._flights: dict = {}  # key -> _Flight, searches in progress on the event loop
+
+    # ── Search tool interface ─────────────────────────────────────────────────
+
+    def invoke(self, input: dict, config=None):
+        key = normalize_text(input["query"])
+        found, result = self._lookup(key)
+        if found:
+            return result
+        self._count("miss")
+        result = self.inner.invoke({**input, "query": key}, config)
+        self._store(key, result)
+        return result
+
+    async def ainvoke(self, input: dict, config=None):
+        key = normalize_text(input["query"])
+        found, result = self._lookup(key)
+        if found:
+            return result
+        flight = self._flight(key, input)
+        flight.holders += 1
+        try:
+            # Shielded: a cancelled caller must not cancel a search others share
+            return await asyncio.shield(flight.task)
+        finally:
+            flight.holders -= 1
+
+    def prefetch(self, input: dict):
+        """Start searching in the background; None if the result is already cached."""
+        key = normalize_text(input["query"])
+        if self._peek(key):
+            return None
+        flight = self._flight(key, input)
+        flight.holders += 1
+        return Prefetch(self, key, flight)
+
+    def discard(self, query: str) -> bool:
+        """
+        Cancel the search in progress for `query` unless a caller is waiting
+        for it, so the next lookup starts afresh; cached results are kept.
+        Returns whether a search was cancelled.
+        """
+        key = normalize_text(query)
+        flight = self._flights.get(key)
+        if flight is None or flight.holders or flight.task.done():
+            return False
+        del self._flights[key]
+        flight.task.cancel()
+        return True
+
+    # ── Introspection ─────────────────────────────────────────────────────────
+
+    def stats(self) -> dict:
+        with self._lock:
+            lookups = self.hits + self.joined + self.misses
+            return {
+                "size": len(self._results),
+                "hits": self.hits,
+                "joined": self.joined,
+                "misses": self.misses,
+                "hit_rate": (self.hits + self.joined) / lookups if lookups else 0.0,
+            }
+
+    def clear(self) -> None:
+        with self._lock:
+            self._results.clear()
+
+    # ── Internals ─────────────────────────────────────────────────────────────
+
+    def _peek(self, key: str) -> bool:
+        with self._lock:
+            entry = self._results.get(key)
+            return entry is not None and entry[0] > self._clock()
+
+    def _lookup(self, key: str):
+        """(found, result), counting a hit; expired results are dropped."""
+        with self._lock:
+            entry = self._results.get(key)
+            if entry is not None and entry[0] > self._clock():
+                self._results.move_to_end(key)
+                result = entry[1]
+            else:
+                if entry is not None:
+                    del self._results[key]
+                return False, None
+        self._count("hit")
+        return True, result
+
+    def _count(self, result: str) -> None:
+        """Count a lookup: "hit" (cached), "joined" (shared a search in progress) or "miss" (searched)."""
+        counter = {"hit": "hits", "joined": "joined", "miss": "misses"}[result]
+        with self._lock:
+            setattr(self, counter, getattr(self, counter) + 1)
+        metrics.WEB_SEARCH_CACHE.labels(result=result).inc()
+
+    def _store(self, key: str, result) -> None:
+        with self._lock:
+            if self.ttl <= 0:
+                return
+            self._results[key] = (self._clock() + self.ttl, result)
+            self._results.move_to_end(key)
+            while len(self._results) > self.max_size:
+                self._results.popitem(last=False)
+
+    def _flight(self, key: str, input: dict) -> _Flight:
+        """The search in progress for `key` on this event loop, started if there is none."""
+        loop = asyncio.get_running_loop()
+        flight = self._flights.get(key)
+        if flight is not None and flight.task.get_loop() is loop and not flight.task.done():
+            self._count("joined")
+            return flight
+        self._count("miss")
+        flight = _Flight(loop.create_task(self.inner.ainvoke({**input, "query": key})))
+        self._flights[key] = flight
+        flight.task.add_done_callback(lambda task: self._landed(key, flight))
+        return flight
+
+    def _landed(self, key: str, flight: _Flight) -> None:
+        self._forget(key, flight)
+        if flight.task.cancelled():
+            return
+        error = flight.task.exception()  # retrieved here, so an unawaited failure is not reported as lost
+        if error is not None:
+            logger.warning(f"Web search for {key!r} failed: {error!r}")
+            return
+        self._store(key, flight.task.result())
+
+    def _forget(self, key: str, flight: _Flight) -> None:
+        if self._flights.get(key) is flight:
+            del self._flights[key]
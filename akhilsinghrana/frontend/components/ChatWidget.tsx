@@ -6,6 +6,7 @@ import { MessageCircle, X, Send } from "lucide-react"
 interface Message {
   role: "user" | "assistant"
   content: string
+  interrupted?: boolean
 }
 
 export default function ChatWidget() {
@@ -28,16 +29,52 @@ export default function ChatWidget() {
     setInput("")
     setMessages((m) => [...m, { role: "user", content: userMsg }])
     setLoading(true)
+    let answer = ""
+    let finished = false
+    // First token adds the assistant message, later tokens rewrite it in place
+    const showAnswer = (content: string) => {
+      const replace = answer.length > 0
+      setMessages((m) =>
+        replace ? [...m.slice(0, -1), { role: "assistant", content }] : [...m, { role: "assistant", content }]
+      )
+    }
     try {
-      const res = await fetch(`${apiUrl}/api/chat`, {
+      const res = await fetch(`${apiUrl}/api/chat/stream`, {
         method: "POST",
         headers: { "Content-Type": "application/json" },
         body: JSON.stringify({ message: userMsg }),
       })
-      const data = await res.json()
-      setMessages((m) => [...m, { role: "assistant", content: data.response || "Sorry, I couldn't process that." }])
+      if (!res.ok || !res.body) throw new Error(`HTTP ${res.status}`)
+      const reader = res.body.getReader()
+      const decoder = new TextDecoder()
+      let buffer = ""
+      while (true) {
+        const { done, value } = await reader.read()
+        if (done) break
+        buffer += decoder.decode(value, { stream: true })
+        const events = buffer.split("\n\n")
+        buffer = events.pop() ?? ""
+        for (const raw of events) {
+          const event = raw.match(/^event: (.*)$/m)?.[1]
+          const data = raw.match(/^data: (.*)$/m)?.[1]
+          if (!event || !data) continue
+          const payload = JSON.parse(data)
+          if (event === "token") {
+            showAnswer(answer + payload.token)
+            answer += payload.token
+          } else if (event === "done") {
+            finished = true
+          } else if (event === "error") {
+            throw new Error(payload.detail)
+          }
+        }
+      }
+      if (!answer) showAnswer("Sorry, I couldn't process that.")
+      else if (!finished) throw new Error("Stream ended early")
     } catch {
-      setMessages((m) => [...m, { role: "assistant", content: "Connection error. Please try again." }])
+      if (!answer) setMessages((m) => [...m, { role: "assistant", content: "Connection error. Please try again." }])
+      // Keep the partial answer, but don't let it pass for a complete reply
+      else setMessages((m) => [...m.slice(0, -1), { role: "assistant", content: answer, interrupted: true }])
     } finally {
       setLoading(false)
     }
@@ -103,10 +140,15 @@ export default function ChatWidget() {
                     }}
                   >
                     {msg.content}
+                    {msg.interrupted && (
+                      <div className="mt-1 text-xs" style={{ color: "var(--muted)" }}>
+                        Answer interrupted. Please try again.
+                      </div>
+                    )}
                   </div>
                 </div>
               ))}
-              {loading && (
+              {loading && messages[messages.length - 1].role === "user" && (
                 <div className="flex justify-start">
                   <div
                     className="px-3 py-2 rounded-xl text-sm"
@@ -0,0 +1,80 @@
+"""
+Requests per second for /api/blog/{slug}: the old read-the-file-per-request
+handler against the app's own get_blog (served from BlogStore), both driven
+in-process through TestClient so only the app is measured.
+
+    python -m benchmarks.blog_store_bench [--requests 5000] [--concurrency 50]
+"""
+import os
+import time
+import logging
+import argparse
+from concurrent.futures import ThreadPoolExecutor
+
+from fastapi import FastAPI, HTTPException
+from fastapi.testclient import TestClient
+
+from akhilsinghrana.backend import main as app_main
+
+PAGES_DIR = app_main.PAGES_DIR
+
+
+def baseline_app() -> FastAPI:
+    """The handler get_blog replaced: open and read the post on every request."""
+    app = FastAPI()
+
+    @app.get("/api/blog/{slug}")
+    async def get_blog(slug: str):
+        blog_path = os.path.join(PAGES_DIR, f"{slug}.html")
+        try:
+            with open(blog_path, "r", encoding="utf-8") as f:
+                content = f.read()
+            return {"html": content}
+        except FileNotFoundError:
+            raise HTTPException(status_code=404, detail="Blog not found")
+
+    return app
+
+
+def measure(client: TestClient, slugs: list, requests: int, concurrency: int, headers: dict) -> dict:
+    def fetch(i: int) -> int:
+        # Raw bytes: measure the server, not the client decompressing
+        with client.stream("GET", f"/api/blog/{slugs[i % len(slugs)]}", headers=headers) as response:
+            assert response.status_code in (200, 304)
+            return sum(len(chunk) for chunk in response.iter_raw())
+
+    start = time.perf_counter()
+    with ThreadPoolExecutor(max_workers=concurrency) as pool:
+        sizes = list(pool.map(fetch, range(requests)))
+    elapsed = time.perf_counter() - start
+    return {"rps": requests / elapsed, "bytes": sum(sizes) / len(sizes)}
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument("--requests", type=int, default=5000)
+    parser.add_argument("--concurrency", type=int, default=50)
+    args = parser.parse_args()
+    logging.disable(logging.INFO)  # the client logs every request
+
+    store = app_main.blog_store
+    slugs = sorted(store._posts)
+    etags = ", ".join(etag for slug in slugs for etag in store.get(slug).etags)
+    # No `with` block: lifespan startup would warm up the chatbot and start the mailer
+    baseline, app = TestClient(baseline_app()), TestClient(app_main.app)
+    cases = [
+        ("baseline (read per request)", baseline, {}),
+        ("get_blog, identity", app, {"Accept-Encoding": "identity"}),
+        ("get_blog, gzip", app, {"Accept-Encoding": "gzip"}),
+        ("get_blog, 304 revalidation", app, {"Accept-Encoding": "gzip", "If-None-Match": etags}),
+    ]
+    print(f"{len(slugs)} posts, {args.requests} requests, concurrency {args.concurrency}")
+    baseline_rps = None
+    for name, client, headers in cases:
+        result = measure(client, slugs, args.requests, args.concurrency, headers)
+        baseline_rps = baseline_rps or result["rps"]
+        print(f"{name:<30} {result['rps']:8.0f} req/s  x{result['rps'] / baseline_rps:4.2f}  {result['bytes']:8.0f} B/response")
+
+
+if __name__ == "__main__":
+    main()
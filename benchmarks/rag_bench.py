@@ -0,0 +1,272 @@
+"""
+Offline benchmark of the RAG graph and the HTTP endpoints.
+
+Everything runs against the deterministic fakes in tests/fakes.py
+(Groq, the HF embedding endpoint and Tavily, each with configurable latency
+and failure rate) and a FAISS index built from the blog posts with fake
+embeddings, so no API keys are needed and runs are comparable over time.
+
+Reports, as JSON:
+  nodes        per-node latency (retrieve, grade_documents, web_search, generate)
+  end_to_end   get_answer latency
+  batch        get_answers over all questions vs one get_answer per question
+  http         /api/chat, /api/blog and /contact throughput under concurrency
+  caches       answer-cache and embedding-cache hit ratios from the /api/chat run,
+               and the web-search cache over the whole run
+  backends     call counts for each fake
+  llm_providers  circuit-breaker state per LLM provider at the end
+
+    python -m benchmarks.rag_bench --llm-latency 0.05 --output results.json
+"""
+import os
+import sys
+import json
+import time
+import shutil
+import asyncio
+import argparse
+import platform
+import tempfile
+import statistics
+
+BLOG_DIR = os.path.join(os.path.dirname(__file__), "..", "akhilsinghrana", "frontend", "public", "blogs")
+
+OFF_TOPIC = [
+    "What is the weather in Berlin today",
+    "Who won the last football world cup",
+    "How do I bake sourdough bread",
+]
+
+
+def summarize(samples: list) -> dict:
+    if not samples:
+        return {"count": 0}
+    ordered = sorted(samples)
+    pick = lambda q: ordered[min(len(ordered) - 1, int(q * len(ordered)))]  # noqa: E731
+    return {
+        "count": len(samples),
+        "mean_ms": round(statistics.fmean(samples) * 1000, 2),
+        "p50_ms": round(pick(0.50) * 1000, 2),
+        "p95_ms": round(pick(0.95) * 1000, 2),
+        "max_ms": round(ordered[-1] * 1000, 2),
+    }
+
+
+def build_questions(documents, count: int) -> list:
+    """Questions from blog headings plus a few off-topic ones that should end in web search."""
+    headings = sorted({d.metadata[k] for d in documents for k in ("Header 2", "Header 3") if k in d.metadata})
+    questions = [f"What does Akhil say about {h}?" for h in headings] + OFF_TOPIC
+    return [questions[i % len(questions)] for i in range(count)]
+
+
+def build_chatbot(args):
+    from langchain_community.vectorstores import FAISS
+
+    from akhilsinghrana.backend import html_chunker
+    from akhilsinghrana.backend.embeddings import CachedEmbeddings
+    from tests.fakes import (
+        BagOfWordsEmbeddings,
+        FakeWebSearch,
+        SlowFakeChatModel,
+        make_fake_chatbot,
+    )
+
+    documents = list(html_chunker.iter_html_chunks(html_chunker.html_files(BLOG_DIR), workers=1))
+    inner = BagOfWordsEmbeddings(normalize=True, seed=args.seed)
+    vectorstore = FAISS.from_documents(documents, inner)
+    # Latency and failures only apply once the index exists, as in production
+    inner.latency, inner.failure_rate = args.embed_latency, args.failure_rate
+    embeddings = CachedEmbeddings(inner)
+    vectorstore.embedding_function = embeddings
+
+    llm = SlowFakeChatModel(latency=args.llm_latency, failure_rate=args.failure_rate, seed=args.seed)
+    # Fails independently of the primary, so --failure-rate exercises the router's failover
+    fallback_llm = SlowFakeChatModel(latency=args.llm_latency, failure_rate=args.failure_rate, seed=args.seed + 1)
+    search = FakeWebSearch(latency=args.search_latency, failure_rate=args.failure_rate, seed=args.seed)
+    bot = make_fake_chatbot(
+        llm,
+        vectorstore=vectorstore,
+        embeddings=embeddings,
+        web_search_tool=search,
+        fallback_llm=fallback_llm,
+        grading_mode=args.grading_mode,
+        speculative_search_score=args.speculative_search_score,
+    )
+    return bot, documents, {"llm": llm, "fallback_llm": fallback_llm, "embeddings": inner, "web_search": search}
+
+
+async def bench_nodes(bot, questions) -> dict:
+    """Per-node latency: in this linear graph each update arrives when its node finishes."""
+    timings, errors = {}, 0
+    for question in questions:
+        last = time.perf_counter()
+        try:
+            async for update in bot.custom_graph.astream({"question": question, "steps": []}, stream_mode="updates"):
+                now = time.perf_counter()
+                for node in update:
+                    timings.setdefault(node, []).append(now - last)
+                last = now
+        except Exception:
+            errors += 1
+    return {"errors": errors, **{node: summarize(samples) for node, samples in timings.items()}}
+
+
+def bench_end_to_end(bot, questions) -> dict:
+    samples, errors, grader_calls = [], 0, []
+    for question in questions:
+        start = time.perf_counter()
+        try:
+            reply = bot.get_answer({"input": question})
+        except Exception:
+            errors += 1
+            continue
+        samples.append(time.perf_counter() - start)
+        grader_calls.append(reply["steps"].count("grade_by_llm"))
+    result = summarize(samples)
+    result["errors"] = errors
+    result["grader_calls_per_answer"] = round(statistics.fmean(grader_calls), 2) if grader_calls else 0.0
+    return result
+
+
+def bench_batch(bot, backends, questions) -> dict:
+    def run(answer_all):
+        calls = {name: fake.calls for name, fake in backends.items()}
+        start = time.perf_counter()
+        replies = answer_all()
+        return {
+            "seconds": round(time.perf_counter() - start, 3),
+            "errors": sum("error" in reply for reply in replies),
+            "backend_calls": {name: fake.calls - calls[name] for name, fake in backends.items()},
+        }
+
+    def one_by_one():
+        replies = []
+        for question in questions:
+            try:
+                replies.append(bot.get_answer({"input": question}))
+            except Exception as e:
+                replies.append({"error": str(e)})
+        return replies
+
+    # The embedding cache would hide repeat embeddings, so start both runs from a cold one
+    bot.embeddings._memory.clear()
+    sequential = run(one_by_one)
+    bot.embeddings._memory.clear()
+    batched = run(lambda: bot.get_answers(questions))
+    return {"questions": len(questions), "unique": len(set(questions)), "sequential": sequential, "batched": batched}
+
+
+async def bench_http(main, requests: int, concurrency: int, questions) -> dict:
+    import httpx
+
+    slug = next(iter(main.blog_store._posts), None)
+    routes = {
+        "/api/chat": lambda i: ("POST", "/api/chat", {"json": {"message": questions[i % len(questions)]}}),
+        "/api/blog": lambda i: ("GET", f"/api/blog/{slug}", {"headers": {"Accept-Encoding": "gzip"}}),
+        "/contact": lambda i: (
+            "POST",
+            "/contact",
+            {"data": {"name": "Bench", "email": "bench@example.com", "message": f"Message {i}"}},
+        ),
+    }
+    results = {}
+    transport = httpx.ASGITransport(app=main.app)
+    async with httpx.AsyncClient(transport=transport, base_url="http://bench", timeout=60) as client:
+        for route, make_request in routes.items():
+            next_index = iter(range(requests))
+            samples, statuses = [], {}
+
+            async def worker():
+                for i in next_index:
+                    method, url, kwargs = make_request(i)
+                    start = time.perf_counter()
+                    response = await client.request(method, url, **kwargs)
+                    samples.append(time.perf_counter() - start)
+                    statuses[response.status_code] = statuses.get(response.status_code, 0) + 1
+
+            start = time.perf_counter()
+            await asyncio.gather(*(worker() for _ in range(concurrency)))
+            elapsed = time.perf_counter() - start
+            results[route] = {
+                **summarize(samples),
+                "requests_per_second": round(requests / elapsed, 1),
+                "status_codes": {str(code): n for code, n in sorted(statuses.items())},
+            }
+    return results
+
+
+def run(args) -> dict:
+    spool = tempfile.mkdtemp(prefix="bench-mail-")
+    # Configure the app before importing it: in-memory stores, no effective rate limits
+    os.environ.update({
+        "CACHE_BACKEND": "memory",
+        "RATE_LIMIT_BACKEND": "memory",
+        "CHAT_RATE_LIMIT": "1000000000/1",
+        "CONTACT_RATE_LIMIT": "1000000000/1",
+        "MAIL_SPOOL_DIR": spool,
+        "QUERY_LOG_PATH": "",  # keep benchmark questions out of the real query log
+        "BLOG_RELOAD_INTERVAL": "0",
+    })
+    from akhilsinghrana.backend import answer_cache, main
+    from akhilsinghrana.backend.cache_store import MemoryCacheStore
+    from akhilsinghrana.backend.semantic_cache import SemanticCache
+
+    bot, documents, backends = build_chatbot(args)
+    questions = build_questions(documents, args.questions)
+
+    report = {
+        "config": {**vars(args), "python": platform.python_version(), "started": time.strftime("%Y-%m-%dT%H:%M:%S")},
+        "nodes": asyncio.run(bench_nodes(bot, questions)),
+        "end_to_end": bench_end_to_end(bot, questions),
+        "batch": bench_batch(bot, backends, questions),
+    }
+
+    # HTTP: the app serves the fake chatbot through a fresh answer cache, so repeated questions hit it
+    main.custom_chatBot = bot
+    threshold = answer_cache.CACHE_SIMILARITY_THRESHOLD
+    main._answer_cache = SemanticCache(bot.embeddings, store=MemoryCacheStore(), threshold=threshold)
+    embedding_stats_before = bot.embeddings.stats()
+    report["http"] = asyncio.run(bench_http(main, args.requests, args.concurrency, questions))
+    embedding_stats = bot.embeddings.stats()
+    lookups = sum(embedding_stats[k] - embedding_stats_before[k] for k in ("hits", "disk_hits", "misses"))
+    hits = sum(embedding_stats[k] - embedding_stats_before[k] for k in ("hits", "disk_hits"))
+    report["caches"] = {
+        "answer": main._answer_cache.stats(),
+        "embeddings": {**embedding_stats, "hit_rate_during_http": round(hits / lookups, 3) if lookups else 0.0},
+        "web_search": bot.web_search_cache.stats(),
+    }
+    report["backends"] = {name: {"calls": fake.calls} for name, fake in backends.items()}
+    report["llm_providers"] = bot.router.states()
+    shutil.rmtree(spool, ignore_errors=True)
+    return report
+
+
+def main_cli(argv=None) -> None:
+    parser = argparse.ArgumentParser(description="Offline RAG graph and HTTP benchmark (JSON output).")
+    parser.add_argument("--llm-latency", type=float, default=0.05, help="Seconds per fake LLM call")
+    parser.add_argument("--embed-latency", type=float, default=0.02, help="Seconds per fake embedding call")
+    parser.add_argument("--search-latency", type=float, default=0.1, help="Seconds per fake web search")
+    parser.add_argument("--failure-rate", type=float, default=0.0, help="Fraction of fake backend calls that fail")
+    parser.add_argument("--grading-mode", choices=("concurrent", "batch"), default="concurrent")
+    parser.add_argument(
+        "--speculative-search-score", type=float, help="Start web searches during grading below this retrieval score"
+    )
+    parser.add_argument("--questions", type=int, default=20, help="Questions for the node and end-to-end runs")
+    parser.add_argument("--requests", type=int, default=200, help="Requests per HTTP route")
+    parser.add_argument("--concurrency", type=int, default=20, help="Concurrent HTTP clients")
+    parser.add_argument("--seed", type=int, default=0)
+    parser.add_argument("--output", help="Write the JSON report here instead of stdout")
+    args = parser.parse_args(argv)
+
+    report = run(args)
+    text = json.dumps(report, indent=2)
+    if args.output:
+        with open(args.output, "w", encoding="utf-8") as f:
+            f.write(text + "\n")
+        print(f"Wrote {args.output}", file=sys.stderr)
+    else:
+        print(text)
+
+
+if __name__ == "__main__":
+    main_cli()
@@ -0,0 +1,106 @@
+"""
+Cold-start cost of the backend.
+
+Import time comes from `python -X importtime` in a fresh interpreter, for the
+app module (what uvicorn waits on before binding the port) and for the chat
+stack that is now loaded by the warm-up task instead. With --serve, uvicorn
+is started too and the time until /healthz and /readyz answer is measured
+(readiness needs real API keys and the FAISS index).
+
+    python -m benchmarks.startup_bench [--top 15] [--serve]
+"""
+import os
+import sys
+import time
+import argparse
+import subprocess
+import urllib.error
+import urllib.request
+
+ROOT = os.path.join(os.path.dirname(__file__), "..")
+MODULES = {
+    "app (akhilsinghrana.backend.main)": "akhilsinghrana.backend.main",
+    "chat stack (akhilsinghrana.backend.RAG_Chat)": "akhilsinghrana.backend.RAG_Chat",
+}
+
+
+def import_times(module: str):
+    """Return (total seconds, [(cumulative µs, module name), ...]) for importing `module` cold."""
+    result = subprocess.run(
+        [sys.executable, "-X", "importtime", "-c", f"import {module}"],
+        cwd=ROOT,
+        capture_output=True,
+        text=True,
+        env={**os.environ, "PYTHONPATH": ROOT},
+    )
+    if result.returncode:
+        raise RuntimeError(result.stderr.strip().splitlines()[-1])
+    rows = []
+    for line in result.stderr.splitlines():
+        if not line.startswith("import time:") or "cumulative" in line:
+            continue
+        _, cumulative_us, name = line.removeprefix("import time:").split("|")
+        rows.append((int(cumulative_us), name.strip()))
+    total = next(us for us, name in rows if name == module) / 1e6
+    return total, rows
+
+
+def wait_for(url: str, timeout: float, status: int = 200):
+    start = time.perf_counter()
+    while time.perf_counter() - start < timeout:
+        try:
+            with urllib.request.urlopen(url, timeout=1) as response:
+                if response.status == status:
+                    return time.perf_counter() - start
+        except (urllib.error.URLError, ConnectionError):
+            pass
+        time.sleep(0.05)
+    return None
+
+
+def serve(port: int, timeout: float) -> None:
+    start = time.perf_counter()
+    process = subprocess.Popen(
+        [sys.executable, "-m", "uvicorn", "akhilsinghrana.backend.main:app", "--port", str(port)],
+        cwd=ROOT,
+        env={**os.environ, "PYTHONPATH": ROOT},
+        stdout=subprocess.DEVNULL,
+        stderr=subprocess.DEVNULL,
+    )
+    try:
+        healthy = wait_for(f"http://127.0.0.1:{port}/healthz", timeout)
+        print(f"\n/healthz answered after {healthy:.2f}s" if healthy is not None else "\n/healthz never answered")
+        ready = wait_for(f"http://127.0.0.1:{port}/readyz", timeout)
+        if ready is not None:
+            print(f"/readyz ready after {time.perf_counter() - start:.2f}s")
+        else:
+            print(f"/readyz not ready within {timeout:.0f}s (missing keys or index?)")
+    finally:
+        process.terminate()
+        process.wait()
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description="Measure backend import and startup time.")
+    parser.add_argument("--top", type=int, default=15, help="Slowest imports to list for the app module")
+    parser.add_argument("--serve", action="store_true", help="Also time /healthz and /readyz under uvicorn")
+    parser.add_argument("--port", type=int, default=8765)
+    parser.add_argument("--timeout", type=float, default=120.0)
+    args = parser.parse_args()
+
+    app_rows = []
+    for label, module in MODULES.items():
+        total, rows = import_times(module)
+        print(f"{label:<48} {total * 1000:8.0f} ms")
+        if module == "akhilsinghrana.backend.main":
+            app_rows = rows
+    print("\nSlowest imports under the app module (cumulative):")
+    for us, name in sorted(app_rows, reverse=True)[1 : args.top + 1]:
+        print(f"  {us / 1000:8.1f} ms  {name}")
+
+    if args.serve:
+        serve(args.port, args.timeout)
+
+
+if __name__ == "__main__":
+    main()
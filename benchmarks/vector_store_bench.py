@@ -0,0 +1,200 @@
+"""
+Vector store formats compared on synthetic corpora.
+
+For each corpus size, builds the current format (LangChain FAISS: flat
+index.faiss + pickled index.pkl) and the memory-mapped format with each
+index type, then loads each one in a fresh process, as a uvicorn worker
+would, and reports:
+
+  build_s        time to build and write the store
+  disk_mb        size on disk
+  load_ms        time to open the store
+  rss_mb         worker memory after the queries: private (anon), file-backed
+                 pages shared with other workers (file), and the total
+  query          per-query latency for k nearest chunks (p50/p95/mean, ms)
+  recall         fraction of the exact top-k found
+
+Vectors are clustered and unit length like bge embeddings.
+
+    python -m benchmarks.vector_store_bench --sizes 10000,100000,1000000 --output vs.json
+"""
+import os
+import sys
+import json
+import time
+import shutil
+import argparse
+import tempfile
+import subprocess
+
+import numpy as np
+
+ROOT = os.path.join(os.path.dirname(__file__), "..")
+MMAP_INDEXES = ("flat", "hnsw", "ivfpq")
+
+
+def synthetic_vectors(count: int, dim: int, seed: int, clusters: int = 256) -> np.ndarray:
+    """Unit vectors scattered around `clusters` random topics."""
+    rng = np.random.default_rng(seed)
+    centers = rng.standard_normal((clusters, dim)).astype(np.float32)
+    vectors = np.empty((count, dim), dtype=np.float32)
+    for start in range(0, count, 65536):  # in blocks, so 1M x 1024 never needs a second copy
+        end = min(count, start + 65536)
+        block = centers[rng.integers(0, clusters, end - start)]
+        block += 0.6 * rng.standard_normal(block.shape, dtype=np.float32)
+        vectors[start:end] = block / np.linalg.norm(block, axis=1, keepdims=True)
+    return vectors
+
+
+def synthetic_documents(count: int):
+    from langchain_core.documents import Document
+
+    words = "earth observation satellite imagery dataset model training vision research deep learning".split()
+    for i in range(count):
+        text = " ".join(words[(i + j) % len(words)] for j in range(80))
+        yield Document(page_content=f"Chunk {i}: {text}", metadata={"row": i, "source": f"post-{i % 97}.html"}, id=str(i))
+
+
+def build_faiss(directory: str, vectors: np.ndarray) -> None:
+    import faiss
+    from langchain_community.docstore.in_memory import InMemoryDocstore
+    from langchain_community.vectorstores import FAISS
+
+    index = faiss.IndexFlatL2(vectors.shape[1])
+    index.add(vectors)
+    documents = {doc.id: doc for doc in synthetic_documents(len(vectors))}
+    store = FAISS(None, index, InMemoryDocstore(documents), dict(enumerate(documents)))
+    store.save_local(directory)
+
+
+def disk_mb(directory: str) -> float:
+    return round(sum(os.path.getsize(os.path.join(directory, f)) for f in os.listdir(directory)) / 2**20, 1)
+
+
+def rss_mb() -> dict:
+    with open("/proc/self/status", "r", encoding="utf-8") as f:
+        status = dict(line.split(":", 1) for line in f)
+    kb = lambda key: int(status[key].split()[0])  # noqa: E731
+    return {"anon": round(kb("RssAnon") / 1024, 1), "file": round(kb("RssFile") / 1024, 1), "total": round(kb("VmRSS") / 1024, 1)}
+
+
+def run_worker(kind: str, directory: str, queries_path: str, k: int) -> dict:
+    """Body of one child process: load the store, query it, report."""
+    from langchain_community.vectorstores import FAISS
+
+    from akhilsinghrana.backend.vector_store import MMapVectorStore
+
+    queries = np.load(queries_path)
+    # Imports are done; only opening the store is timed
+    start = time.perf_counter()
+    if kind == "faiss":
+        store = FAISS.load_local(directory, None, allow_dangerous_deserialization=True)
+    else:
+        store = MMapVectorStore.load(directory)
+    load_ms = (time.perf_counter() - start) * 1000
+
+    samples, rows = [], []
+    for vector in queries:
+        start = time.perf_counter()
+        hits = store.similarity_search_with_score_by_vector(vector.tolist(), k=k)
+        samples.append(time.perf_counter() - start)
+        rows.append([doc.metadata["row"] for doc, _ in hits])
+    ordered = sorted(samples)
+    return {
+        "load_ms": round(load_ms, 1),
+        "rss_mb": rss_mb(),
+        "query": {
+            "p50_ms": round(ordered[len(ordered) // 2] * 1000, 3),
+            "p95_ms": round(ordered[int(0.95 * (len(ordered) - 1))] * 1000, 3),
+            "mean_ms": round(sum(samples) / len(samples) * 1000, 3),
+        },
+        "rows": rows,
+    }
+
+
+def measure(kind: str, directory: str, queries_path: str, k: int) -> dict:
+    result = subprocess.run(
+        [sys.executable, "-m", "benchmarks.vector_store_bench", "--worker", kind, directory, queries_path, str(k)],
+        cwd=ROOT,
+        capture_output=True,
+        text=True,
+        env={**os.environ, "PYTHONPATH": ROOT},
+    )
+    if result.returncode:
+        raise RuntimeError(f"{kind} worker failed:\n{result.stderr}")
+    return json.loads(result.stdout.strip().splitlines()[-1])
+
+
+def bench_size(count: int, args, workdir: str) -> dict:
+    from akhilsinghrana.backend.vector_store import MMapVectorStore
+
+    vectors = synthetic_vectors(count, args.dim, args.seed)
+    # Questions land near a chunk that answers them
+    rng = np.random.default_rng(args.seed + 1)
+    queries = vectors[rng.integers(0, count, args.queries)] + 0.02 * rng.standard_normal((args.queries, args.dim))
+    queries = (queries / np.linalg.norm(queries, axis=1, keepdims=True)).astype(np.float32)
+    queries_path = os.path.join(workdir, "queries.npy")
+    np.save(queries_path, queries)
+
+    stores = {}
+    start = time.perf_counter()
+    build_faiss(os.path.join(workdir, "faiss"), vectors)
+    stores["faiss"] = time.perf_counter() - start
+    for index in MMAP_INDEXES:
+        start = time.perf_counter()
+        MMapVectorStore.build(os.path.join(workdir, index), vectors, synthetic_documents(count), index=index)
+        stores[index] = time.perf_counter() - start
+    del vectors
+
+    results = {}
+    for kind, build_s in stores.items():
+        directory = os.path.join(workdir, kind)
+        results[kind] = {"build_s": round(build_s, 2), "disk_mb": disk_mb(directory), **measure(kind, directory, queries_path, args.k)}
+    exact = results["faiss"]["rows"]
+    for result in results.values():
+        found = sum(len(set(rows) & set(truth)) for rows, truth in zip(result.pop("rows"), exact))
+        result["recall"] = round(found / sum(len(truth) for truth in exact), 4)
+    for kind in stores:
+        shutil.rmtree(os.path.join(workdir, kind), ignore_errors=True)
+    return results
+
+
+def main(argv=None) -> None:
+    parser = argparse.ArgumentParser(description="Compare vector store formats on synthetic corpora (JSON output).")
+    parser.add_argument("--sizes", default="10000,100000", help="Comma-separated corpus sizes, e.g. 10000,100000,1000000")
+    parser.add_argument("--dim", type=int, default=1024, help="Vector dimension (bge-large: 1024)")
+    parser.add_argument("--queries", type=int, default=200)
+    parser.add_argument("--k", type=int, default=3)
+    parser.add_argument("--seed", type=int, default=0)
+    parser.add_argument("--workdir", help="Where to build the stores (default: a temporary directory)")
+    parser.add_argument("--output", help="Write the JSON report here instead of stdout")
+    parser.add_argument("--worker", nargs=4, metavar=("KIND", "DIR", "QUERIES", "K"), help=argparse.SUPPRESS)
+    args = parser.parse_args(argv)
+
+    if args.worker:
+        kind, directory, queries_path, k = args.worker
+        print(json.dumps(run_worker(kind, directory, queries_path, int(k))))
+        return
+
+    workdir = args.workdir or tempfile.mkdtemp(prefix="vector-bench-")
+    os.makedirs(workdir, exist_ok=True)
+    report = {"config": {key: value for key, value in vars(args).items() if key != "worker"}, "sizes": {}}
+    try:
+        for count in (int(size) for size in args.sizes.split(",")):
+            print(f"Benchmarking {count} chunks ...", file=sys.stderr)
+            report["sizes"][str(count)] = bench_size(count, args, workdir)
+    finally:
+        if not args.workdir:
+            shutil.rmtree(workdir, ignore_errors=True)
+
+    text = json.dumps(report, indent=2)
+    if args.output:
+        with open(args.output, "w", encoding="utf-8") as f:
+            f.write(text + "\n")
+        print(f"Wrote {args.output}", file=sys.stderr)
+    else:
+        print(text)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,46 @@
+import gzip
+import json
+import os
+
+from akhilsinghrana.backend.blog_store import BlogStore
+
+
+def test_precomputed_encodings_and_conditional_requests(tmp_path):
+    (tmp_path / "hello.html").write_text("<h1>Hello</h1>", encoding="utf-8")
+    post = BlogStore(str(tmp_path)).get("hello")
+
+    encoding, body, etag = post.select("gzip, deflate")
+    assert encoding == "gzip"
+    assert json.loads(gzip.decompress(body)) == {"html": "<h1>Hello</h1>"}
+    assert post.select("identity")[0] == "identity"
+    assert post.select("gzip;q=0")[0] == "identity"
+    assert post.select("br")[0] == "identity"
+    assert post.select("*")[0] == "gzip"
+
+    assert post.not_modified(etag)
+    assert post.not_modified(f'"other", W/{post.select("")[2]}')
+    assert not post.not_modified('"stale"')
+
+
+def test_refresh_reloads_only_changed_posts(tmp_path):
+    (tmp_path / "a.html").write_text("<p>one</p>", encoding="utf-8")
+    (tmp_path / "b.html").write_text("<p>two</p>", encoding="utf-8")
+    (tmp_path / "notes.txt").write_text("ignored", encoding="utf-8")
+    store = BlogStore(str(tmp_path))
+    assert len(store) == 2
+    old_etag = store.get("a").select("")[2]
+
+    (tmp_path / "a.html").write_text("<p>one, edited</p>", encoding="utf-8")
+    os.utime(tmp_path / "a.html", ns=(0, 10**18))  # mtime resolution can hide a fast rewrite
+    os.remove(tmp_path / "b.html")
+    (tmp_path / "c.html").write_text("<p>three</p>", encoding="utf-8")
+
+    assert store.refresh() == 3
+    assert store.get("a").select("")[2] != old_etag
+    assert store.get("b") is None
+    assert store.get("c") is not None
+    assert store.refresh() == 0
+
+
+def test_missing_directory_serves_nothing(tmp_path):
+    assert len(BlogStore(str(tmp_path / "missing"))) == 0
@@ -0,0 +1,75 @@
+import json
+
+import numpy as np
+
+from akhilsinghrana.backend.answer_cache import seed_cache_store
+from akhilsinghrana.backend.cache_store import SQLiteCacheStore
+from akhilsinghrana.backend.semantic_cache import SemanticCache
+from conftest import BagOfWordsEmbeddings
+
+ANSWER = {"response": "Akhil is an ML engineer.", "steps": ["retrieve_documents"]}
+
+
+def test_sqlite_store_is_write_behind_and_durable(tmp_path):
+    path = str(tmp_path / "cache.sqlite3")
+    store = SQLiteCacheStore(path, flush_interval=60)
+    store.put("who is akhil", "Who is Akhil", ANSWER, np.ones(4, dtype=np.float32))
+
+    assert store.get("who is akhil")["answer"] == ANSWER  # visible before the flush
+    assert len(store) == 0  # ...but not yet committed
+
+    store.close()
+    reopened = SQLiteCacheStore(path)
+    record = reopened.get("who is akhil")
+    assert record["question"] == "Who is Akhil"
+    assert record["vector"].tolist() == [1.0] * 4
+    reopened.close()
+
+
+def test_batch_being_flushed_stays_readable(tmp_path):
+    store = SQLiteCacheStore(str(tmp_path / "cache.sqlite3"), flush_interval=60)
+    store.put("who is akhil", "Who is Akhil", ANSWER, np.ones(4, dtype=np.float32))
+    seen = []
+    encode = store._encode_vector
+
+    def encode_and_read(vector):  # runs after the batch left the pending map, before the commit
+        seen.append((store.get("who is akhil")["answer"], [key for key, _, _ in store.vectors()[1]]))
+        return encode(vector)
+
+    store._encode_vector = encode_and_read
+    store.flush()
+
+    assert seen == [(ANSWER, ["who is akhil"])]
+    assert len(store) == 1 and store.get("who is akhil")["answer"] == ANSWER
+    store.close()
+
+
+def test_workers_sharing_a_store_see_each_others_answers(tmp_path):
+    path = str(tmp_path / "cache.sqlite3")
+    embeddings = BagOfWordsEmbeddings()
+    worker_a = SemanticCache(embeddings, store=SQLiteCacheStore(path))
+    worker_b = SemanticCache(embeddings, store=SQLiteCacheStore(path), threshold=0.9, sync_interval=0)
+
+    worker_a.put("Who is Akhil Singh Rana", ANSWER)
+    worker_a.store.flush()
+
+    assert worker_b.get("who is akhil singh rana?") == ANSWER  # exact key, read lazily from the store
+    assert worker_b.get("who is akhil singh rana please") == ANSWER  # paraphrase via the synced index
+    worker_a.store.close()
+    worker_b.store.close()
+
+
+def test_seeding_adds_newly_shipped_answers_to_a_kept_store(tmp_path):
+    store = SQLiteCacheStore(str(tmp_path / "cache.sqlite3"))
+    store.put("who is akhil", "Who is Akhil", ANSWER)
+    store.flush()
+    shipped = {"Who is Akhil": {"response": "Shipped answer."}, "What is RAPIDAI4EO": {"response": "A dataset."}}
+    seed_file = tmp_path / "bot_cache.json"
+    seed_file.write_text(json.dumps({json.dumps({"input": q}): reply for q, reply in shipped.items()}))
+
+    seed_cache_store(store, str(seed_file))
+
+    assert store.get("who is akhil")["answer"] == ANSWER  # answers in the store win
+    assert store.get("what is rapidai4eo")["answer"] == {"response": "A dataset."}
+    assert len(store) == 2
+    store.close()
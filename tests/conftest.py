@@ -0,0 +1,14 @@
+import pytest
+
+# The fakes live next to the tests, out of the runtime package; the benchmarks import them as tests.fakes
+from fakes import (  # noqa: F401
+    BagOfWordsEmbeddings,
+    FakeWebSearch,
+    SlowFakeChatModel,
+    make_fake_chatbot as make_chatbot,
+)
+
+
+@pytest.fixture
+def slow_llm():
+    return SlowFakeChatModel(latency=0.2)
@@ -0,0 +1,59 @@
+from langchain_core.documents import Document
+
+from akhilsinghrana.backend.context_packing import estimate_tokens, pack_context
+from conftest import SlowFakeChatModel, make_chatbot
+
+
+class RecordingChatModel(SlowFakeChatModel):
+    prompts: list = []
+
+    def _respond(self, messages):
+        self.prompts.append(messages[-1].content)
+        return super()._respond(messages)
+
+
+def _doc(text, **metadata):
+    return Document(page_content=text, metadata=metadata)
+
+
+def test_duplicates_are_dropped_and_chunks_ordered_by_score():
+    documents = [
+        _doc("He built the RAPIDAI4EO dataset for Earth Observation research.", source="post-1.html"),
+        _doc("Akhil works on computer vision.", source="about.html", **{"Header 2": "Work"}),
+        _doc("He  built the RAPIDAI4EO dataset for Earth Observation research.", source="post-2.html"),
+        _doc("RAPIDAI4EO dataset for Earth Observation", url="https://example.com/r"),  # contained in the first
+        _doc("A web result about satellites.", url="https://example.com/s"),
+    ]
+
+    text, stats = pack_context(documents, [0.6, 0.9, 0.5])
+
+    assert text.splitlines() == [
+        "[1] (about.html › Work) Akhil works on computer vision.",
+        "[2] (post-1.html) He built the RAPIDAI4EO dataset for Earth Observation research.",
+        "[3] (https://example.com/s) A web result about satellites.",
+    ]
+    assert stats["duplicates"] == 2
+    assert stats["saved"] == stats["raw_tokens"] - stats["tokens"] > 0
+
+
+def test_context_is_cut_to_the_token_budget():
+    body = "about earth observation datasets " * 20
+    documents = [_doc(f"Chunk {i} {body}", source=f"post-{i}.html") for i in range(10)]
+
+    text, stats = pack_context(documents, budget=300)
+
+    assert estimate_tokens(text) <= 300
+    assert stats["truncated"] == 1 and text.endswith("…")
+    assert stats["chunks"] + stats["dropped"] == 10
+    assert pack_context(documents, budget=0)[1]["chunks"] == 10
+
+
+def test_generate_prompt_gets_packed_context():
+    llm = RecordingChatModel(prompts=[])
+    bot = make_chatbot(llm, documents=["Akhil works on Earth Observation.", "Akhil works on  Earth Observation."])
+
+    bot.get_answer({"input": "Who is Akhil"})
+
+    prompt = llm.prompts[-1]
+    assert "[1] Akhil works on Earth Observation." in prompt
+    assert "[2]" not in prompt and "Document(" not in prompt
@@ -0,0 +1,107 @@
+import json
+import threading
+import urllib.request
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+
+import pytest
+from langchain_core.documents import Document
+from langchain_core.embeddings import Embeddings
+
+from akhilsinghrana.backend.indexing import EmbeddingPipeline
+
+
+class FakeEmbeddingServer(ThreadingHTTPServer):
+    """Local stand-in for the HF feature-extraction endpoint: POST {"inputs": [...]} -> [[...], ...]."""
+
+    def __init__(self, fail_first=0, fail_after=None):
+        super().__init__(("127.0.0.1", 0), self.Handler)
+        self.fail_first = fail_first
+        self.fail_after = fail_after
+        self.requests = 0
+        self.embedded = []
+        self.lock = threading.Lock()
+
+    class Handler(BaseHTTPRequestHandler):
+        def do_POST(self):
+            server = self.server
+            texts = json.loads(self.rfile.read(int(self.headers["Content-Length"])))["inputs"]
+            with server.lock:
+                server.requests += 1
+                failing = server.requests <= server.fail_first or (
+                    server.fail_after is not None and len(server.embedded) >= server.fail_after
+                )
+                if not failing:
+                    server.embedded.extend(texts)
+            if failing:
+                self.send_response(503)
+                self.end_headers()
+                return
+            body = json.dumps([[float(len(t)), 1.0] for t in texts]).encode()
+            self.send_response(200)
+            self.send_header("Content-Length", str(len(body)))
+            self.end_headers()
+            self.wfile.write(body)
+
+        def log_message(self, *args):
+            pass
+
+
+class HTTPEmbeddings(Embeddings):
+    def __init__(self, url):
+        self.url = url
+
+    def embed_documents(self, texts):
+        request = urllib.request.Request(self.url, data=json.dumps({"inputs": texts}).encode(), method="POST")
+        with urllib.request.urlopen(request, timeout=5) as response:
+            return json.loads(response.read())
+
+    def embed_query(self, text):
+        return self.embed_documents([text])[0]
+
+
+@pytest.fixture
+def server_factory():
+    servers = []
+
+    def start(**kwargs):
+        server = FakeEmbeddingServer(**kwargs)
+        threading.Thread(target=server.serve_forever, daemon=True).start()
+        servers.append(server)
+        return server, HTTPEmbeddings(f"http://127.0.0.1:{server.server_address[1]}/")
+
+    yield start
+    for server in servers:
+        server.shutdown()
+
+
+DOCS = [Document(page_content=f"chunk number {i}", metadata={"i": i}) for i in range(20)]
+
+
+def test_batches_are_retried_and_all_chunks_indexed(server_factory):
+    server, embeddings = server_factory(fail_first=2)
+    pipeline = EmbeddingPipeline(embeddings, batch_size=3, workers=3, backoff=0.01)
+
+    vectorstore, stats = pipeline.run(iter(DOCS))
+
+    assert vectorstore.index.ntotal == len(DOCS)
+    assert stats["chunks"] == 20 and stats["batches"] == 7 and stats["retries"] == 2
+    assert stats["chunks_per_second"] > 0
+    assert server.requests == stats["batches"] + stats["retries"]
+    assert sorted(server.embedded) == sorted(doc.page_content for doc in DOCS)
+
+
+def test_interrupted_build_resumes_from_checkpoint(server_factory, tmp_path):
+    checkpoint = str(tmp_path / "checkpoint")
+    _, flaky = server_factory(fail_after=9)
+    with pytest.raises(Exception):
+        EmbeddingPipeline(flaky, batch_size=3, workers=1, max_retries=1, backoff=0.01, checkpoint_dir=checkpoint).run(DOCS)
+
+    server, embeddings = server_factory()
+    pipeline = EmbeddingPipeline(embeddings, batch_size=3, workers=2, checkpoint_dir=checkpoint)
+    vectorstore, stats = pipeline.run(DOCS)
+
+    assert stats["resumed_batches"] == 3
+    assert len(server.embedded) == len(DOCS) - 9
+    assert vectorstore.index.ntotal == len(DOCS)
+    pipeline.clear_checkpoint()
+    assert not (tmp_path / "checkpoint").exists()
@@ -0,0 +1,88 @@
+import asyncio
+import threading
+
+from akhilsinghrana.backend.embeddings import CachedEmbeddings
+from conftest import BagOfWordsEmbeddings
+
+
+class RecordingEmbeddings(BagOfWordsEmbeddings):
+    def __init__(self):
+        super().__init__()
+        self.sent = []
+
+    def embed_documents(self, texts):
+        self.sent.append(list(texts))
+        return super().embed_documents(texts)
+
+
+def test_documents_are_deduplicated_and_cached():
+    inner = RecordingEmbeddings()
+    embeddings = CachedEmbeddings(inner)
+
+    first = embeddings.embed_documents(["alpha", "beta", "alpha", "  beta "])
+    second = asyncio.run(embeddings.aembed_documents(["beta", "gamma"]))
+
+    assert inner.sent == [["alpha", "beta"], ["gamma"]]
+    assert first[0] == first[2] and first[1] == first[3] == second[0]
+
+
+def test_batched_queries_share_the_query_cache():
+    inner = RecordingEmbeddings()
+    embeddings = CachedEmbeddings(inner)
+    cached = embeddings.embed_query("Who is Akhil")
+
+    vectors = asyncio.run(embeddings.aembed_queries(["Who is  Akhil", "RAPIDAI4EO", "RAPIDAI4EO"]))
+
+    assert inner.sent == [["RAPIDAI4EO"]]  # misses only, deduplicated, in one call
+    assert vectors[0] == cached and vectors[1] == vectors[2]
+    assert embeddings.embed_queries(["RAPIDAI4EO"]) == [vectors[1]] and inner.sent == [["RAPIDAI4EO"]]
+
+
+def test_query_vectors_persist_on_disk(tmp_path):
+    path = str(tmp_path / "embeddings.sqlite3")
+    inner = BagOfWordsEmbeddings()
+    vector = CachedEmbeddings(inner, disk_path=path).embed_query("Who is Akhil")
+
+    restarted = CachedEmbeddings(inner, disk_path=path)
+    calls = inner.calls
+    assert restarted.embed_query("Who is  Akhil") == vector
+    assert restarted.embed_query("Who is Akhil") == vector
+    assert inner.calls == calls
+    assert restarted.stats() == {"size": 1, "hits": 1, "disk_hits": 1, "misses": 0, "hit_rate": 1.0}
+
+
+class ThreadRecordingCache(CachedEmbeddings):
+    def __init__(self, *args, **kwargs):
+        super().__init__(*args, **kwargs)
+        self.disk_threads = []
+
+    def _disk_get(self, keys):
+        self.disk_threads.append(threading.get_ident())
+        return super()._disk_get(keys)
+
+    def _disk_put(self, vectors):
+        self.disk_threads.append(threading.get_ident())
+        super()._disk_put(vectors)
+
+
+def test_async_lookups_use_the_disk_off_the_event_loop(tmp_path):
+    path = str(tmp_path / "embeddings.sqlite3")
+    CachedEmbeddings(BagOfWordsEmbeddings(), disk_path=path).embed_query("Who is Akhil")
+    embeddings = ThreadRecordingCache(BagOfWordsEmbeddings(), disk_path=path)
+
+    async def embed():
+        await embeddings.aembed_query("Who is Akhil")  # disk hit
+        await embeddings.aembed_query("Who is Akhil")  # memory hit: no disk access
+        await embeddings.aembed_queries(["RAPIDAI4EO"])  # miss: disk read and write
+        return threading.get_ident()
+
+    loop_thread = asyncio.run(embed())
+    assert len(embeddings.disk_threads) == 3 and loop_thread not in embeddings.disk_threads
+    assert embeddings.stats()["disk_hits"] == 1
+
+
+def test_lru_is_bounded():
+    embeddings = CachedEmbeddings(BagOfWordsEmbeddings(), max_size=2)
+    for text in ["one", "two", "three"]:
+        embeddings.embed_query(text)
+    assert embeddings.stats()["size"] == 2
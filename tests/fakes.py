@@ -0,0 +1,201 @@
+"""
+Deterministic offline stand-ins for Groq, the HF embedding endpoint and
+Tavily, for tests and benchmarks that must run without API keys.
+
+Each fake takes a `latency` (seconds per call) and a `failure_rate`. Whether
+call number n fails depends only on (seed, n), so a run with the same seed
+and call order fails in exactly the same places.
+"""
+import re
+import json
+import time
+import zlib
+import random
+import asyncio
+
+from langchain_core.documents import Document
+from langchain_core.embeddings import Embeddings
+from langchain_core.language_models.chat_models import BaseChatModel
+from langchain_core.messages import AIMessage, AIMessageChunk
+from langchain_core.outputs import ChatGeneration, ChatGenerationChunk, ChatResult
+from langchain_core.runnables import RunnableLambda
+
+
+class FakeBackendError(RuntimeError):
+    """Raised by a fake when its failure_rate says this call fails."""
+
+
+def _fails(seed: int, call: int, failure_rate: float) -> bool:
+    return failure_rate > 0 and random.Random(f"{seed}:{call}").random() < failure_rate
+
+
+class SlowFakeChatModel(BaseChatModel):
+    """
+    Offline stand-in for ChatGroq. Grader prompts get a JSON score of `grade`
+    (the batch grader one score per document); anything else is treated as
+    generation and answered with `answer`, streamed word by word.
+    """
+
+    latency: float = 0.0
+    grade: str = "yes"
+    answer: str = "Akhil is a machine learning engineer."
+    batch_reply: str = ""  # overrides the batch-grader JSON, e.g. to simulate malformed output
+    fail: bool = False  # every generation fails
+    failure_rate: float = 0.0  # fraction of calls (grading included) that fail
+    seed: int = 0
+    calls: int = 0
+    generations: int = 0
+
+    @property
+    def _llm_type(self) -> str:
+        return "slow-fake"
+
+    def _respond(self, messages) -> ChatResult:
+        self.calls += 1
+        if _fails(self.seed, self.calls, self.failure_rate):
+            raise FakeBackendError("LLM call failed")
+        prompt = messages[-1].content
+        if "'scores'" in prompt:
+            count = len(re.findall(r"Document \d+:", prompt))
+            text = self.batch_reply or json.dumps({"scores": [self.grade] * count})
+        elif "grader" in prompt:
+            text = f'{{"score": "{self.grade}"}}'
+        else:
+            self.generations += 1
+            if self.fail:
+                raise FakeBackendError("LLM unavailable")
+            text = self.answer
+        return ChatResult(generations=[ChatGeneration(message=AIMessage(content=text))])
+
+    def _generate(self, messages, stop=None, run_manager=None, **kwargs):
+        time.sleep(self.latency)
+        return self._respond(messages)
+
+    async def _agenerate(self, messages, stop=None, run_manager=None, **kwargs):
+        await asyncio.sleep(self.latency)
+        return self._respond(messages)
+
+    async def _astream(self, messages, stop=None, run_manager=None, **kwargs):
+        await asyncio.sleep(self.latency)
+        text = self._respond(messages).generations[0].message.content
+        for token in re.findall(r"\S+\s*", text):
+            yield ChatGenerationChunk(message=AIMessageChunk(content=token))
+
+
+class BagOfWordsEmbeddings(Embeddings):
+    """
+    Offline stand-in for the HF embedding endpoint: hashed word counts, so
+    shared words mean similar vectors. With normalize=True vectors have unit
+    length, like bge's, which keeps FAISS relevance scores in a sane range.
+    The async methods are the Embeddings defaults, which run these in a thread.
+    """
+
+    def __init__(self, size: int = 256, latency: float = 0.0, failure_rate: float = 0.0, seed: int = 0,
+                 normalize: bool = False):
+        self.size = size
+        self.latency = latency
+        self.failure_rate = failure_rate
+        self.seed = seed
+        self.normalize = normalize
+        self.calls = 0
+
+    def _embed(self, text):
+        vector = [0.0] * self.size
+        for word in re.findall(r"\w+", text.lower()):
+            # crc32 rather than hash(): the same word maps to the same slot in every process
+            vector[zlib.crc32(word.encode("utf-8")) % self.size] += 1.0
+        if self.normalize:
+            norm = sum(v * v for v in vector) ** 0.5 or 1.0
+            vector = [v / norm for v in vector]
+        return vector
+
+    def _call(self):
+        self.calls += 1
+        if _fails(self.seed, self.calls, self.failure_rate):
+            raise FakeBackendError("Embedding call failed")
+        if self.latency:
+            time.sleep(self.latency)
+
+    def embed_documents(self, texts):
+        self._call()
+        return [self._embed(t) for t in texts]
+
+    def embed_query(self, text):
+        self._call()
+        return self._embed(text)
+
+
+class FakeWebSearch:
+    """Offline stand-in for TavilySearch: `results` canned hits echoing the query."""
+
+    def __init__(self, latency: float = 0.0, failure_rate: float = 0.0, seed: int = 0, results: int = 3):
+        self.latency = latency
+        self.failure_rate = failure_rate
+        self.seed = seed
+        self.results = results
+        self.calls = 0
+
+    def _response(self, query: str) -> dict:
+        self.calls += 1
+        if _fails(self.seed, self.calls, self.failure_rate):
+            raise FakeBackendError("Web search failed")
+        return {
+            "results": [
+                {"content": f"Web result {i} about {query}", "url": f"https://example.com/{i}"}
+                for i in range(self.results)
+            ]
+        }
+
+    def invoke(self, input: dict, config=None) -> dict:
+        time.sleep(self.latency)
+        return self._response(input["query"])
+
+    async def ainvoke(self, input: dict, config=None) -> dict:
+        await asyncio.sleep(self.latency)
+        return self._response(input["query"])
+
+
+DEFAULT_DOCUMENTS = [
+    "Akhil Singh Rana works on Earth Observation.",
+    "He built the RAPIDAI4EO dataset.",
+    "He enjoys computer vision research.",
+]
+
+
+def make_fake_chatbot(llm=None, documents=None, retrieval_latency=0.0, scores=None, vectorstore=None,
+                      embeddings=None, web_search_tool=None, **settings):
+    """
+    A RAGChat wired to fakes, touching neither the network nor the on-disk index.
+
+    By default the retriever returns `documents` (with `scores` as
+    (document, score) pairs if given) after `retrieval_latency`; pass a
+    `vectorstore` to retrieve from it for real instead. `settings` are
+    RAGChat keyword options such as grading_mode.
+    """
+    from akhilsinghrana.backend.RAG_Chat import RAGChat
+
+    embeddings = embeddings or BagOfWordsEmbeddings()
+    retriever = None
+    if vectorstore is None:
+        documents = documents if documents is not None else DEFAULT_DOCUMENTS
+        documents = [Document(page_content=d) if isinstance(d, str) else d for d in documents]
+        results = list(zip(documents, scores)) if scores is not None else documents
+
+        def retrieve(question):
+            time.sleep(retrieval_latency)
+            return list(results)
+
+        async def aretrieve(question):
+            await asyncio.sleep(retrieval_latency)
+            return list(results)
+
+        retriever = RunnableLambda(retrieve, afunc=aretrieve)
+
+    return RAGChat(
+        llm=llm or SlowFakeChatModel(),
+        embeddings=embeddings,
+        retriever=retriever,
+        vectorstore=vectorstore,
+        web_search_tool=web_search_tool,
+        **settings,
+    )
@@ -0,0 +1,36 @@
+import pytest
+
+from fakes import BagOfWordsEmbeddings, FakeBackendError, FakeWebSearch, make_fake_chatbot
+
+
+def _outcomes(fake, n):
+    results = []
+    for _ in range(n):
+        try:
+            fake.invoke({"query": "q"})
+            results.append(True)
+        except FakeBackendError:
+            results.append(False)
+    return results
+
+
+def test_failures_are_deterministic_per_seed():
+    first = _outcomes(FakeWebSearch(failure_rate=0.3, seed=7), 200)
+    assert first == _outcomes(FakeWebSearch(failure_rate=0.3, seed=7), 200)
+    assert first != _outcomes(FakeWebSearch(failure_rate=0.3, seed=8), 200)
+    assert 0.2 < first.count(False) / len(first) < 0.4
+
+
+def test_normalized_embeddings_are_unit_length_and_stable():
+    embeddings = BagOfWordsEmbeddings(normalize=True)
+    vector = embeddings.embed_query("earth observation research")
+    assert sum(v * v for v in vector) == pytest.approx(1.0)
+    assert vector == BagOfWordsEmbeddings(normalize=True).embed_query("earth observation research")
+
+
+def test_injected_web_search_is_used():
+    search = FakeWebSearch()
+    bot = make_fake_chatbot(scores=[0.1, 0.1, 0.1], web_search_tool=search)
+    reply = bot.get_answer({"input": "What is the weather"})
+    assert search.calls == 1
+    assert reply["steps"][-2:] == ["web_search", "generate_answer"]
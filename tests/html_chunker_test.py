@@ -0,0 +1,54 @@
+from akhilsinghrana.backend import html_chunker
+
+PAGE = """
+<html><head><title>Ignored</title><style>p { color: red }</style></head>
+<body><article>
+  <h1>My <em>Stack</em></h1>
+  <p>Intro with a <a href="#">link</a> inline.</p>
+  <h2>Backend</h2>
+  <h3>FastAPI</h3>
+  <p>Fast and typed.</p>
+  <h2>Frontend</h2>
+  <ul><li>Next.js</li><li>Tailwind</li></ul>
+  <!-- a comment -->
+</article></body></html>
+"""
+
+
+def test_chunks_are_scoped_by_headers():
+    chunks = html_chunker.chunk_html(PAGE, "stack.html")
+
+    assert [c.page_content for c in chunks] == [
+        "My Stack\nIntro with a link inline.",
+        "FastAPI\nFast and typed.",  # "Backend" alone has no text and is folded into the metadata
+        "Frontend\nNext.js\nTailwind",
+    ]
+    assert chunks[1].metadata == {
+        "source": "stack.html",
+        "slug": "stack",
+        "Header 1": "My Stack",
+        "Header 2": "Backend",
+        "Header 3": "FastAPI",
+    }
+    assert "Header 3" not in chunks[2].metadata
+
+
+def test_long_sections_are_split():
+    html = "<h2>Long</h2>" + "".join(f"<p>{'word ' * 30}{i}</p>" for i in range(20))
+    chunks = html_chunker.chunk_html(html, "long.html", max_chars=400)
+
+    assert len(chunks) > 1
+    assert all(len(c.page_content) <= 400 for c in chunks)
+    assert all(c.metadata["Header 2"] == "Long" for c in chunks)
+
+
+def test_process_pool_matches_serial_order(tmp_path):
+    for i in range(5):
+        (tmp_path / f"post{i}.html").write_text(f"<h1>Post {i}</h1><p>Body {i}</p>", encoding="utf-8")
+    paths = html_chunker.html_files(str(tmp_path))
+
+    serial = list(html_chunker.iter_html_chunks(paths, workers=1))
+    parallel = list(html_chunker.iter_html_chunks(paths, workers=2))
+
+    assert [c.page_content for c in parallel] == [c.page_content for c in serial]
+    assert [c.metadata["slug"] for c in parallel] == [f"post{i}" for i in range(5)]
@@ -0,0 +1,48 @@
+from langchain_community.vectorstores import FAISS
+from langchain_core.documents import Document
+
+from akhilsinghrana.backend import indexing
+from conftest import BagOfWordsEmbeddings
+
+
+class CountingEmbeddings(BagOfWordsEmbeddings):
+    def __init__(self):
+        super().__init__()
+        self.embedded = []
+
+    def embed_documents(self, texts):
+        self.embedded.extend(texts)
+        return super().embed_documents(texts)
+
+
+def _docs(*texts):
+    return [Document(page_content=t, metadata={"source": "blog"}) for t in texts]
+
+
+def test_update_embeds_only_new_chunks_and_deletes_removed(tmp_path):
+    embeddings = CountingEmbeddings()
+    manifest, docs, ids = indexing.build_manifest(_docs("alpha post", "beta post", "beta post", "gamma post"))
+    vectorstore = FAISS.from_documents(docs, embeddings, ids=ids)
+    indexing.save_manifest(str(tmp_path), manifest)
+    embeddings.embedded.clear()
+
+    manifest, stats = indexing.update_index(
+        vectorstore, _docs("alpha post", "gamma post", "delta post"), indexing.load_manifest(str(tmp_path))
+    )
+
+    assert stats == {"added": 1, "removed": 1, "unchanged": 2}
+    assert embeddings.embedded == ["delta post"]
+    assert sorted(d.page_content for d in vectorstore.docstore._dict.values()) == ["alpha post", "delta post", "gamma post"]
+    assert set(manifest.values()) == set(vectorstore.index_to_docstore_id.values())
+
+
+def test_index_without_manifest_is_bootstrapped_from_docstore():
+    embeddings = CountingEmbeddings()
+    vectorstore = FAISS.from_documents(_docs("alpha post", "alpha post", "beta post"), embeddings)
+    embeddings.embedded.clear()
+
+    _, stats = indexing.update_index(vectorstore, _docs("alpha post", "beta post"))
+
+    assert stats == {"added": 0, "removed": 1, "unchanged": 2}  # the duplicate chunk is dropped
+    assert embeddings.embedded == []
+    assert vectorstore.index.ntotal == 2
@@ -0,0 +1,198 @@
+import asyncio
+
+import pytest
+from langchain_core.runnables import RunnableLambda
+
+from akhilsinghrana.backend import metrics
+from akhilsinghrana.backend.llm_router import CircuitBreaker, LLMRouter, ProvidersUnavailable
+from conftest import SlowFakeChatModel, make_chatbot
+
+
+class Clock:
+    def __init__(self):
+        self.now = 0.0
+
+    def __call__(self):
+        return self.now
+
+
+def _provider(name, fail=False, delay=0.0, calls=None):
+    calls = calls if calls is not None else []
+
+    def run(inputs):
+        calls.append(name)
+        if fail:
+            raise RuntimeError(f"{name} down")
+        return {"answer": name, "inputs": inputs}
+
+    async def arun(inputs):
+        calls.append(name)
+        await asyncio.sleep(delay)
+        if fail:
+            raise RuntimeError(f"{name} down")
+        return {"answer": name, "inputs": inputs}
+
+    return RunnableLambda(run, afunc=arun)
+
+
+def test_breaker_opens_then_lets_one_probe_through():
+    clock = Clock()
+    breaker = CircuitBreaker(failure_threshold=2, reset_timeout=10, clock=clock)
+
+    breaker.record_failure()
+    assert breaker.allow()
+    breaker.record_failure()
+    assert breaker.state == "open" and not breaker.allow()
+
+    clock.now = 10
+    assert breaker.allow()  # the probe
+    assert not breaker.allow()  # everyone else waits for its verdict
+    breaker.record_failure()
+    assert breaker.state == "open"
+
+    clock.now = 20
+    assert breaker.allow()
+    breaker.record_success()
+    assert breaker.state == "closed" and breaker.allow()
+
+
+def test_router_fails_over_and_returns_after_recovery():
+    clock, calls, groq_down = Clock(), [], [True]
+
+    def groq(inputs):
+        calls.append("groq")
+        if groq_down[0]:
+            raise RuntimeError("groq down")
+        return {"answer": "groq"}
+
+    router = LLMRouter(
+        {"groq": RunnableLambda(groq), "hf": _provider("hf", calls=calls)},
+        failure_threshold=1,
+        reset_timeout=30,
+        clock=clock,
+    )
+
+    assert router.invoke({})["answer"] == "hf"
+    assert router.states() == {"groq": "open", "hf": "closed"}
+    assert router.invoke({})["answer"] == "hf"
+    assert calls == ["groq", "hf", "hf"]  # the open breaker skips groq without calling it
+
+    groq_down[0] = False
+    clock.now = 30
+    assert router.invoke({})["answer"] == "groq"  # half-open probe succeeds
+    assert router.states()["groq"] == "closed"
+
+
+def test_each_attempt_gets_fresh_inputs():
+    def mutate_then_fail(inputs):
+        inputs["steps"].append("retrieve")
+        raise RuntimeError("down")
+
+    router = LLMRouter({"groq": RunnableLambda(mutate_then_fail), "hf": RunnableLambda(lambda x: x)})
+    assert router.invoke({"steps": []}) == {"steps": []}
+
+
+def test_all_providers_failing_raises():
+    router = LLMRouter({"groq": _provider("groq", fail=True), "hf": _provider("hf", fail=True)}, failure_threshold=1)
+    with pytest.raises(ProvidersUnavailable, match="hf down"):
+        asyncio.run(router.ainvoke({}))
+    with pytest.raises(ProvidersUnavailable, match="breakers are open"):
+        asyncio.run(router.ainvoke({}))
+
+
+def test_async_run_times_out_to_the_fallback():
+    router = LLMRouter({"groq": _provider("groq", delay=1.0), "hf": _provider("hf")}, timeout=0.05)
+    assert asyncio.run(router.ainvoke({}))["answer"] == "hf"
+
+
+def test_slow_run_is_hedged_with_the_fallback():
+    calls = []
+    router = LLMRouter(
+        {"groq": _provider("groq", delay=0.5, calls=calls), "hf": _provider("hf", calls=calls)},
+        hedge_percentile=0.9,
+        hedge_min_samples=3,
+    )
+    for _ in range(3):
+        router.providers[0].latency.add(0.01)
+
+    assert asyncio.run(router.ainvoke({}))["answer"] == "hf"
+    assert calls == ["groq", "hf"]
+    assert router.states() == {"groq": "closed", "hf": "closed"}  # the cancelled run is not a failure
+
+
+class Streaming:
+    """A runnable whose stream yields `chunks` and then, if `error` is set, raises it."""
+
+    def __init__(self, chunks, error=None):
+        self.chunks = chunks
+        self.error = error
+
+    async def astream(self, inputs, config=None, **kwargs):
+        for chunk in self.chunks:
+            yield chunk
+        if self.error:
+            raise RuntimeError(self.error)
+
+
+async def _collect(router):
+    return [chunk async for chunk in router.astream({}, committed=lambda chunk: chunk[0] == "custom")]
+
+
+def test_stream_fails_over_only_before_commit():
+    hf = Streaming([("custom", "hf")])
+
+    router = LLMRouter({"groq": Streaming([("updates", "retrieve")], error="down"), "hf": hf})
+    assert asyncio.run(_collect(router)) == [("updates", "retrieve"), ("custom", "hf")]
+
+    router = LLMRouter({"groq": Streaming([("custom", "groq")], error="down mid-answer"), "hf": hf})
+    with pytest.raises(RuntimeError, match="mid-answer"):
+        asyncio.run(_collect(router))
+
+
+def test_chatbot_answers_from_the_fallback_pipeline():
+    fallbacks = metrics.LLM_FALLBACKS.labels(provider="slow-fake-fallback")
+    before = fallbacks.value
+    bot = make_chatbot(
+        SlowFakeChatModel(fail=True),
+        fallback_llm=SlowFakeChatModel(answer="Answer from the fallback."),
+    )
+
+    assert bot.get_answer({"input": "Who is Akhil"})["response"] == "Answer from the fallback."
+    assert asyncio.run(bot.aget_answer({"input": "Who is Akhil"}))["response"] == "Answer from the fallback."
+    assert fallbacks.value == before + 2
+    assert bot.llm.generations == 2  # the shared chatbot was not rewired
+
+
+def test_fallback_pipeline_follows_a_swapped_index():
+    bot = make_chatbot(SlowFakeChatModel(fail=True), fallback_llm=SlowFakeChatModel())
+    asked = []
+
+    def retrieve(question):
+        asked.append(question)
+        return []
+
+    bot.retriever = RunnableLambda(retrieve)  # what update_vector_store does after a refresh
+
+    bot.get_answer({"input": "Who is Akhil"})
+    assert asked == ["Who is Akhil", "Who is Akhil"]  # the failed primary run, then the fallback's
+
+
+def test_default_fallback_is_built_on_the_first_failover(monkeypatch):
+    from akhilsinghrana.backend.RAG_Chat import RAGChat
+
+    built = []
+
+    def get_hf_llm(self):
+        built.append(self)
+        return SlowFakeChatModel(answer="Answer from the fallback.")
+
+    monkeypatch.setattr(RAGChat, "get_llm", lambda self: SlowFakeChatModel(fail=True))
+    monkeypatch.setattr(RAGChat, "get_hf_llm", get_hf_llm)
+    template = make_chatbot(SlowFakeChatModel())
+    bot = RAGChat(embeddings=template.embeddings, retriever=template.retriever)
+    assert built == [] and list(bot.router.states()) == ["slow-fake", "huggingface_endpoint"]
+
+    assert bot.get_answer({"input": "Who is Akhil"})["response"] == "Answer from the fallback."
+    assert asyncio.run(bot.aget_answer({"input": "Who is Akhil"}))["response"] == "Answer from the fallback."
+    assert bot.get_answers(["Who is Akhil"])[0]["response"] == "Answer from the fallback."
+    assert len(built) == 1
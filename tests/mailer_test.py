@@ -0,0 +1,168 @@
+import asyncio
+import os
+import socket
+
+import pytest
+
+from akhilsinghrana.backend.mailer import Mailer, SMTPSender
+
+ITEM = {"name": "Ada", "email": "ada@example.com", "message": "Hello"}
+
+
+class FlakySender:
+    def __init__(self, failures=0):
+        self.failures = failures
+        self.sent = []
+
+    def send(self, item):
+        if self.failures:
+            self.failures -= 1
+            raise ConnectionError("smtp down")
+        self.sent.append(item)
+
+    def close(self):
+        pass
+
+
+def _deliver(mailer, items=()):
+    async def run():
+        for item in items:
+            await mailer.submit(item)
+        await mailer.start()
+        await mailer.join()
+        await mailer.stop()
+
+    asyncio.run(run())
+
+
+def test_failed_sends_are_retried_and_spool_cleared(tmp_path):
+    sender = FlakySender(failures=2)
+    mailer = Mailer(lambda: sender, str(tmp_path), workers=1, backoff=0.001)
+
+    _deliver(mailer, [ITEM])
+
+    assert sender.sent == [ITEM]
+    assert mailer.sent == 1 and mailer.failed == 0
+    assert os.listdir(tmp_path) == []
+
+
+def test_spooled_messages_are_replayed_on_start(tmp_path):
+    # A previous run spooled two messages and stopped before sending them
+    previous = Mailer(FlakySender, str(tmp_path))
+    previous._spool({**ITEM, "message": "first"})
+    previous._spool({**ITEM, "message": "second"})
+    asyncio.run(previous.stop())
+    sender = FlakySender()
+
+    _deliver(Mailer(lambda: sender, str(tmp_path), workers=1))
+
+    assert [item["message"] for item in sender.sent] == ["first", "second"]
+    assert os.listdir(tmp_path) == []
+
+
+def test_workers_sharing_a_spool_send_each_message_once(tmp_path):
+    spool = str(tmp_path / "spool")
+    previous = Mailer(FlakySender, spool)
+    previous._spool({**ITEM, "message": "left over"})
+    asyncio.run(previous.stop())
+    senders = [FlakySender() for _ in range(3)]
+    mailers = [Mailer(lambda sender=sender: sender, spool, workers=1) for sender in senders]
+
+    async def run():
+        await mailers[0].submit({**ITEM, "message": "new"})  # queued by a live worker, not replayed by others
+        await asyncio.gather(*(mailer.start() for mailer in mailers))
+        await asyncio.gather(*(mailer.join() for mailer in mailers))
+        await asyncio.gather(*(mailer.stop() for mailer in mailers))
+
+    asyncio.run(run())
+
+    assert sorted(item["message"] for sender in senders for item in sender.sent) == ["left over", "new"]
+    assert os.listdir(spool) == []
+
+
+def test_spool_directory_is_created_on_start(tmp_path):
+    spool = tmp_path / "db" / "mail_spool"
+    mailer = Mailer(FlakySender, str(spool))
+    assert not spool.exists()
+
+    _deliver(mailer)
+
+    assert spool.is_dir()
+
+
+def test_exhausted_retries_leave_a_failed_file(tmp_path):
+    mailer = Mailer(lambda: FlakySender(failures=10), str(tmp_path), workers=1, max_retries=1, backoff=0.001)
+
+    _deliver(mailer, [ITEM])
+
+    assert mailer.failed == 1
+    assert [name.endswith(".failed") for name in os.listdir(tmp_path)] == [True]
+
+
+def test_worker_survives_an_unexpected_error(tmp_path, monkeypatch):
+    sender = FlakySender()
+    mailer = Mailer(lambda: sender, str(tmp_path), workers=1)
+    remove = os.remove
+    calls = []
+
+    def remove_failing_once(path):
+        calls.append(path)
+        if len(calls) == 1:
+            raise PermissionError(path)
+        remove(path)
+
+    monkeypatch.setattr(os, "remove", remove_failing_once)
+
+    async def run():
+        await mailer.start()
+        for message in ["first", "second"]:
+            await mailer.submit({**ITEM, "message": message})
+        await asyncio.wait_for(mailer.join(), timeout=5)
+        await mailer.stop()
+
+    asyncio.run(run())
+
+    assert [item["message"] for item in sender.sent] == ["first", "second"]
+
+
+def test_failed_spool_write_leaves_no_temporary_file(tmp_path, monkeypatch):
+    mailer = Mailer(FlakySender, str(tmp_path))
+
+    def disk_full(*args, **kwargs):
+        raise OSError("disk full")
+
+    monkeypatch.setattr(os, "fsync", disk_full)
+
+    with pytest.raises(OSError):
+        mailer._spool(ITEM)
+
+    assert os.listdir(tmp_path) == []
+
+
+def test_delivers_over_one_reused_smtp_connection(tmp_path):
+    controller_module = pytest.importorskip("aiosmtpd.controller")
+
+    class Inbox:
+        def __init__(self):
+            self.messages = []
+
+        async def handle_DATA(self, server, session, envelope):
+            self.messages.append(envelope.content.decode())
+            return "250 OK"
+
+    with socket.socket() as s:
+        s.bind(("127.0.0.1", 0))
+        port = s.getsockname()[1]
+    inbox = Inbox()
+    controller = controller_module.Controller(inbox, hostname="127.0.0.1", port=port)
+    controller.start()
+    try:
+        sender = SMTPSender("127.0.0.1", port, recipient="me@example.com", starttls=False)
+        mailer = Mailer(lambda: sender, str(tmp_path), workers=1)
+        _deliver(mailer, [{**ITEM, "message": f"note {i}"} for i in range(3)])
+    finally:
+        controller.stop()
+
+    assert len(inbox.messages) == 3
+    assert "Subject: New Contact Form Submission from Ada" in inbox.messages[0]
+    assert sender.connections == 1
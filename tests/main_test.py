@@ -1,9 +1,30 @@
+import sys
+import json
+import asyncio
+import subprocess
+
+import pytest
 from fastapi.testclient import TestClient
+
+from akhilsinghrana.backend import main
 from akhilsinghrana.backend.main import app
+from akhilsinghrana.backend.query_log import QueryLog
+from akhilsinghrana.backend.rate_limit import MemoryRateLimitStore
+from akhilsinghrana.backend.semantic_cache import SemanticCache
+from conftest import BagOfWordsEmbeddings, SlowFakeChatModel, make_chatbot
 
 client = TestClient(app)
 
 
+@pytest.fixture(autouse=True)
+def query_log(tmp_path, monkeypatch):
+    # Chat requests log their question; keep test questions out of db/query_log.jsonl
+    log = QueryLog(str(tmp_path / "query_log.jsonl"))
+    monkeypatch.setattr(main, "query_log", log)
+    yield log
+    log.close()
+
+
 def test_contact_honeypot():
     """Honeypot field filled → silently returns 200 without sending email."""
     response = client.post("/contact", data={
@@ -19,3 +40,196 @@ def test_contact_honeypot():
 def test_blog_not_found():
     response = client.get("/api/blog/nonexistent-slug")
     assert response.status_code == 404
+
+
+def test_chat_rate_limit_returns_retry_after(monkeypatch, query_log):
+    monkeypatch.setattr(main, "rate_limit_store", MemoryRateLimitStore())
+    monkeypatch.setattr(main.CHAT_RATE_LIMIT, "limit", 1)
+    _use_fake_chatbot(monkeypatch, SlowFakeChatModel())
+
+    assert client.post("/api/chat", json={"message": "Who is Akhil"}).status_code == 200
+    response = client.post("/api/chat", json={"message": "Who is Akhil"})
+    assert response.status_code == 429
+    assert int(response.headers["retry-after"]) >= 1
+    assert [question for _, question in query_log.read()] == ["Who is Akhil"]  # rejected requests are not logged
+
+
+def test_blog_is_served_compressed_with_etag():
+    slug = next(iter(main.blog_store._posts))
+    response = client.get(f"/api/blog/{slug}", headers={"Accept-Encoding": "gzip"})
+    assert response.status_code == 200
+    assert response.headers["content-encoding"] == "gzip"
+    assert "<h1" in response.json()["html"]  # httpx decodes the gzip body
+
+    etag = response.headers["etag"]
+    response = client.get(f"/api/blog/{slug}", headers={"Accept-Encoding": "gzip", "If-None-Match": etag})
+    assert response.status_code == 304
+    assert response.content == b""
+
+
+def test_blog_slug_cannot_escape_pages_dir():
+    response = client.get("/api/blog/..%2F..%2Fbackend%2Fmain")
+    assert response.status_code == 404
+
+
+def _use_fake_chatbot(monkeypatch, llm):
+    monkeypatch.setattr(main, "custom_chatBot", make_chatbot(llm))
+    monkeypatch.setattr(main, "_answer_cache", SemanticCache(BagOfWordsEmbeddings()))
+
+
+def test_health_and_readiness(monkeypatch):
+    monkeypatch.setattr(main, "custom_chatBot", None)
+    assert client.get("/healthz").json() == {"status": "ok"}
+    assert client.get("/readyz").json() == {"status": "warming_up"}
+
+    _use_fake_chatbot(monkeypatch, SlowFakeChatModel())
+    assert client.get("/readyz").status_code == 200
+
+
+def test_app_import_leaves_the_chat_stack_unloaded():
+    heavy = ["faiss", "numpy", "langchain_core"]
+    code = f"import sys, akhilsinghrana.backend.main; print([m for m in {heavy} if m in sys.modules])"
+    result = subprocess.run([sys.executable, "-c", code], capture_output=True, text=True, check=True)
+    assert result.stdout.strip() == "[]"
+
+
+def test_chat_batch_answers_in_order_and_fills_the_cache(monkeypatch):
+    monkeypatch.setattr(main, "rate_limit_store", MemoryRateLimitStore())
+    _use_fake_chatbot(monkeypatch, SlowFakeChatModel())
+
+    response = client.post("/api/chat/batch", json={"messages": ["Who is Akhil", "What is RAPIDAI4EO", "Who is Akhil"]})
+
+    assert response.status_code == 200
+    results = response.json()["results"]
+    assert [r["response"] for r in results] == ["Akhil is a machine learning engineer."] * 3
+    assert main.custom_chatBot.llm.generations == 2
+    assert asyncio.run(main._answer_cache.aget("What is RAPIDAI4EO")) is not None
+    assert client.post("/api/chat/batch", json={"messages": []}).status_code == 422
+
+
+def test_metrics_endpoint_reports_cache_and_rate_limits(monkeypatch):
+    monkeypatch.setattr(main, "rate_limit_store", MemoryRateLimitStore())
+    monkeypatch.setattr(main.CHAT_RATE_LIMIT, "limit", 2)
+    _use_fake_chatbot(monkeypatch, SlowFakeChatModel())
+    for _ in range(3):
+        client.post("/api/chat", json={"message": "Who is Akhil"})
+
+    response = client.get("/metrics")
+    assert response.status_code == 200
+    assert response.headers["content-type"].startswith("text/plain")
+    assert 'chat_answer_cache_total{result="hit"}' in response.text
+    assert 'chat_answer_cache_total{result="miss"}' in response.text
+    assert 'rate_limit_rejections_total{policy="chat"}' in response.text
+    assert 'chat_node_seconds_count{node="generate"}' in response.text
+
+
+def test_warm_up_sends_a_probe_embedding(monkeypatch):
+    _use_fake_chatbot(monkeypatch, SlowFakeChatModel())
+    embeddings = main.custom_chatBot.embeddings
+    calls = embeddings.calls
+
+    asyncio.run(main.warm_up())
+
+    assert embeddings.calls == calls + 1
+    assert main._warmup_error is None
+
+
+def test_chatbot_recovers_after_a_failed_warm_up(monkeypatch):
+    bot = make_chatbot(SlowFakeChatModel())
+    builds = []
+
+    def build_chatbot(**kwargs):
+        builds.append(kwargs)
+        if len(builds) == 1:
+            raise ConnectionError("index not reachable")
+        return bot
+
+    monkeypatch.setattr("akhilsinghrana.backend.RAG_Chat.RAGChat", build_chatbot)
+    monkeypatch.setattr(main, "custom_chatBot", None)
+    monkeypatch.setattr(main, "_chatbot_failure", None)
+    monkeypatch.setattr(main, "_warmup_error", None)
+    monkeypatch.setattr(main, "_answer_cache", SemanticCache(BagOfWordsEmbeddings()))
+
+    asyncio.run(main.warm_up())
+    assert client.get("/readyz").json()["status"] == "failed"
+    with pytest.raises(RuntimeError, match="index not reachable"):
+        main.get_chatbot()  # within the cooldown: no rebuild
+    assert len(builds) == 1
+
+    monkeypatch.setattr(main, "CHATBOT_RETRY_SECONDS", 0)
+    assert main.get_chatbot() is bot
+    assert client.get("/readyz").json()["status"] == "ready"
+    assert len(builds) == 2
+
+
+def _sse_events(body: str):
+    for block in body.strip().split("\n\n"):
+        event, data = block.split("\n")
+        yield event.removeprefix("event: "), json.loads(data.removeprefix("data: "))
+
+
+def test_chat_stream_emits_steps_then_tokens(monkeypatch):
+    _use_fake_chatbot(monkeypatch, SlowFakeChatModel())
+
+    with client.stream("POST", "/api/chat/stream", json={"message": "Who is Akhil"}) as response:
+        assert response.headers["content-type"].startswith("text/event-stream")
+        events = list(_sse_events(response.read().decode()))
+
+    kinds = [kind for kind, _ in events]
+    assert kinds[:2] == ["step", "step"]
+    assert kinds.count("token") > 1
+    assert events[-1][0] == "done"
+    assert "".join(data["token"] for kind, data in events if kind == "token") == events[-1][1]["response"]
+
+    # Second request is a cache hit, replayed as a single chunk
+    response = client.post("/api/chat/stream", json={"message": "Who is Akhil"})
+    kinds = [kind for kind, _ in _sse_events(response.text)]
+    assert kinds == ["token", "done"]
+
+
+def test_identical_concurrent_questions_share_one_generation(monkeypatch):
+    llm = SlowFakeChatModel(latency=0.1)
+    _use_fake_chatbot(monkeypatch, llm)
+
+    async def ask_many(n):
+        return await asyncio.gather(*(main.aget_cached_answer("Who is Akhil?") for _ in range(n)))
+
+    replies = asyncio.run(ask_many(50))
+    assert llm.generations == 1
+    assert all(reply == replies[0] for reply in replies)
+
+
+def test_coalesced_failure_reaches_every_waiter_and_is_not_cached(monkeypatch):
+    llm = SlowFakeChatModel(latency=0.1, fail=True)
+    _use_fake_chatbot(monkeypatch, llm)
+
+    async def ask_many(n):
+        return await asyncio.gather(
+            *(main.aget_cached_answer("Who is Akhil?") for _ in range(n)), return_exceptions=True
+        )
+
+    results = asyncio.run(ask_many(10))
+    assert llm.generations == 1
+    assert all(isinstance(result, RuntimeError) for result in results)
+    assert len(main._answer_cache) == 0
+
+
+def test_identical_concurrent_streams_share_one_generation(monkeypatch):
+    llm = SlowFakeChatModel(latency=0.1)
+    _use_fake_chatbot(monkeypatch, llm)
+
+    async def stream(message):
+        return "".join([chunk async for chunk in main.stream_cached_answer(message)])
+
+    async def ask_many(n):
+        streams = [stream("Who is Akhil?") for _ in range(n - 1)]
+        return await asyncio.gather(*streams, main.aget_cached_answer("who is akhil"))
+
+    *streams, reply = asyncio.run(ask_many(10))
+    assert llm.generations == 1
+
+    events = [list(_sse_events(text)) for text in streams]
+    leaders = [e for e in events if not e[-1][1]["cached"]]
+    assert len(leaders) == 1 and [kind for kind, _ in leaders[0]].count("token") > 1
+    assert all([kind for kind, _ in e] == ["token", "done"] for e in events if e not in leaders)
+    assert all(e[-1][1]["response"] == reply["response"] for e in events)
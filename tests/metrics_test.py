@@ -0,0 +1,64 @@
+import asyncio
+
+from langchain_core.messages import AIMessage
+from langchain_core.outputs import ChatGeneration, LLMResult
+
+from akhilsinghrana.backend import metrics
+from conftest import SlowFakeChatModel, make_chatbot
+
+
+def test_histogram_renders_cumulative_buckets():
+    histogram = metrics.Histogram("test_seconds", "Test.", ["op"], buckets=(0.1, 1.0))
+    histogram.labels(op="a").observe(0.05)
+    histogram.labels(op="a").observe(0.5)
+    histogram.labels(op="a").observe(5)
+    text = metrics.render()
+
+    assert '# TYPE test_seconds histogram' in text
+    assert 'test_seconds_bucket{op="a",le="0.1"} 1' in text
+    assert 'test_seconds_bucket{op="a",le="1.0"} 2' in text
+    assert 'test_seconds_bucket{op="a",le="+Inf"} 3' in text
+    assert 'test_seconds_count{op="a"} 3' in text
+    metrics.REGISTRY.remove(histogram)
+
+
+def test_label_values_are_escaped():
+    counter = metrics.Counter("test_total", "Test.", ["path"])
+    counter.labels(path='a"b\\c').inc(2)
+    assert 'test_total{path="a\\"b\\\\c"} 2.0' in metrics.render()
+    metrics.REGISTRY.remove(counter)
+
+
+def test_graph_nodes_are_timed():
+    retrieve = metrics.NODE_SECONDS.labels(node="retrieve")
+    generate = metrics.NODE_SECONDS.labels(node="generate")
+    before = retrieve.count, generate.count
+
+    bot = make_chatbot(SlowFakeChatModel())
+    bot.get_answer({"input": "Who is Akhil"})
+    asyncio.run(bot.aget_answer({"input": "Who is Akhil"}))
+
+    assert (retrieve.count, generate.count) == (before[0] + 2, before[1] + 2)
+
+
+def test_token_usage_callback_counts_tokens():
+    prompt = metrics.LLM_TOKENS.labels(kind="prompt")
+    completion = metrics.LLM_TOKENS.labels(kind="completion")
+    before = prompt.value, completion.value
+
+    handler = metrics.TokenUsageCallback()
+    handler.on_llm_end(LLMResult(generations=[], llm_output={"token_usage": {"prompt_tokens": 7, "completion_tokens": 3}}))
+    message = AIMessage(content="hi", usage_metadata={"input_tokens": 2, "output_tokens": 1, "total_tokens": 3})
+    handler.on_llm_end(LLMResult(generations=[[ChatGeneration(message=message)]]))
+
+    assert (prompt.value, completion.value) == (before[0] + 9, before[1] + 4)
+
+
+def test_disabled_instrumentation_leaves_nodes_unwrapped(monkeypatch):
+    monkeypatch.setattr(metrics, "ENABLED", False)
+
+    def node(state):
+        return state
+
+    assert metrics.timed_node("node", node) is node
+    assert metrics.callbacks() == []
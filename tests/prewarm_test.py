@@ -0,0 +1,110 @@
+import sys
+import json
+import asyncio
+import argparse
+
+from langchain_core.documents import Document
+
+from akhilsinghrana.backend import answer_cache, main, prewarm
+from akhilsinghrana.backend.query_log import QueryLog
+from conftest import SlowFakeChatModel, make_chatbot
+
+CONTENT = {
+    "about": {"name": "Akhil Singh Rana", "skills": ["PyTorch"]},
+    "education": [{"school": "TU Berlin"}],
+    "publications": [{"title": "RAPIDAI4EO"}],
+    "blogs": [],
+}
+
+
+def test_candidate_questions_from_content_headings_and_log():
+    site = prewarm.site_questions(CONTENT)
+    assert "Who is Akhil" in site and "Does Akhil have experience with PyTorch" in site
+    assert 'What is the paper "RAPIDAI4EO" about' in site
+
+    documents = [
+        Document(page_content="...", metadata={"Header 2": "1. Satellite imagery", "Header 3": "Conclusion"}),
+        Document(page_content="...", metadata={"Header 2": "1. Satellite imagery"}),
+    ]
+    assert prewarm.heading_questions(documents) == ["What does Akhil's blog say about Satellite imagery"]
+
+    log = ["who is akhil?", "Who is Akhil", "Who is Akhil", "What is RAPIDAI4EO", "  "]
+    assert prewarm.frequent_questions(log, top=5) == ["Who is Akhil", "What is RAPIDAI4EO"]
+    assert prewarm.unique_questions(site[:1], log) == ["Who is Akhil", "What is RAPIDAI4EO"]
+
+
+def test_query_log_rotates_and_reads_both_generations(tmp_path):
+    log = QueryLog(str(tmp_path / "log" / "queries.jsonl"), max_bytes=120)
+    for i in range(6):
+        log.append(f"Question {i}")
+    log.close()
+    with open(log.path, "a", encoding="utf-8") as f:
+        f.write('{"ts": 1, "quest')  # torn write
+
+    assert (tmp_path / "log" / "queries.jsonl.1").exists()
+    assert [question for _, question in log.read()] == ["Question 3", "Question 4", "Question 5"]
+
+
+def test_pacer_spaces_calls_and_backs_off():
+    now = [0.0]
+    pacer = prewarm.Pacer("2/10", clock=lambda: now[0], sleep=lambda s: now.__setitem__(0, now[0] + s))
+
+    for _ in range(3):
+        pacer.wait()
+    assert 4.9 <= now[0] <= 5.1  # a burst of two, then one token every 5s
+
+    pacer.backoff(30)
+    pacer.wait()
+    assert now[0] >= 35
+
+
+def test_fallback_answers_are_not_prewarmed():
+    fallback = SlowFakeChatModel(answer="Answer from the fallback.")
+    chatbot = make_chatbot(SlowFakeChatModel(fail=True), fallback_llm=fallback)
+
+    answers, failures = prewarm.answer_all(chatbot, ["Who is Akhil"], 1, prewarm.Pacer("1000/1"), max_retries=0)
+
+    assert answers == {} and list(failures) == ["Who is Akhil"]
+    assert fallback.generations == 0
+
+
+def test_run_answers_uncached_questions_and_raises_the_replay_hit_ratio(tmp_path, monkeypatch):
+    site_content = tmp_path / "site-content.json"
+    site_content.write_text(json.dumps(CONTENT))
+    blogs = tmp_path / "blogs"
+    blogs.mkdir()
+    output = tmp_path / "bot_cache.json"
+    prewarm.save_bot_cache(str(output), {"Who is Akhil": {"output": "Shipped answer."}})
+    query_log = QueryLog(str(tmp_path / "queries.jsonl"))
+    for question in ["What is RAPIDAI4EO"] * 3 + ["What are Akhil's skills", "What is RAPIDAI4EO?"]:
+        query_log.append(question)
+    query_log.close()
+
+    llm = SlowFakeChatModel()
+    args = argparse.Namespace(
+        site_content=str(site_content), blogs=str(blogs), query_log=query_log.path, top=10, holdout=0.4,
+        output=str(output), refresh=False, into_store=False, concurrency=2, rate="1000/1", max_retries=0,
+    )
+    monkeypatch.setattr(answer_cache, "CACHE_SIMILARITY_THRESHOLD", 0.99)
+    # The job must not import the app (and with it the query log, rate-limit store and mailer)
+    monkeypatch.delitem(sys.modules, "akhilsinghrana.backend.main")
+    monkeypatch.delattr("akhilsinghrana.backend.main")
+    report = prewarm.run(args, chatbot=make_chatbot(llm))
+    assert "akhilsinghrana.backend.main" not in sys.modules
+
+    cached = prewarm.load_bot_cache(str(output))
+    assert cached["Who is Akhil"] == {"output": "Shipped answer."}
+    assert "What is RAPIDAI4EO" in cached and "What does Akhil do" in cached
+    assert report["already_cached"] == 1 and report["answered"] == report["unique_candidates"] - 1
+    assert report["replay"] == {"questions": 2, "hit_ratio_before": 0.0, "hit_ratio_after": 1.0}
+    assert report["cache_entries"] == len(cached)
+
+
+def test_chat_questions_are_logged(tmp_path, monkeypatch):
+    log = QueryLog(str(tmp_path / "queries.jsonl"))
+    monkeypatch.setattr(main, "query_log", log)
+
+    asyncio.run(main.log_question("Who is Akhil"))
+    log.close()
+
+    assert [question for _, question in log.read()] == ["Who is Akhil"]
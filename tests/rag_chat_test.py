@@ -0,0 +1,169 @@
+import re
+import asyncio
+
+from langchain_core.runnables import RunnableLambda
+
+from akhilsinghrana.backend.embeddings import CachedEmbeddings
+from conftest import SlowFakeChatModel, make_chatbot
+
+
+def test_aget_answer_returns_generation(slow_llm):
+    bot = make_chatbot(slow_llm)
+    reply = asyncio.run(bot.aget_answer({"input": "Who is Akhil"}))
+    assert reply["response"] == slow_llm.answer
+    assert reply["steps"] == [
+        "retrieve_documents",
+        "grade_document_retrieval",
+        *["grade_by_llm"] * 3,  # the fake retriever reports no scores
+        "generate_answer",
+    ]
+
+
+class BarrierChatModel(SlowFakeChatModel):
+    """Holds every call until calls for `parties` different questions have started."""
+
+    parties: int = 1
+    started: set = set()
+
+    async def _agenerate(self, messages, stop=None, run_manager=None, **kwargs):
+        self.started.update(re.findall(r"question \d+", messages[-1].content))
+        while len(self.started) < self.parties:
+            await asyncio.sleep(0.01)
+        return self._respond(messages)
+
+
+def test_concurrent_chats_do_not_block_each_other():
+    """Every chat gets to its first LLM call while the others are still waiting on theirs."""
+    n = 10
+    llm = BarrierChatModel(parties=n, started=set())
+    bot = make_chatbot(llm)
+
+    async def run_many():
+        chats = asyncio.gather(*(bot.aget_answer({"input": f"question {i}"}) for i in range(n)))
+        return await asyncio.wait_for(chats, timeout=30)  # only hit if one chat blocks the others
+
+    replies = asyncio.run(run_many())
+
+    assert len(replies) == n
+    assert llm.started == {f"question {i}" for i in range(n)}
+
+
+def test_batch_grading_uses_a_single_llm_call():
+    llm = SlowFakeChatModel()
+    bot = make_chatbot(llm, grading_mode="batch")
+    reply = bot.get_answer({"input": "Who is Akhil"})
+    assert "web_search" not in reply["steps"]
+    assert llm.calls == 2  # one batch grade + one generation
+
+
+def test_batch_grading_falls_back_per_document_on_malformed_json():
+    llm = SlowFakeChatModel(batch_reply='{"scores": ["yes"]}')  # wrong length
+    bot = make_chatbot(llm, grading_mode="batch")
+    grades = asyncio.run(bot.agrade("Who is Akhil", bot.retriever.invoke("Who is Akhil")))
+    assert grades == ["yes", "yes", "yes"]
+    assert llm.calls == 4  # rejected batch call + three per-document calls
+
+
+def test_rejected_document_triggers_web_search():
+    bot = make_chatbot(SlowFakeChatModel(grade="no"))
+    bot._web_search_tool = RunnableLambda(lambda query: {"results": [{"content": "web hit", "url": "https://x"}]})
+    reply = bot.get_answer({"input": "What is the weather"})
+    assert reply["steps"][-2:] == ["web_search", "generate_answer"]
+
+
+def test_confident_scores_skip_the_grader():
+    llm = SlowFakeChatModel()
+    bot = make_chatbot(llm, scores=[0.9, 0.5, 0.1], relevance_accept=0.75, relevance_reject=0.35)
+    bot._web_search_tool = RunnableLambda(lambda query: {"results": []})
+
+    reply = bot.get_answer({"input": "Who is Akhil"})
+
+    assert reply["steps"][1:5] == ["grade_document_retrieval", "accept_by_score", "grade_by_llm", "reject_by_score"]
+    assert "web_search" in reply["steps"]  # a rejected document still asks for more context
+    assert llm.calls == 2  # one grade for the uncertain document + one generation
+
+
+def test_all_confident_documents_need_no_llm_grading():
+    llm = SlowFakeChatModel(grade="no")  # would reject everything if asked
+    bot = make_chatbot(llm, scores=[0.95, 0.8, 0.76])
+    reply = asyncio.run(bot.aget_answer({"input": "Who is Akhil"}))
+    assert reply["steps"].count("accept_by_score") == 3
+    assert "web_search" not in reply["steps"]
+    assert llm.calls == 1
+
+
+def _faiss_chatbot(llm, **settings):
+    from langchain_community.vectorstores import FAISS
+
+    from fakes import DEFAULT_DOCUMENTS, BagOfWordsEmbeddings, FakeWebSearch
+
+    embeddings = BagOfWordsEmbeddings(normalize=True)
+    vectorstore = FAISS.from_texts(DEFAULT_DOCUMENTS, embeddings)
+    return make_chatbot(llm, vectorstore=vectorstore, embeddings=embeddings, web_search_tool=FakeWebSearch(), **settings)
+
+
+def test_get_answers_shares_retrieval_and_keeps_input_order():
+    llm = SlowFakeChatModel()
+    bot = _faiss_chatbot(llm)
+    bot.embeddings = bot.vectorstore.embedding_function = CachedEmbeddings(bot.embeddings)  # as load_vector_store
+    questions = ["Who built RAPIDAI4EO", "What does Akhil work on", "Who built  RAPIDAI4EO"]
+    calls = bot.embeddings.inner.calls
+
+    replies = bot.get_answers(questions)
+
+    assert bot.embeddings.inner.calls == calls + 1  # the batch was embedded in one call...
+    assert bot.embeddings.stats()["misses"] == 2  # ...and the duplicate only once
+    assert [reply["response"] for reply in replies] == [llm.answer] * 3
+    assert replies[0] is replies[2]  # the duplicate was answered once
+    assert llm.generations == 2
+    inner_calls = bot.embeddings.inner.calls
+    single = asyncio.run(bot.aget_answer({"input": "Who built RAPIDAI4EO"}))
+    assert replies[0]["steps"] == single["steps"]
+    assert bot.embeddings.inner.calls == inner_calls  # batch questions warm the single-chat query cache
+
+
+def test_get_answers_runs_the_shared_pass_on_the_fallback_when_the_primary_is_down(monkeypatch):
+    from akhilsinghrana.backend.RAG_Chat import RAGChat
+
+    monkeypatch.setattr(RAGChat, "breaker_failures", 1)
+    llm = SlowFakeChatModel(failure_rate=1.0)
+    fallback = SlowFakeChatModel(answer="Answer from the fallback.")
+    bot = _faiss_chatbot(llm, fallback_llm=fallback)
+
+    replies = bot.get_answers(["Who built RAPIDAI4EO", "What does Akhil work on"])
+
+    assert [reply["response"] for reply in replies] == [fallback.answer] * 2
+    assert fallback.generations == 2
+    llm_calls = llm.calls
+    bot.get_answers(["What is RAPIDAI4EO"])
+    assert bot.router.states()["slow-fake"] == "open"
+    assert llm.calls == llm_calls  # the open breaker keeps batches off the primary too
+
+
+def test_batched_faiss_search_matches_the_retriever():
+    bot = _faiss_chatbot(SlowFakeChatModel())
+    questions = ["Who built RAPIDAI4EO", "computer vision research"]
+    batched = bot._search_many(bot.vectorstore, [bot.embeddings.embed_query(q) for q in questions])
+    for question, hits in zip(questions, batched):
+        expected = bot.retriever.invoke(question)
+        assert [d.page_content for d, _ in hits] == [d.page_content for d, _ in expected]
+        assert [round(s, 5) for _, s in hits] == [round(s, 5) for _, s in expected]
+
+
+def test_get_answers_reports_errors_per_item():
+    def generate(inputs):
+        if inputs["question"] == "boom":
+            raise RuntimeError("generation failed")
+        return "ok"
+
+    def run_graph(inputs):
+        raise RuntimeError("still failing")
+
+    bot = make_chatbot(SlowFakeChatModel())
+    bot.rag_chain = RunnableLambda(generate)
+    bot.router.providers[0].runnable = RunnableLambda(run_graph)  # the per-question retry fails too
+
+    replies = asyncio.run(bot.aget_answers(["first", "boom", "third"]))
+
+    assert [reply.get("response") for reply in replies] == ["ok", None, "ok"]
+    assert "still failing" in replies[1]["error"]
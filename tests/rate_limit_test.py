@@ -0,0 +1,52 @@
+import pytest
+
+from akhilsinghrana.backend.rate_limit import MemoryRateLimitStore, RateLimitPolicy, SQLiteRateLimitStore
+
+
+def _hits(store, policy, times, key="ip"):
+    return [store.hit(key, policy, now=t)[0] for t in times]
+
+
+def test_sliding_window_weights_previous_window():
+    policy = RateLimitPolicy("chat", limit=4, window=10)
+    store = MemoryRateLimitStore()
+
+    assert _hits(store, policy, [100, 101, 102, 103, 104]) == [True, True, True, True, False]
+    # Halfway into the next window half of the previous 4 still count
+    assert _hits(store, policy, [115, 115, 115]) == [True, True, False]
+    allowed, retry_after = store.hit("ip", policy, now=115)
+    assert not allowed and 0 < retry_after <= 5
+
+
+def test_token_bucket_refills_over_time():
+    policy = RateLimitPolicy("chat", limit=2, window=10, algorithm="token_bucket")
+    store = MemoryRateLimitStore()
+
+    assert _hits(store, policy, [0, 0, 0]) == [True, True, False]
+    assert store.hit("ip", policy, now=1)[1] == pytest.approx(4.0)
+    assert _hits(store, policy, [5, 5]) == [True, False]
+
+
+def test_idle_keys_are_evicted_and_capped():
+    policy = RateLimitPolicy("chat", limit=1, window=10)
+    store = MemoryRateLimitStore(max_keys=3, sweep_interval=30)
+
+    for i in range(5):
+        store.hit(f"ip{i}", policy, now=0)
+    assert len(store) == 3  # least recently used dropped
+    store.hit("late", policy, now=100)
+    assert len(store) == 1  # sweep removed everything idle past 2 windows
+
+
+def test_sqlite_store_is_shared_between_workers(tmp_path):
+    path = str(tmp_path / "limits.sqlite3")
+    policy = RateLimitPolicy.parse("contact", "3/3600")
+    worker_a, worker_b = SQLiteRateLimitStore(path), SQLiteRateLimitStore(path)
+
+    assert _hits(worker_a, policy, [0, 1]) + _hits(worker_b, policy, [2, 3]) == [True, True, True, False]
+    assert len(worker_b) == 1
+
+
+def test_invalid_policy_spec():
+    with pytest.raises(ValueError):
+        RateLimitPolicy.parse("chat", "twenty per minute")
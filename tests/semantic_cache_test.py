@@ -0,0 +1,42 @@
+import asyncio
+import time
+
+from akhilsinghrana.backend.semantic_cache import SemanticCache, normalize_question
+from conftest import BagOfWordsEmbeddings
+
+ANSWER = {"response": "Akhil is an ML engineer.", "steps": ["retrieve_documents"]}
+
+
+def test_normalize_question():
+    assert normalize_question("  Who is   AKHIL?? ") == "who is akhil"
+
+
+def test_exact_normalised_match_skips_embedding():
+    embeddings = BagOfWordsEmbeddings()
+    cache = SemanticCache(embeddings)
+    cache.put("Who is Akhil", ANSWER)
+    calls = embeddings.calls
+    assert cache.get("who is akhil?") == ANSWER
+    assert embeddings.calls == calls
+
+
+def test_paraphrase_above_threshold_hits():
+    cache = SemanticCache(BagOfWordsEmbeddings(), threshold=0.9)
+    cache.put("Who is Akhil Singh Rana", ANSWER)
+    assert asyncio.run(cache.aget("who is akhil singh rana please")) == ANSWER
+    assert cache.get("what is the weather in berlin") is None
+    assert cache.stats() == {"size": 1, "hits": 1, "misses": 1, "hit_ratio": 0.5}
+
+
+def test_lru_and_ttl_eviction(monkeypatch):
+    cache = SemanticCache(BagOfWordsEmbeddings(), max_size=2, ttl=60)
+    cache.put("first question", ANSWER)
+    cache.put("second question", ANSWER)
+    cache.get("first question")  # refresh, so "second" is now least recently used
+    cache.put("third question", ANSWER)
+    assert [q for q, _ in cache.items()] == ["first question", "third question"]
+
+    now = time.time()
+    monkeypatch.setattr("akhilsinghrana.backend.semantic_cache.time.time", lambda: now + 120)
+    assert cache.get("first question") is None
+    assert len(cache) == 1
@@ -0,0 +1,108 @@
+import os
+from concurrent.futures import ThreadPoolExecutor
+
+import pytest
+from langchain_community.vectorstores import FAISS
+
+from akhilsinghrana.backend.RAG_Chat import RAGChat
+from akhilsinghrana.backend.vector_store import MMapVectorStore
+from conftest import BagOfWordsEmbeddings, FakeWebSearch, SlowFakeChatModel, make_chatbot
+
+TEXTS = [
+    "Akhil Singh Rana works on Earth Observation.",
+    "He built the RAPIDAI4EO dataset.",
+    "He enjoys computer vision research — and café culture.",
+] + [f"Filler chunk {i} about subject {i % 11} and nothing else" for i in range(300)]
+
+
+@pytest.fixture(scope="module")
+def faiss_store():
+    metadatas = [{"source": f"post-{i % 5}.html", "Header 2": f"Section {i}"} for i in range(len(TEXTS))]
+    return FAISS.from_texts(TEXTS, BagOfWordsEmbeddings(normalize=True), metadatas=metadatas)
+
+
+def _hits(vectorstore, question):
+    return [(d.page_content, d.metadata, round(s, 5)) for d, s in RAGChat.as_retriever(vectorstore).invoke(question)]
+
+
+def test_flat_store_matches_faiss_without_pickle(faiss_store, tmp_path):
+    store = MMapVectorStore.from_faiss(faiss_store, str(tmp_path / "store"))
+
+    assert sorted(os.listdir(tmp_path / "store")) == ["docs.bin", "docs.idx", "index.faiss", "meta.json"]
+    assert len(store) == len(TEXTS)
+    for question in ["Who built RAPIDAI4EO", "café culture and vision research", "subject 7"]:
+        assert _hits(store, question) == _hits(faiss_store, question)
+
+    reloaded = MMapVectorStore.load(str(tmp_path / "store"), faiss_store.embedding_function)
+    assert _hits(reloaded, "Who built RAPIDAI4EO") == _hits(faiss_store, "Who built RAPIDAI4EO")
+
+
+@pytest.mark.parametrize("index, params", [("hnsw", {"ef_search": len(TEXTS)}), ("ivfpq", {})])
+def test_approximate_indexes_find_the_same_best_chunk(faiss_store, tmp_path, index, params):
+    # Bag-of-words vectors are mostly orthogonal, a plateau greedy HNSW search can stall on;
+    # searching as wide as this tiny corpus keeps the (multi-threaded, so varying) graph build irrelevant
+    store = MMapVectorStore.from_faiss(faiss_store, str(tmp_path / index), index=index, **params)
+    assert store.meta["index"] == index
+    for question in ["Who built RAPIDAI4EO", "Earth Observation", "café culture"]:
+        assert _hits(store, question)[0] == _hits(faiss_store, question)[0]
+
+
+def test_batched_search_matches_single_queries(faiss_store, tmp_path):
+    store = MMapVectorStore.from_faiss(faiss_store, str(tmp_path / "store"))
+    questions = ["Who built RAPIDAI4EO", "subject 3"]
+    vectors = faiss_store.embedding_function.embed_documents(questions)
+
+    batched = store.similarity_search_with_relevance_scores_by_vectors(vectors, k=3, score_threshold=0.1)
+
+    assert [[(d.page_content, s) for d, s in hits] for hits in batched] == [
+        [(d.page_content, s) for d, s in store.similarity_search_with_relevance_scores(q, k=3, score_threshold=0.1)]
+        for q in questions
+    ]
+
+
+def test_rebuild_replaces_the_store(faiss_store, tmp_path):
+    directory = str(tmp_path / "store")
+    MMapVectorStore.from_faiss(faiss_store, directory)
+    embeddings = BagOfWordsEmbeddings(normalize=True)
+    store = MMapVectorStore.from_texts(["only chunk"], embeddings, directory=directory)
+
+    assert len(store) == 1
+    assert os.listdir(tmp_path) == ["store"]  # no staging or swapped-out directories left behind
+    with pytest.raises(NotImplementedError):
+        store.add_texts(["more"])
+
+
+def test_get_answers_searches_the_mmap_store_once(faiss_store, tmp_path):
+    embeddings = BagOfWordsEmbeddings(normalize=True)
+    store = MMapVectorStore.from_faiss(faiss_store, str(tmp_path / "store"))
+    store.embedding = embeddings
+    llm = SlowFakeChatModel()
+    bot = make_chatbot(llm, vectorstore=store, embeddings=embeddings, web_search_tool=FakeWebSearch())
+
+    replies = bot.get_answers(["Who built RAPIDAI4EO", "Earth Observation"])
+
+    assert [reply["response"] for reply in replies] == [llm.answer] * 2
+    assert embeddings.calls == 1  # both questions embedded in one call
+
+
+def test_open_or_build_converts_once_and_follows_the_source(faiss_store, tmp_path):
+    source, directory = str(tmp_path / "faiss_db"), str(tmp_path / "mmap_db")
+    faiss_store.save_local(source)
+    loads = []
+
+    def load_source():
+        loads.append(1)
+        return FAISS.load_local(source, faiss_store.embedding_function, allow_dangerous_deserialization=True)
+
+    def open_store(_):
+        return len(MMapVectorStore.open_or_build(directory, source, load_source))
+
+    with ThreadPoolExecutor(4) as pool:  # like workers starting together without a store
+        assert list(pool.map(open_store, range(4))) == [len(TEXTS)] * 4
+    assert len(loads) == 1
+
+    changed = FAISS.from_texts(TEXTS[:3], faiss_store.embedding_function)
+    changed.save_local(source)
+    assert len(MMapVectorStore.open_or_build(directory, source, load_source)) == 3  # stale export rebuilt
+    assert len(loads) == 2
+    assert sorted(os.listdir(tmp_path)) == ["faiss_db", "mmap_db", "mmap_db.lock"]
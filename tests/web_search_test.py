@@ -0,0 +1,138 @@
+import asyncio
+
+from akhilsinghrana.backend.web_search import CachedWebSearch
+from conftest import FakeWebSearch, SlowFakeChatModel, make_chatbot
+
+
+class FakeClock:
+    def __init__(self):
+        self.now = 0.0
+
+    def __call__(self):
+        return self.now
+
+
+def test_results_are_cached_per_normalised_query_until_they_expire():
+    search, clock = FakeWebSearch(), FakeClock()
+    cache = CachedWebSearch(search, ttl=60, clock=clock)
+
+    first = cache.invoke({"query": "Who is Akhil"})
+    assert asyncio.run(cache.ainvoke({"query": "  Who is   Akhil "})) == first
+    assert search.calls == 1
+
+    clock.now = 61
+    cache.invoke({"query": "Who is Akhil"})
+    assert search.calls == 2
+    assert cache.stats() == {"size": 1, "hits": 1, "joined": 0, "misses": 2, "hit_rate": 1 / 3}
+
+
+def test_lru_is_bounded():
+    cache = CachedWebSearch(FakeWebSearch(), max_size=2)
+    for query in ["one", "two", "three"]:
+        cache.invoke({"query": query})
+    assert cache.stats()["size"] == 2
+
+
+def test_concurrent_lookups_share_one_search():
+    search = FakeWebSearch(latency=0.05)
+    cache = CachedWebSearch(search)
+
+    async def ask_twice():
+        return await asyncio.gather(*(cache.ainvoke({"query": "RAPIDAI4EO"}) for _ in range(2)))
+
+    first, second = asyncio.run(ask_twice())
+    assert first == second
+    assert search.calls == 1
+    assert cache.stats()["joined"] == 1
+
+
+def test_unneeded_prefetch_is_cancelled():
+    search = FakeWebSearch(latency=0.05)
+    cache = CachedWebSearch(search)
+
+    async def prefetch_and_drop():
+        prefetch = cache.prefetch({"query": "RAPIDAI4EO"})
+        await asyncio.sleep(0)
+        prefetch.settle(needed=False)
+        await asyncio.sleep(0.1)
+
+    asyncio.run(prefetch_and_drop())
+    assert search.calls == 0
+    assert cache.stats()["size"] == 0
+
+
+def test_discard_cancels_only_searches_nobody_waits_for():
+    search = FakeWebSearch(latency=0.05)
+    cache = CachedWebSearch(search)
+
+    async def ask_and_discard():
+        waiter = asyncio.create_task(cache.ainvoke({"query": "Who is Akhil"}))
+        await asyncio.sleep(0)
+        assert not cache.discard("Who is Akhil")  # a caller is waiting for it
+        waiter.cancel()
+        await asyncio.sleep(0)
+        assert cache.discard("  Who is Akhil ")  # the search outlived its only caller
+        assert not cache.discard("Who is Akhil")
+        await asyncio.sleep(0.1)
+
+    asyncio.run(ask_and_discard())
+    assert search.calls == 0
+    assert cache.stats()["size"] == 0
+
+
+class RecordingWebSearch(FakeWebSearch):
+    def __init__(self, events, **kwargs):
+        super().__init__(**kwargs)
+        self.events = events
+
+    async def ainvoke(self, input, config=None):
+        self.events.append("search started")
+        try:
+            return await super().ainvoke(input, config)
+        finally:
+            self.events.append("search finished")
+
+
+class RecordingChatModel(SlowFakeChatModel):
+    events: list
+
+    async def _agenerate(self, messages, stop=None, run_manager=None, **kwargs):
+        prompt = messages[-1].content
+        kind = "grading" if "grader" in prompt or "'scores'" in prompt else "generation"
+        self.events.append(f"{kind} started")
+        try:
+            return await super()._agenerate(messages, stop, run_manager, **kwargs)
+        finally:
+            self.events.append(f"{kind} finished")
+
+    async def _astream(self, messages, stop=None, run_manager=None, **kwargs):  # generation streams its tokens
+        self.events.append("generation started")
+        async for chunk in super()._astream(messages, stop, run_manager, **kwargs):
+            yield chunk
+
+
+def test_speculative_search_overlaps_grading():
+    llm = RecordingChatModel(events=[], latency=0.05, grade="no")
+    events = llm.events  # pydantic copied the list, so share the model's
+    search = RecordingWebSearch(events, latency=0.05)
+    bot = make_chatbot(llm, scores=[0.5, 0.5, 0.5], web_search_tool=search, speculative_search_score=0.6)
+
+    reply = asyncio.run(bot.aget_answer({"input": "Who is Akhil"}))
+
+    assert reply["steps"][-2:] == ["web_search", "generate_answer"]
+    assert search.calls == 1
+    # The search started while documents were still being graded, and generation waited for it
+    assert events.index("search started") < events.index("grading finished")
+    assert events.index("search finished") < events.index("generation started")
+
+
+def test_speculative_search_is_dropped_when_grading_keeps_every_document():
+    search = FakeWebSearch(latency=0.2)
+    bot = make_chatbot(
+        SlowFakeChatModel(latency=0.05), scores=[0.5, 0.5, 0.5], web_search_tool=search, speculative_search_score=0.6
+    )
+
+    reply = asyncio.run(bot.aget_answer({"input": "Who is Akhil"}))
+
+    assert "web_search" not in reply["steps"]
+    assert search.calls == 0  # cancelled before the fake counted the call